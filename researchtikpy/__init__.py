@@ -1,27 +1,63 @@
-from .get_access_token import get_access_token
+from .adaptive_query import get_videos_query_adaptive
+from .get_access_token import AccessTokenProvider, get_access_token
+from .get_liked_videos import collect_liked_videos, get_liked_videos
+from .get_pinned_videos import collect_pinned_videos, get_pinned_videos
+from .get_query import (
+    get_videos_hashtag,
+    get_videos_info,
+    get_videos_query,
+    iter_video_frames,
+    iter_videos,
+)
+from .get_users_info import get_users_info, get_users_info_bulk
+from .get_video_comments import collect_video_comments, get_video_comments
+from .pipeline import run_enrichment_pipeline
+from .query_lang import (
+    CompiledQuery,
+    Condition,
+    Fields,
+    Operators,
+    Query,
+    RegionCodes,
+    VideoFields,
+    VideoLengths,
+    compile_query,
+)
+from .sampling import sample_videos
+from .shops import collect_product_reviews, collect_products, collect_shops
 from .social_graph import get_followers, get_following
-from .get_liked_videos import get_liked_videos
-from .get_pinned_videos import get_pinned_videos
-from .get_users_info import get_users_info
-from .get_video_comments import get_video_comments
-from .get_query import get_videos_hashtag, get_videos_query, get_videos_info
-from .query_lang import Fields, Operators, Condition, Query, RegionCodes, VideoLengths
 
 __all__ = [
-    'get_access_token',
-    'get_followers',
-    'get_following',
-    'get_liked_videos',
-    'get_pinned_videos',
-    'get_users_info',
-    'get_video_comments',
-    'get_videos_hashtag',
-    'get_videos_query',
-    'get_videos_info',
-    'Fields',
-    'Operators',
-    'Condition',
-    'Query',
-    'RegionCodes',
-    'VideoLengths',
+    "get_access_token",
+    "AccessTokenProvider",
+    "get_followers",
+    "get_following",
+    "get_liked_videos",
+    "collect_liked_videos",
+    "get_pinned_videos",
+    "collect_pinned_videos",
+    "get_users_info",
+    "get_users_info_bulk",
+    "get_video_comments",
+    "collect_video_comments",
+    "get_videos_hashtag",
+    "get_videos_query",
+    "get_videos_info",
+    "iter_videos",
+    "iter_video_frames",
+    "get_videos_query_adaptive",
+    "sample_videos",
+    "run_enrichment_pipeline",
+    "collect_shops",
+    "collect_products",
+    "collect_product_reviews",
+    "Fields",
+    "Operators",
+    "Condition",
+    "Query",
+    "RegionCodes",
+    "VideoLengths",
+    "VideoFields",
+    "CompiledQuery",
+    "compile_query",
 ]
@@ -0,0 +1,156 @@
+"""Adaptive date-window planning for video queries.
+
+Fixed-size windows waste requests on quiet days and produce very long cursor
+chains on busy ones. Long chains are slow to walk serially and are the ones that
+run into "Search Id ... is invalid or expired" failures. The planner here
+starts with large windows, and whenever a window is still `has_more` after a
+given number of pages, it splits the window in two and schedules both halves
+on the thread pool. The smallest window is a single day, because the API does
+not filter on anything finer than a date.
+
+The API offers no way to continue a cursor chain in one half of its window, so
+both halves start again from cursor 0. The pages of the split window are kept,
+but their videos are requested again by the halves; these re-fetched pages are
+the price of splitting and are reported in `df.attrs["splitting"]`.
+"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+
+import pandas as pd
+
+from .date_windows import DateWindow, WindowSize, split_date_range
+from .get_query import iter_pages, merge_videos, window_query_body
+from .query_lang import Query, as_dict
+
+logger = getLogger(__name__)
+
+
+def get_videos_query_adaptive(
+    query: Query,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    total_max_count: int | None = None,
+    max_count=100,
+    max_pages_per_window: int = 10,
+    initial_window_size: int = WindowSize.month,
+    max_workers: int = 4,
+    fields=None,
+) -> pd.DataFrame:
+    """Like `get_videos_query`, but adapts the date windows to the density of results.
+
+    Every window is paginated for at most `max_pages_per_window` pages. If the API
+    still reports `has_more`, the window is split into two halves which are
+    queried in parallel. The videos already received are kept, duplicates
+    from the halves are dropped. Single-day windows are never split and are
+    paginated to the end.
+
+    The halves restart from cursor 0, so they request the videos of the split
+    window's pages again. `df.attrs["splitting"]` holds the number of
+    `split_windows`, of `refetched_pages` (the pages of the split windows, which
+    the halves request again) and of `duplicate_videos` received more than once.
+
+    Parameters:
+    - query: The query to post to the API.
+    - access_token: Your valid access token for the TikTok Research API.
+    - start_date: The start date for the search (format YYYYMMDD).
+    - end_date: The end date for the search (format YYYYMMDD).
+    - total_max_count: Optional; the total maximum number of videos to collect.
+    - max_count: The maximum number of videos to return per request (up to 100).
+    - max_pages_per_window: Cursor chain length after which a window is split.
+    - initial_window_size: Days per window before any splitting.
+    - max_workers: Number of windows that are paginated concurrently.
+    - fields: Optional; the video fields to request (see `get_videos_query`).
+
+    Returns:
+    - A DataFrame containing the videos in chronological window order.
+    """
+    query_dict = as_dict(query)
+    limit = float("inf") if total_max_count is None else total_max_count
+    stop = threading.Event()
+    chunks: list[tuple[DateWindow, list[dict]]] = []
+    seen_ids = set()
+    splitting = {"split_windows": 0, "refetched_pages": 0, "duplicate_videos": 0}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        def submit(window: DateWindow) -> Future:
+            query_body = window_query_body(query_dict, window, max_count)
+            return pool.submit(
+                _probe_window,
+                query_body,
+                access_token,
+                max_pages_per_window if window.n_days > 1 else None,
+                stop,
+                fields,
+            )
+
+        pending = {
+            submit(window): window
+            for window in split_date_range(start_date, end_date, initial_window_size)
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = pending.pop(future)
+                    videos, n_pages, exhausted = future.result()
+                    chunks.append((window, videos))
+                    for video in videos:
+                        if video["id"] in seen_ids:
+                            splitting["duplicate_videos"] += 1
+                        seen_ids.add(video["id"])
+                    if len(seen_ids) >= limit:
+                        stop.set()
+                    elif not exhausted:
+                        logger.info(
+                            f"Window {window.start_date}-{window.end_date} has more than "
+                            f"{max_pages_per_window} pages, splitting it in two."
+                        )
+                        splitting["split_windows"] += 1
+                        splitting["refetched_pages"] += n_pages
+                        for half in window.halves():
+                            pending[submit(half)] = half
+        except BaseException:
+            stop.set()
+            raise
+
+    chunks.sort(key=lambda chunk: chunk[0].start_date)
+    videos = merge_videos(videos for _, videos in chunks)
+    if total_max_count is not None:
+        videos = videos[:total_max_count]
+    if splitting["split_windows"]:
+        logger.info(
+            f"Split {splitting['split_windows']} windows, whose "
+            f"{splitting['refetched_pages']} pages were requested again by their halves."
+        )
+    videos_df = pd.DataFrame(videos)
+    videos_df.attrs["splitting"] = splitting
+    return videos_df
+
+
+def _probe_window(
+    query_body: dict,
+    access_token: str,
+    max_pages: int | None,
+    stop: threading.Event,
+    fields=None,
+) -> tuple[list[dict], int, bool]:
+    """Paginates a window for up to `max_pages` pages (unbounded if None). Returns
+    the videos, the number of pages and whether the cursor chain was walked to its end.
+    """
+    videos, n_pages = [], 0
+    if stop.is_set():
+        return videos, n_pages, True
+
+    for n_pages, data in enumerate(
+        iter_pages(query_body, access_token, fields=fields), start=1
+    ):
+        videos.extend(data["videos"])
+        if not data["has_more"] or stop.is_set():
+            return videos, n_pages, True
+        if max_pages is not None and n_pages >= max_pages:
+            return videos, n_pages, False
+    return videos, n_pages, True
@@ -0,0 +1,270 @@
+"""asyncio interface to the TikTok Research API.
+
+`AsyncClient` exposes coroutine versions of the request functions of
+ResearchTikPy and async iterators for the cursor-paginated endpoints, so that
+many users, videos or query windows can be requested concurrently from a single
+event loop:
+
+```
+import asyncio
+from researchtikpy.aio import AsyncClient
+
+async def main(usernames):
+    async with AsyncClient(access_token, max_concurrency=50) as client:
+        responses = await asyncio.gather(
+            *(client.fetch_user_info(username) for username in usernames)
+        )
+        async for response in client.iter_responses(query_body):
+            ...
+
+asyncio.run(main(["username1", "username2"]))
+```
+
+The client reuses the request and pagination logic of the synchronous modules.
+Blocking requests run on a dedicated thread pool whose size is the concurrency
+limit, and all of them share one `requests.Session` with a connection pool of
+the same size.
+"""
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from logging import getLogger
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+import requests
+
+from . import shops
+from .get_liked_videos import default_fields as liked_videos_fields
+from .get_liked_videos import fetch_liked_videos, iter_liked_videos_responses
+from .get_pinned_videos import default_fields as pinned_videos_fields
+from .get_pinned_videos import fetch_pinned_videos
+from .get_query import iter_responses, post_query
+from .get_users_info import default_fields as user_info_fields
+from .get_users_info import fetch_user_info
+from .get_video_comments import default_fields as comment_fields
+from .get_video_comments import fetch_video_comments, iter_comment_responses
+from .social_graph import FollowDirection, get_user_response, iter_user_responses
+from .transport import pooled_session
+
+logger = getLogger(__name__)
+
+T = TypeVar("T")
+
+_exhausted = object()
+
+
+class AsyncClient:
+    """Coroutine interface to the Research API with a bounded number of requests in flight.
+
+    Params:
+        access_token (str | AccessTokenProvider): The access token for the TikTok API,
+            or a provider that refreshes it during long jobs.
+        max_concurrency (int): Maximum number of requests in flight at the same time.
+    """
+
+    def __init__(self, access_token: str, max_concurrency: int = 100):
+        self.access_token = access_token
+        self.max_concurrency = max_concurrency
+        self.session = pooled_session(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="researchtikpy-aio"
+        )
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Waits for the requests in flight without blocking the event loop, then closes."""
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        """Waits for the requests in flight and closes the client. Blocks, so from a
+        coroutine use `aclose` instead."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(func, *args, **kwargs)
+        )
+
+    async def _iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """Advances a blocking iterator on the thread pool, one element at a time.
+        The iterator is closed when the iteration ends, also if it is stopped early."""
+        step = None
+        try:
+            while True:
+                step = self._executor.submit(next, iterator, _exhausted)
+                item = await asyncio.wrap_future(step)
+                if item is _exhausted:
+                    return
+                yield item
+        finally:
+            if hasattr(iterator, "close"):
+                await self._run(_close_after, step, iterator)
+
+    # Videos
+
+    async def post_query(self, full_query: dict, fields=None) -> requests.Response:
+        return await self._run(
+            post_query,
+            full_query,
+            self.access_token,
+            session=self.session,
+            fields=fields,
+        )
+
+    def iter_responses(
+        self, query_body: dict, fields=None
+    ) -> AsyncIterator[requests.Response]:
+        """Async version of `get_query.iter_responses`."""
+        return self._iterate(
+            iter_responses(
+                query_body, self.access_token, session=self.session, fields=fields
+            )
+        )
+
+    # Users
+
+    async def fetch_user_info(
+        self, username: str, fields: str = user_info_fields
+    ) -> requests.Response:
+        return await self._run(
+            fetch_user_info,
+            self.session,
+            username,
+            self.access_token,
+            fields,
+        )
+
+    async def get_user_response(
+        self,
+        mode: FollowDirection,
+        username: str,
+        cursor: int = 0,
+        max_count: int = 100,
+    ) -> requests.Response:
+        return await self._run(
+            get_user_response,
+            mode,
+            access_token=self.access_token,
+            session=self.session,
+            username=username,
+            cursor=cursor,
+            max_count=max_count,
+        )
+
+    def iter_user_responses(
+        self, mode: FollowDirection, username: str
+    ) -> AsyncIterator[requests.Response]:
+        """Async version of `social_graph.iter_user_responses`."""
+        return self._iterate(
+            iter_user_responses(mode, self.access_token, username, session=self.session)
+        )
+
+    async def fetch_liked_videos(
+        self,
+        username: str,
+        fields: str = liked_videos_fields,
+        cursor: int = 0,
+        max_count: int = 100,
+    ) -> requests.Response:
+        return await self._run(
+            fetch_liked_videos,
+            self.session,
+            username,
+            self.access_token,
+            fields,
+            cursor,
+            max_count,
+        )
+
+    def iter_liked_videos_responses(
+        self,
+        username: str,
+        fields: str = liked_videos_fields,
+        max_count: int = 100,
+    ) -> AsyncIterator[requests.Response]:
+        """Async version of `get_liked_videos.iter_liked_videos_responses`."""
+        return self._iterate(
+            iter_liked_videos_responses(
+                self.access_token, username, self.session, fields, max_count
+            )
+        )
+
+    async def fetch_pinned_videos(
+        self, username: str, fields: str = pinned_videos_fields
+    ) -> requests.Response:
+        return await self._run(
+            fetch_pinned_videos,
+            self.session,
+            username,
+            self.access_token,
+            fields,
+        )
+
+    # Comments
+
+    async def fetch_video_comments(
+        self,
+        video_id: int,
+        fields: str = comment_fields,
+        cursor: int = 0,
+        max_count: int = 100,
+    ) -> requests.Response:
+        return await self._run(
+            fetch_video_comments,
+            self.session,
+            video_id,
+            self.access_token,
+            fields,
+            cursor,
+            max_count,
+        )
+
+    def iter_comment_responses(
+        self,
+        video_id: int,
+        fields: str = comment_fields,
+        max_count: int = 100,
+    ) -> AsyncIterator[requests.Response]:
+        """Async version of `get_video_comments.iter_comment_responses`."""
+        return self._iterate(
+            iter_comment_responses(
+                self.access_token, video_id, self.session, fields, max_count
+            )
+        )
+
+    # TikTok Shop
+
+    async def get_shop_info(self, shop_name: str) -> requests.Response:
+        return await self._run(
+            shops.get_shop_info, shop_name, self.access_token, session=self.session
+        )
+
+    async def get_product_info(self, shop_id: str) -> requests.Response:
+        return await self._run(
+            shops.get_product_info, shop_id, self.access_token, session=self.session
+        )
+
+    async def get_product_reviews(self, product_id: str) -> requests.Response:
+        return await self._run(
+            shops.get_product_reviews,
+            product_id,
+            self.access_token,
+            session=self.session,
+        )
+
+
+def _close_after(step: Future | None, iterator: Iterator) -> None:
+    """Closes a generator once its last step is done; a step that was cancelled on
+    the event loop keeps running on its thread, and a running generator cannot be closed.
+    """
+    if step is not None:
+        wait([step])
+    iterator.close()
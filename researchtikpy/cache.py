@@ -0,0 +1,281 @@
+"""Opt-in on-disk cache of Research API responses.
+
+Re-running an analysis requests the same pages again and spends daily quota on
+data that is already on disk. Once enabled, successful responses are stored in
+a SQLite file, compressed, under a key made of the endpoint, the normalized
+JSON body and the query string (which carries the requested `fields`):
+
+```
+from researchtikpy import endpoints
+from researchtikpy.cache import enable_response_cache
+
+cache = enable_response_cache("rtk_cache.sqlite", ttls={endpoints.user_info: 86400})
+...  # call any researchtikpy function
+print(cache.stats())
+```
+
+Entries expire after a time-to-live per endpoint, and the least recently used
+entries are evicted once the cache grows over `max_bytes`. Random-sample video
+queries (`is_random`) are never cached.
+
+The pages of a video query are chained by a `search_id` that the API forgets
+after a while. All pages of a chain therefore expire and are evicted together
+with its first page, and a page of a chain is only served while the chain is
+cached up to its last page. Otherwise the cached chain is dropped and requested
+again from its first page, so that no stale `search_id` is handed out.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from logging import getLogger
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+
+logger = getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+_response_cache = None
+
+
+class ResponseCache:
+    """SQLite-backed cache of successful API responses.
+
+    Params:
+        path (Path): The SQLite file, created if it does not exist.
+        ttls (dict): Time-to-live in seconds per endpoint URL (without query string).
+        default_ttl (float): Time-to-live in seconds for endpoints missing from `ttls`.
+        max_bytes (int): Maximum total size of the compressed bodies.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = 7 * DAY,
+        max_bytes: int = 2**30,
+    ):
+        self.path = Path(path)
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            columns = [
+                row[1] for row in self._conn.execute("PRAGMA table_info(responses)")
+            ]
+            if columns and "chain" not in columns:  # written by an older version
+                self._conn.execute("DROP TABLE responses")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    chain TEXT,
+                    last_page INTEGER NOT NULL DEFAULT 0
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_chain ON responses (chain)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+
+    @staticmethod
+    def is_cacheable(body: dict) -> bool:
+        return not body.get("is_random", False)
+
+    @staticmethod
+    def make_key(url: str, body: dict, params: dict | None = None) -> str:
+        canonical = json.dumps(
+            {"url": url, "body": body, "params": params or {}},
+            sort_keys=True,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def ttl(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(
+        self, url: str, body: dict, params: dict | None = None
+    ) -> requests.Response | None:
+        """Returns the cached response, or None if it is missing or expired, or if
+        it belongs to a chain of pages that is not completely cached."""
+        key = self.make_key(url, body, params)
+        endpoint = _endpoint(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, created_at, chain FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[2] is not None:
+                created_at, complete = self._conn.execute(
+                    "SELECT MIN(created_at), MAX(last_page) FROM responses WHERE chain = ?",
+                    (row[2],),
+                ).fetchone()
+                if not complete or now - created_at > self.ttl(endpoint):
+                    with self._conn:
+                        self._conn.execute(
+                            "DELETE FROM responses WHERE chain = ?", (row[2],)
+                        )
+                    row = None
+            if row is None or now - row[1] > self.ttl(endpoint):
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self.hits += 1
+        logger.debug(f"Serving response for {endpoint} from cache")
+        return _as_response(url, zlib.decompress(row[0]))
+
+    def put(
+        self,
+        url: str,
+        body: dict,
+        params: dict | None,
+        response: requests.Response,
+    ) -> None:
+        """Stores a response if it was successful."""
+        if response.status_code != 200:
+            return
+        key = self.make_key(url, body, params)
+        compressed = zlib.compress(response.content)
+        chain, last_page = _chain(response)
+        now = time.time()
+        with self._lock, self._conn:
+            created_at = now
+            if chain is not None and body.get("search_id") == chain:
+                # a later page expires with the first page of its chain
+                (first_created_at,) = self._conn.execute(
+                    "SELECT MIN(created_at) FROM responses WHERE chain = ?", (chain,)
+                ).fetchone()
+                created_at = first_created_at or now
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    _endpoint(url),
+                    compressed,
+                    len(compressed),
+                    created_at,
+                    now,
+                    chain,
+                    last_page,
+                ),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Deletes least recently used entries, together with the other pages of their
+        chains, until the cache fits into max_bytes."""
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted, evicted_chains = [], set()
+        for key, size, chain in self._conn.execute(
+            "SELECT key, size, chain FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if chain is not None and chain in evicted_chains:
+                continue  # already counted with its chain
+            if chain is None:
+                evicted.append((key,))
+            else:
+                evicted_chains.add(chain)
+                (size,) = self._conn.execute(
+                    "SELECT SUM(size) FROM responses WHERE chain = ?", (chain,)
+                ).fetchone()
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self._conn.executemany(
+            "DELETE FROM responses WHERE chain = ?",
+            [(chain,) for chain in evicted_chains],
+        )
+        logger.info(
+            f"Evicted {len(evicted) + len(evicted_chains)} responses or chains from the cache"
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            n_entries, n_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": n_entries,
+            "bytes": n_bytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _endpoint(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def _chain(response: requests.Response) -> tuple[str | None, int]:
+    """The `search_id` that chains the pages of a video query, if any, and whether
+    the response is the last page of its chain."""
+    try:
+        data = response.json().get("data") or {}
+    except (ValueError, AttributeError):
+        return None, 0
+    if not isinstance(data, dict) or not data.get("search_id"):
+        return None, 0
+    return str(data["search_id"]), int(not data.get("has_more", False))
+
+
+def _as_response(url: str, content: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.encoding = "utf-8"
+    response.url = url
+    response.headers["Content-Type"] = "application/json"
+    response.headers["X-ResearchTikPy-Cache"] = "hit"
+    return response
+
+
+def enable_response_cache(path: Path, **kwargs) -> ResponseCache:
+    """Enables the response cache for all requests of this process.
+    Keyword arguments are passed on to `ResponseCache`."""
+    global _response_cache
+    _response_cache = ResponseCache(path, **kwargs)
+    return _response_cache
+
+
+def disable_response_cache() -> None:
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+    _response_cache = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    return _response_cache
@@ -0,0 +1,104 @@
+"""Persisted progress of cursor-paginated video queries.
+
+A checkpoint stores, per query, the date windows that are finished and the
+`search_id` / `cursor` pair of the window in progress. It is written atomically
+after every page, so a collection that stops because of a crash, an expired
+token or the daily quota can be resumed without requesting the same pages again.
+"""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from logging import getLogger
+from pathlib import Path
+
+from .rtk_utilities import read_json, write_json_atomic
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class QueryCheckpoint:
+    """Progress of one query.
+
+    Args
+    ----
+    key: str
+        Hash of the query, see `checkpoint_key`
+    completed_windows: List[str]
+        Start dates (YYYYMMDD) of the date windows that are fully paginated
+    window_start_date: str | None
+        Start date of the window in progress
+    search_id: str | None
+        search_id of the cursor chain of the window in progress
+    cursor: int
+        Cursor of the next page of the window in progress
+    rows_written: int
+        Number of videos handed out so far, over all windows
+    done: bool
+        Whether the whole query is finished
+    """
+
+    key: str
+    completed_windows: list[str] = field(default_factory=list)
+    window_start_date: str | None = None
+    search_id: str | None = None
+    cursor: int = 0
+    rows_written: int = 0
+    done: bool = False
+
+    def advance(self, window_start_date: str, data: dict, n_rows: int) -> None:
+        """Records a page of the window starting at `window_start_date`.
+        `data` is the 'data' object of the API response."""
+        self.rows_written += n_rows
+        if data.get("has_more", False):
+            self.window_start_date = window_start_date
+            self.search_id = data.get("search_id")
+            self.cursor = data.get("cursor", 0)
+        else:
+            self.complete_window(window_start_date)
+
+    def complete_window(self, window_start_date: str) -> None:
+        if window_start_date not in self.completed_windows:
+            self.completed_windows.append(window_start_date)
+        self.window_start_date = None
+        self.search_id = None
+        self.cursor = 0
+
+    def resume_body(self, query_body: dict) -> dict:
+        """Adds search_id and cursor to the body if it belongs to the window in progress."""
+        if query_body["start_date"] != self.window_start_date:
+            return query_body
+        return query_body | dict(search_id=self.search_id, cursor=self.cursor)
+
+
+def checkpoint_key(**query_params) -> str:
+    """Stable hash of the parameters that determine the pages of a query."""
+    canonical = json.dumps(query_params, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class CheckpointStore:
+    """Directory of checkpoint files, one JSON file per query key."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> QueryCheckpoint | None:
+        data = read_json(self.path(key))
+        if data is None:
+            return None
+        logger.info(
+            f"Resuming from checkpoint {key}: {data['rows_written']} rows written, "
+            f"{len(data['completed_windows'])} window(s) completed"
+        )
+        return QueryCheckpoint(**data)
+
+    def save(self, checkpoint: QueryCheckpoint) -> None:
+        write_json_atomic(asdict(checkpoint), self.path(checkpoint.key))
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
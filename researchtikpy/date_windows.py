@@ -0,0 +1,81 @@
+"""Splitting of date ranges into windows the TikTok Research API accepts.
+
+The video query endpoint rejects requests whose `end_date` is more than 30 days
+after `start_date`. Longer ranges have to be cut into several windows, each of
+which can be paginated independently of the others.
+"""
+
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import NamedTuple
+
+DATE_FORMAT = "%Y%m%d"
+
+
+class WindowSize(IntEnum):
+    """Number of calendar days covered by a single date window"""
+
+    day = 1
+    week = 7
+    month = 31  # longest legal window: end_date is at most 30 days after start_date
+
+
+class DateWindow(NamedTuple):
+    """An inclusive date range, both ends formatted as YYYYMMDD."""
+
+    start_date: str
+    end_date: str
+
+    @property
+    def n_days(self) -> int:
+        return (parse_date(self.end_date) - parse_date(self.start_date)).days + 1
+
+    def halves(self) -> tuple["DateWindow", "DateWindow"]:
+        """Splits a window of at least two days into two consecutive windows."""
+        if self.n_days < 2:
+            raise ValueError(f"A single-day window cannot be split: {self}")
+        first_end = parse_date(self.start_date) + timedelta(days=self.n_days // 2 - 1)
+        return (
+            DateWindow(self.start_date, format_date(first_end)),
+            DateWindow(format_date(first_end + timedelta(days=1)), self.end_date),
+        )
+
+
+def parse_date(date: str) -> datetime:
+    return datetime.strptime(date, DATE_FORMAT)
+
+
+def format_date(date: datetime) -> str:
+    return date.strftime(DATE_FORMAT)
+
+
+def split_date_range(
+    start_date: str, end_date: str, window_size: int = WindowSize.month
+) -> list[DateWindow]:
+    """Cuts the inclusive range between start_date and end_date into consecutive
+    windows of at most `window_size` days. The last window may be shorter.
+
+    Parameters:
+    - start_date: The start date of the range (format YYYYMMDD).
+    - end_date: The end date of the range (format YYYYMMDD).
+    - window_size: Days per window, between 1 and `WindowSize.month`.
+
+    Returns:
+    - A chronologically ordered list of DateWindow objects.
+    """
+    if not 1 <= window_size <= WindowSize.month:
+        raise ValueError(
+            f"window_size must be between 1 and {int(WindowSize.month)} days, got {window_size}"
+        )
+    start_dt = parse_date(start_date)
+    end_dt = parse_date(end_date)
+    if start_dt > end_dt:
+        raise ValueError("start_date must be before or equal end_date!")
+
+    windows = []
+    window_start = start_dt
+    while window_start <= end_dt:
+        window_end = min(window_start + timedelta(days=window_size - 1), end_dt)
+        windows.append(DateWindow(format_date(window_start), format_date(window_end)))
+        window_start = window_end + timedelta(days=1)
+    return windows
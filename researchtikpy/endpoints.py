@@ -1,2 +1,10 @@
+video_query = "https://open.tiktokapis.com/v2/research/video/query/"
+video_comments = "https://open.tiktokapis.com/v2/research/video/comment/list/"
+user_info = "https://open.tiktokapis.com/v2/research/user/info/"
+liked_videos = "https://open.tiktokapis.com/v2/research/user/liked_videos/"
+pinned_videos = "https://open.tiktokapis.com/v2/research/user/pinned_videos/"
 followings = "https://open.tiktokapis.com/v2/research/user/following/"
 followers = "https://open.tiktokapis.com/v2/research/user/followers/"
+shop = "https://open.tiktokapis.com/v2/research/tts/shop/"
+product = "https://open.tiktokapis.com/v2/research/tts/product/"
+review = "https://open.tiktokapis.com/v2/research/tts/review/"
@@ -4,11 +4,16 @@
 # In[1]:
 
 
+import asyncio
 import os
-import requests
-from cachetools.func import ttl_cache
+import sqlite3
+import threading
+import time
+from functools import cache
 from logging import getLogger
+from pathlib import Path
 
+import requests
 
 logger = getLogger(__name__)
 
@@ -28,11 +33,11 @@ def get_access_token(client_key, client_secret):
     - Exception: If the request to the TikTok API fails or is not successful.
     """
     endpoint_url = "https://open.tiktokapis.com/v2/oauth/token/"
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
     data = {
-        'client_key': client_key,
-        'client_secret': client_secret,
-        'grant_type': 'client_credentials',
+        "client_key": client_key,
+        "client_secret": client_secret,
+        "grant_type": "client_credentials",
     }
 
     response = requests.post(endpoint_url, headers=headers, data=data)
@@ -40,20 +45,201 @@ def get_access_token(client_key, client_secret):
     if response.status_code == 200:
         response_json = response.json()
         return {
-            "access_token": response_json['access_token'],
-            "expires_in": response_json['expires_in'],
-            "token_type": response_json['token_type']
+            "access_token": response_json["access_token"],
+            "expires_in": response_json["expires_in"],
+            "token_type": response_json["token_type"],
         }
     else:
         raise Exception(f"Failed to obtain access token: {response.text}")
 
 
-@ttl_cache(ttl=7200 - 1)  # to be safe
+class AccessTokenProvider:
+    """Thread-safe source of a valid access token, to be passed wherever an access
+    token string is accepted. Requests resolve the token when they are sent, so
+    long-running collections keep working after the first token expires.
+
+    The token is refreshed `refresh_margin` seconds before its `expires_in` runs out,
+    by a background timer after `start()` (or within a `with` block), and otherwise
+    on the next request that needs it. A request that fails with 401 is sent once
+    more with a fresh token (see `transport.post`).
+
+    With `shared_path`, the token is kept in a SQLite file, so that all processes
+    on a host that use the same file and client key share one token instead of
+    each requesting their own. The file contains the token in plain text.
+
+    Params:
+        client_key (str): The client key provided by TikTok.
+        client_secret (str): The client secret provided by TikTok.
+        refresh_margin (float): Seconds before expiry at which the token is refreshed.
+        shared_path (Path): Optional SQLite file to share the token between processes.
+    """
+
+    def __init__(
+        self,
+        client_key: str,
+        client_secret: str,
+        refresh_margin: float = 300,
+        shared_path: Path | None = None,
+    ):
+        self.client_key = client_key
+        self._client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.shared_path = None if shared_path is None else Path(shared_path)
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._closed = True
+        if self.shared_path is not None:
+            self.shared_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._connect()
+            try:
+                conn.execute("""CREATE TABLE IF NOT EXISTS tokens (
+                        client_key TEXT PRIMARY KEY,
+                        access_token TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )""")
+            finally:
+                conn.close()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "AccessTokenProvider":
+        """A provider for the credentials in TIKTOK_CLIENT_KEY and TIKTOK_CLIENT_SECRET."""
+        return cls(
+            os.environ["TIKTOK_CLIENT_KEY"],
+            os.environ["TIKTOK_CLIENT_SECRET"],
+            **kwargs,
+        )
+
+    def __repr__(self) -> str:
+        return f"AccessTokenProvider(client_key={self.client_key!r})"
+
+    def __enter__(self) -> "AccessTokenProvider":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _is_fresh(self, expires_at: float) -> bool:
+        return time.time() < expires_at - self.refresh_margin
+
+    def token(self) -> str:
+        """A token that is valid for at least `refresh_margin` more seconds."""
+        with self._lock:
+            if self._token is None or not self._is_fresh(self._expires_at):
+                self._refresh()
+            return self._token
+
+    async def atoken(self) -> str:
+        """Like `token`, without blocking the event loop while a token is requested."""
+        return await asyncio.to_thread(self.token)
+
+    def refresh(self, stale_token: str | None = None) -> str:
+        """Replaces the token, e.g. after the API rejected `stale_token`. If another
+        thread has replaced `stale_token` in the meantime, its token is returned."""
+        with self._lock:
+            if stale_token is None or self._token == stale_token:
+                self._refresh(stale_token or self._token)
+            return self._token
+
+    def _refresh(self, stale_token: str | None = None) -> None:
+        if self.shared_path is None:
+            self._token, self._expires_at = self._request_token()
+        else:
+            self._token, self._expires_at = self._shared_token(stale_token)
+        self._schedule()
+
+    def _request_token(self) -> tuple[str, float]:
+        logger.info("Getting access token...")
+        data = get_access_token(self.client_key, self._client_secret)
+        return data["access_token"], time.time() + float(data["expires_in"])
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.shared_path, timeout=60, isolation_level=None)
+
+    def _shared_token(self, stale_token: str | None) -> tuple[str, float]:
+        """The token of the shared file if it is fresh and not `stale_token`,
+        otherwise a new token, which is written to the file."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # one process at a time requests a token
+            try:
+                row = conn.execute(
+                    "SELECT access_token, expires_at FROM tokens WHERE client_key = ?",
+                    (self.client_key,),
+                ).fetchone()
+                if row is not None and row[0] != stale_token and self._is_fresh(row[1]):
+                    conn.execute("COMMIT")
+                    return row
+                token, expires_at = self._request_token()
+                conn.execute(
+                    "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)",
+                    (self.client_key, token, expires_at),
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return token, expires_at
+
+    def start(self) -> None:
+        """Refreshes the token ahead of expiry on a background timer until `close()`."""
+        self._closed = False
+        self.token()
+        with self._lock:
+            self._schedule()
+
+    def close(self) -> None:
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule(self, delay: float | None = None) -> None:
+        if self._closed:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        if delay is None:
+            delay = max(1.0, self._expires_at - self.refresh_margin - time.time())
+        self._timer = threading.Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            with self._lock:
+                if self._is_fresh(
+                    self._expires_at
+                ):  # refreshed meanwhile, or woken up early
+                    self._schedule()
+                else:
+                    self._refresh()
+        except Exception as e:  # requests will refresh the token themselves
+            logger.warning(f"Background refresh of the access token failed: {e}")
+            with self._lock:
+                self._schedule(delay=60)
+
+
+AccessToken = str | AccessTokenProvider
+
+
+def resolve_token(access_token: AccessToken) -> str:
+    """The token string of an access token or provider."""
+    if isinstance(access_token, AccessTokenProvider):
+        return access_token.token()
+    return access_token
+
+
+@cache
+def default_token_provider() -> AccessTokenProvider:
+    return AccessTokenProvider.from_env()
+
+
 def get_access_token_cached() -> str:
-    client_key = os.environ["TIKTOK_CLIENT_KEY"]
-    client_secret = os.environ["TIKTOK_CLIENT_SECRET"]
-    logger.info("Getting access token...")
-    data: dict = get_access_token(
-        client_key=client_key, client_secret=client_secret
-    )
-    return data["access_token"]
+    """A token for the credentials in TIKTOK_CLIENT_KEY and TIKTOK_CLIENT_SECRET,
+    refreshed before it expires."""
+    return default_token_provider().token()
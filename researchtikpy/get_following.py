@@ -5,8 +5,10 @@
 
 
 import requests
-import pandas as pd
-from time import sleep
+
+from . import endpoints, transport
+from .rtk_utilities import RecordAccumulator
+
 
 def get_following(usernames_list, access_token, max_count=100, verbose=True):
     """
@@ -21,7 +23,7 @@ def get_following(usernames_list, access_token, max_count=100, verbose=True):
     Returns:
     - pd.DataFrame: DataFrame containing all followed accounts from the provided usernames.
     """
-    all_following_df = pd.DataFrame()
+    all_following = RecordAccumulator()
     session = requests.Session()  # Use session for improved performance
 
     for username in usernames_list:
@@ -30,34 +32,35 @@ def get_following(usernames_list, access_token, max_count=100, verbose=True):
         has_more = True
 
         while has_more:
-            endpoint = "https://open.tiktokapis.com/v2/research/user/following/"
-            headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
-            query_body = {"username": username, "max_count": max_count, "cursor": cursor}
+            query_body = {
+                "username": username,
+                "max_count": max_count,
+                "cursor": cursor,
+            }
 
-            response = session.post(endpoint, headers=headers, json=query_body)
+            response = transport.post(
+                endpoints.followings, access_token, json=query_body, session=session
+            )
 
             if response.status_code == 200:
                 data = response.json().get("data", {})
                 following = data.get("user_following", [])
                 following_list.extend(following)
                 has_more = data.get("has_more", False)
-                cursor = data.get("cursor", cursor + max_count)  # Update cursor based on response
+                cursor = data.get(
+                    "cursor", cursor + max_count
+                )  # Update cursor based on response
                 if verbose:
                     print(f"Retrieved {len(following)} accounts for user {username}")
-            elif response.status_code == 429:
+            else:  # rate limits and backend failures were already retried by transport.post
                 if verbose:
-                    print(f"Rate limit exceeded fetching following for user {username}. Pausing before retrying...")
-                sleep(60)  # Adjust sleep time based on the API's rate limit reset window
-                continue  # Continue to the next iteration without breaking the loop
-            else:
-                if verbose:
-                    print(f"Error fetching following for user {username}: {response.status_code}", response.json())
+                    print(
+                        f"Error fetching following for user {username}: {response.status_code}",
+                        response.json(),
+                    )
                 break  # Stop the loop for the current user
 
-        if following_list:
-            following_df = pd.DataFrame(following_list)
-            following_df['target_account'] = username  # Identify the account these followings belong to
-            all_following_df = pd.concat([all_following_df, following_df], ignore_index=True)
-
-    return all_following_df
+        # Identify the account these followings belong to
+        all_following.extend(following_list, target_account=username)
 
+    return all_following.to_frame()
@@ -4,27 +4,41 @@
 # In[4]:
 
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Iterator
+
 import pandas as pd
-from time import sleep
+import requests
+
+from . import endpoints, transport
+from .rtk_utilities import RecordAccumulator
+from .transport import pooled_session
+from .video_schema import video_arrow_schema
+
+logger = getLogger(__name__)
 
-def get_liked_videos(usernames, access_token, fields="id,video_description,create_time,username,like_count,comment_count,share_count,view_count,hashtag_names", max_count=100, verbose=True):
+default_fields = "id,video_description,create_time,username,like_count,comment_count,share_count,view_count,hashtag_names"
+
+
+def get_liked_videos(
+    usernames, access_token, fields=default_fields, max_count=100, verbose=True
+):
     """
     Fetches liked videos for multiple usernames and compiles them into a single DataFrame.
-    
+
     Parameters:
     - usernames (list): List of usernames to fetch liked videos for.
     - access_token (str): Access token for TikTok's API.
     - fields (str): Comma-separated string of fields to retrieve for each liked video.
     - max_count (int): Maximum number of liked videos to retrieve per request (default 100).
     - verbose (bool): If True, prints detailed logs; if False, suppresses most print statements.
-    
+
     Returns:
-    - pd.DataFrame: DataFrame containing all liked videos from the provided usernames.
+    - pd.DataFrame: DataFrame containing all liked videos from the provided usernames,
+      with the user who liked each video in `source_username`.
     """
-    endpoint = "https://open.tiktokapis.com/v2/research/user/liked_videos/"
-    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
-    liked_videos_df = pd.DataFrame()
+    liked_videos = RecordAccumulator()
     session = requests.Session()  # Use session for improved performance
 
     for username in usernames:
@@ -32,37 +46,180 @@ def get_liked_videos(usernames, access_token, fields="id,video_description,creat
         cursor = 0  # Start with initial cursor at 0
 
         while has_more:
-            query_body = {"username": username, "max_count": max_count, "cursor": cursor}
-            response = session.post(f"{endpoint}?fields={fields}", headers=headers, json=query_body)
-            
+            response = fetch_liked_videos(
+                session, username, access_token, fields, cursor, max_count
+            )
+
             if response.status_code == 200:
                 data = response.json().get("data", {})
                 user_liked_videos = data.get("user_liked_videos", [])
-                
+
                 if user_liked_videos:
-                    current_df = pd.DataFrame(user_liked_videos)
-                    liked_videos_df = pd.concat([liked_videos_df, current_df], ignore_index=True)
+                    liked_videos.extend(user_liked_videos, source_username=username)
                     if verbose:
-                        print(f"Successfully fetched {len(user_liked_videos)} liked videos for user {username}")
+                        print(
+                            f"Successfully fetched {len(user_liked_videos)} liked videos for user {username}"
+                        )
                 else:
                     if verbose:
                         print(f"No liked videos found for user {username}")
-                
+
                 has_more = data.get("has_more", False)
-                cursor = data.get("cursor", cursor + max_count)  # Use API provided cursor if available, else increment
+                cursor = data.get(
+                    "cursor", cursor + max_count
+                )  # Use API provided cursor if available, else increment
             elif response.status_code == 403:
                 if verbose:
-                    print(f"Access denied: User {username} has not enabled collecting liked videos.")
+                    print(
+                        f"Access denied: User {username} has not enabled collecting liked videos."
+                    )
                 break  # Exit the loop for the current username if access is denied
-            elif response.status_code == 429:
-                if verbose:
-                    print("Rate limit exceeded. Pausing before retrying...")
-                sleep(60)  # Pause execution before retrying
-                continue  # Optional: retry the last request
-            else:
+            else:  # rate limits and backend failures were already retried by transport.post
                 if verbose:
-                    print(f"Error fetching liked videos for user {username}: {response.status_code}", response.json())
+                    print(
+                        f"Error fetching liked videos for user {username}: {response.status_code}",
+                        response.json(),
+                    )
                 break  # Stop fetching for current user in case of an error
 
-    return liked_videos_df
+    return liked_videos.to_frame()
+
+
+def fetch_liked_videos(
+    session: requests.Session,
+    username: str,
+    access_token: str,
+    fields: str = default_fields,
+    cursor: int = 0,
+    max_count: int = 100,
+) -> requests.Response:
+    query_body = {"username": username, "max_count": max_count, "cursor": cursor}
+    return transport.post(
+        f"{endpoints.liked_videos}?fields={fields}",
+        access_token,
+        json=query_body,
+        session=session,
+    )
+
+
+def iter_liked_videos_responses(
+    access_token: str,
+    username: str,
+    session: requests.Session | None = None,
+    fields: str = default_fields,
+    max_count: int = 100,
+) -> Iterator[requests.Response]:
+    """Creates an iterator that uses the cursor-based pagination to request the liked
+    videos of a user sequentially. Each element yielded is an http response from the API.
+    Iteration stops at the first response that is not successful, e.g. the 403
+    returned for users who have not enabled access to their liked videos.
+    """
+    if session is None:
+        session = requests.Session()
+    cursor = 0
+    while True:
+        response = fetch_liked_videos(
+            session, username, access_token, fields, cursor, max_count
+        )
+        yield response
+
+        if response.status_code != 200:
+            logger.info(
+                "Problem in response. status_code=%d, error='%s'",
+                response.status_code,
+                response.text,
+            )
+            return
+        data: dict = response.json().get("data", {})
+        if not data.get("has_more", False):
+            return
+        cursor = data.get("cursor", cursor + max_count)
+
+
+def access_status(response: requests.Response) -> str:
+    """'ok', 'not_enabled' for users who have not enabled access to their data (403), or 'error'."""
+    if response.status_code == 200:
+        return "ok"
+    return "not_enabled" if response.status_code == 403 else "error"
+
+
+def sink_schema(fields=default_fields):
+    """Arrow schema of the rows that `collect_liked_videos` and `collect_pinned_videos`
+    write, for a `sinks.ParquetSink`. Requires `pyarrow`."""
+    import pyarrow as pa
+
+    return video_arrow_schema(
+        fields, source_username=pa.string(), status=pa.string(), status_code=pa.int64()
+    )
+
+
+def fix_sink_schema(sink, fields) -> None:
+    """Gives a sink that writes with a fixed schema, but has none yet, the schema of
+    the collected rows. Status rows and video pages then end up in one table."""
+    if getattr(sink, "schema", False) is None:
+        sink.schema = sink_schema(fields)
+
+
+def collect_liked_videos(
+    usernames, access_token, sink, fields=default_fields, max_count=100, max_workers=8
+) -> pd.DataFrame:
+    """
+    Fetches the liked videos of many users concurrently and streams every page to a sink.
+
+    Each row is tagged with the user it was liked by (`source_username`) and a `status`.
+    Users whose liked videos cannot be collected get a single row without video fields,
+    with the status 'not_enabled' (403) or 'error'.
+
+    Parameters:
+    - usernames (list): List of usernames to fetch liked videos for.
+    - access_token (str): Access token for TikTok's API.
+    - sink: Where to write the rows, e.g. `sinks.JsonlSink`, `sinks.ParquetSink` or `sinks.MemorySink`.
+    - fields (str): Comma-separated string of fields to retrieve for each liked video.
+    - max_count (int): Maximum number of liked videos to retrieve per request (default 100).
+    - max_workers (int): Number of users whose liked videos are fetched concurrently.
+
+    Returns:
+    - pd.DataFrame: One row per distinct username with its status, the number of videos
+      written and the number of requests.
+    """
+    fix_sink_schema(sink, fields)
+    session = pooled_session(max_workers)  # shared by all workers
+
+    def collect(username):
+        n_videos = n_requests = 0
+        for response in iter_liked_videos_responses(
+            access_token, username, session=session, fields=fields, max_count=max_count
+        ):
+            n_requests += 1
+            status = access_status(response)
+            if status != "ok":
+                sink.write(
+                    pd.DataFrame(
+                        [
+                            {
+                                "source_username": username,
+                                "status": status,
+                                "status_code": response.status_code,
+                            }
+                        ]
+                    )
+                )
+                return dict(
+                    username=username,
+                    status=status,
+                    n_videos=n_videos,
+                    n_requests=n_requests,
+                )
+            videos = response.json().get("data", {}).get("user_liked_videos") or []
+            if videos:
+                sink.write(
+                    pd.DataFrame(videos).assign(source_username=username, status=status)
+                )
+            n_videos += len(videos)
+        return dict(
+            username=username, status="ok", n_videos=n_videos, n_requests=n_requests
+        )
 
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        summary = list(pool.map(collect, dict.fromkeys(usernames)))
+    return pd.DataFrame(summary)
@@ -4,10 +4,20 @@
 # In[5]:
 
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
+import requests
+
+from . import endpoints, transport
+from .get_liked_videos import access_status, fix_sink_schema
+from .rtk_utilities import RecordAccumulator
+from .transport import pooled_session
+
+default_fields = "id,video_description,create_time,username,like_count,comment_count,share_count,view_count,hashtag_names"
+
 
-def get_pinned_videos(usernames, access_token, fields="id,video_description,create_time,username,like_count,comment_count,share_count,view_count,hashtag_names", verbose=True):
+def get_pinned_videos(usernames, access_token, fields=default_fields, verbose=True):
     """
     Fetches pinned videos for multiple usernames and compiles them into a single DataFrame.
     - usernames (list): List of usernames to fetch pinned videos for.
@@ -17,35 +27,98 @@ def get_pinned_videos(usernames, access_token, fields="id,video_description,crea
     Returns:
     - pd.DataFrame: DataFrame containing all pinned videos from the provided usernames.
     """
-    endpoint = "https://open.tiktokapis.com/v2/research/user/pinned_videos/"
-    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
-    pinned_videos_df = pd.DataFrame()
+    all_pinned_videos = RecordAccumulator()
     session = requests.Session()  # Use session for improved performance
 
     for username in usernames:
-        query_body = {"username": username}
-        response = session.post(f"{endpoint}?fields={fields}", headers=headers, json=query_body)
-        
+        response = fetch_pinned_videos(session, username, access_token, fields)
+
         if response.status_code == 200:
             data = response.json().get("data", {})
             pinned_videos = data.get("pinned_videos_list", [])
-            
+
             if pinned_videos:
-                temp_df = pd.DataFrame(pinned_videos)
-                temp_df['username'] = username  # Include username for clarity
-                pinned_videos_df = pd.concat([pinned_videos_df, temp_df], ignore_index=True)
+                all_pinned_videos.extend(
+                    pinned_videos, username=username
+                )  # Include username for clarity
                 if verbose:
-                    print(f"Successfully fetched {len(pinned_videos)} pinned videos for user {username}")
+                    print(
+                        f"Successfully fetched {len(pinned_videos)} pinned videos for user {username}"
+                    )
             else:
                 if verbose:
                     print(f"No pinned videos found for user {username}")
         else:
             if verbose:
-                print(f"Error fetching pinned videos for user {username}: {response.status_code}")
+                print(
+                    f"Error fetching pinned videos for user {username}: {response.status_code}"
+                )
                 try:
                     print(response.json())
                 except ValueError:  # handles the JSONDecodeError for non-JSON responses
                     print("No valid JSON response available.")
 
-    return pinned_videos_df
+    return all_pinned_videos.to_frame()
+
+
+def fetch_pinned_videos(
+    session: requests.Session,
+    username: str,
+    access_token: str,
+    fields: str = default_fields,
+) -> requests.Response:
+    query_body = {"username": username}
+    return transport.post(
+        f"{endpoints.pinned_videos}?fields={fields}",
+        access_token,
+        json=query_body,
+        session=session,
+    )
+
+
+def collect_pinned_videos(
+    usernames, access_token, sink, fields=default_fields, max_workers=8
+) -> pd.DataFrame:
+    """
+    Fetches the pinned videos of many users concurrently and streams them to a sink.
+    Rows are tagged like those of `get_liked_videos.collect_liked_videos`.
+
+    Parameters:
+    - usernames (list): List of usernames to fetch pinned videos for.
+    - access_token (str): Access token for TikTok's API.
+    - sink: Where to write the rows, e.g. `sinks.JsonlSink`, `sinks.ParquetSink` or `sinks.MemorySink`.
+    - fields (str): Comma-separated string of fields to retrieve for each pinned video.
+    - max_workers (int): Number of users that are requested concurrently.
+
+    Returns:
+    - pd.DataFrame: One row per distinct username with its status and the number of videos written.
+    """
+    fix_sink_schema(sink, fields)
+    session = pooled_session(max_workers)  # shared by all workers
+
+    def collect(username):
+        response = fetch_pinned_videos(session, username, access_token, fields)
+        status = access_status(response)
+        if status != "ok":
+            sink.write(
+                pd.DataFrame(
+                    [
+                        {
+                            "source_username": username,
+                            "status": status,
+                            "status_code": response.status_code,
+                        }
+                    ]
+                )
+            )
+            return dict(username=username, status=status, n_videos=0)
+        videos = response.json().get("data", {}).get("pinned_videos_list") or []
+        if videos:
+            sink.write(
+                pd.DataFrame(videos).assign(source_username=username, status=status)
+            )
+        return dict(username=username, status=status, n_videos=len(videos))
 
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        summary = list(pool.map(collect, dict.fromkeys(usernames)))
+    return pd.DataFrame(summary)
@@ -1,13 +1,43 @@
-import re
-import time
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logging import getLogger
-from typing import Iterator
+from pathlib import Path
+from typing import Iterable, Iterator
 
 import pandas as pd
 import requests
 
-from researchtikpy.query_lang import Query, Condition, Operators, Fields, as_dict
+from researchtikpy import endpoints, transport
+from researchtikpy.checkpoint import CheckpointStore, QueryCheckpoint, checkpoint_key
+from researchtikpy.date_windows import DateWindow, WindowSize, split_date_range
+from researchtikpy.get_access_token import AccessToken, AccessTokenProvider
+from researchtikpy.query_lang import (
+    CompiledQuery,
+    Condition,
+    Fields,
+    Operators,
+    Query,
+    as_dict,
+    compile_query,
+    video_fields_param,
+)
+from researchtikpy.query_planner import matched_terms, plan_sub_queries
+from researchtikpy.quota import BudgetExhausted
+from researchtikpy.retry import (  # noqa: F401, re-exported for backwards compatibility
+    has_json,
+    is_uninformative_backend_failure,
+    json_error_message,
+    rate_limit_exceeded,
+    search_id_was_not_found,
+)
+from researchtikpy.rtk_utilities import append_df_to_file
+from researchtikpy.video_schema import to_video_frame
+from researchtikpy.watermarks import (
+    DEFAULT_WATERMARK_DIR,
+    WatermarkStore,
+    completed_end_date,
+    watermark_key,
+)
 
 logger = getLogger(__name__)
 
@@ -22,6 +52,12 @@ def get_videos_hashtag(
     music_id=None,
     effect_id=None,
     max_count=100,
+    window_size=WindowSize.month,
+    max_workers=1,
+    hashtags_per_query=None,
+    fields=None,
+    since_last_run=False,
+    watermark_dir=None,
 ):
     """
     Searches for videos by hashtag with optional filters for region code, music ID,
@@ -39,12 +75,35 @@ def get_videos_hashtag(
     - music_id: Optional; the music ID to filter videos by.
     - effect_id: Optional; the effect ID to filter videos by.
     - max_count: The maximum number of videos to return per request (up to 100).
-    - rate_limit_pause: Time in seconds to wait when a rate limit error is encountered.
+    - window_size: Number of days per date window the range is split into (see `get_videos_query`).
+    - max_workers: Number of date windows that are paginated concurrently.
+    - hashtags_per_query: Optional; split the hashtags into sub-queries of this size that
+      are run concurrently (see `get_videos_query_split`). The result then has the
+      additional columns `sub_query` and `matched_terms`.
+    - fields: Optional; the video fields to request (see `get_videos_query`).
+    - since_last_run: Only collect the days after the previous run of the same query
+      (see `get_videos_query`).
+    - watermark_dir: Optional; the directory of the watermark files.
 
     Returns:
     - A DataFrame containing the videos that match the given criteria.
     """
     query: dict = _create_hashtag_query_(hashtags, region_code, music_id, effect_id)
+    if hashtags_per_query is not None:
+        return get_videos_query_split(
+            query=query,
+            access_token=access_token,
+            start_date=start_date,
+            end_date=end_date,
+            total_max_count=total_max_count,
+            max_count=max_count,
+            values_per_query=hashtags_per_query,
+            window_size=window_size,
+            max_workers=max_workers,
+            fields=fields,
+            since_last_run=since_last_run,
+            watermark_dir=watermark_dir,
+        )
     return get_videos_query(
         query=query,
         access_token=access_token,
@@ -52,6 +111,11 @@ def get_videos_hashtag(
         end_date=end_date,
         total_max_count=total_max_count,
         max_count=max_count,
+        window_size=window_size,
+        max_workers=max_workers,
+        fields=fields,
+        since_last_run=since_last_run,
+        watermark_dir=watermark_dir,
     )
 
 
@@ -60,23 +124,71 @@ def get_videos_info(
     access_token,
     start_date,
     end_date,
-    total_max_count = None,
+    total_max_count=None,
     max_count=100,
     verbose=False,
+    usernames_per_query=100,
+    max_workers=4,
+    fields=None,
 ):
-    """Get videos for a list of usernames."""
-    query = Query(
-        or_=[
-            Condition(Fields.username, Operators.equals, [username])
-            for username in usernames
-        ]
+    """
+    Get videos for a list of usernames. The (deduplicated) usernames are split into
+    chunks, each chunk becomes one query with a single `IN` condition, and the chunks
+    are queried concurrently.
+
+    Parameters:
+    - usernames: A list of usernames.
+    - access_token: Your valid access token for the TikTok Research API.
+    - start_date: The start date for the search (format YYYYMMDD).
+    - end_date: The end date for the search (format YYYYMMDD).
+    - total_max_count: Optional; the total maximum number of videos to collect.
+    - max_count: The maximum number of videos to return per request (up to 100).
+    - verbose: If True, prints the progress per chunk and the accounts without videos.
+    - usernames_per_query: Number of usernames per query.
+    - max_workers: Number of queries that are run concurrently.
+    - fields: Optional; the video fields to request (see `get_videos_query`).
+
+    Returns:
+    - A DataFrame containing the videos of the accounts. The number of videos found per
+      username (including zeros) is stored in `df.attrs["videos_per_username"]`.
+    """
+    usernames = list(dict.fromkeys(usernames))
+    query = CompiledQuery.from_conditions(
+        and_=[(Fields.username, Operators.isin, usernames)]
     )
-    return get_videos_query(
+    videos_df = get_videos_query_split(
         query=query,
         access_token=access_token,
         start_date=start_date,
         end_date=end_date,
+        total_max_count=total_max_count,
         max_count=max_count,
+        values_per_query=usernames_per_query,
+        max_workers=max_workers,
+        verbose=verbose,
+        fields=fields,
+    )
+    videos_df = videos_df.drop(columns=["sub_query", "matched_terms"], errors="ignore")
+
+    counts = count_videos_per_username(videos_df, usernames)
+    videos_df.attrs["videos_per_username"] = counts
+    if verbose and (counts == 0).any():
+        print(f"No videos found for: {', '.join(counts.index[counts == 0])}")
+    return videos_df
+
+
+def count_videos_per_username(
+    videos_df: pd.DataFrame, usernames: list[str]
+) -> pd.Series:
+    """Number of videos per username, in the order of `usernames` and including zeros."""
+    if "username" not in videos_df.columns:
+        return pd.Series(0, index=pd.Index(usernames, name="username"), name="n_videos")
+    return (
+        videos_df["username"]
+        .value_counts()
+        .reindex(usernames, fill_value=0)
+        .rename_axis("username")
+        .rename("n_videos")
     )
 
 
@@ -98,12 +210,18 @@ def _create_hashtag_query_(
 
 
 def get_videos_query(
-    query: Query,
+    query: Query | CompiledQuery,
     access_token: str,
     start_date: str,
     end_date: str,
-    total_max_count: int,
+    total_max_count: int | None = None,
     max_count=100,
+    window_size: int = WindowSize.month,
+    max_workers: int = 1,
+    fields=None,
+    typed: bool = False,
+    since_last_run: bool = False,
+    watermark_dir: Path | None = None,
 ) -> pd.DataFrame:
     """Post a query to the TikTok API. For the `query` parameter, see the
     TikTok API documentation:
@@ -115,8 +233,25 @@ def get_videos_query(
     - access_token: Your valid access token for the TikTok Research API.
     - start_date: The start date for the search (format YYYYMMDD).
     - end_date: The end date for the search (format YYYYMMDD).
-    - total_max_count: The total maximum number of videos to collect.
+    - total_max_count: The total maximum number of videos to collect (None for all).
     - max_count: The maximum number of videos to return per request (up to 100).
+    - window_size: The range between start_date and end_date is split into date windows
+      of at most this many days (`WindowSize.day`, `WindowSize.week` or `WindowSize.month`,
+      the longest window the API accepts). Each window is paginated with its own cursor.
+    - max_workers: Number of date windows that are paginated concurrently. Videos
+      found in several windows are only returned once.
+    - fields: Optional; the video fields to request, as a list of `VideoFields` or a
+      comma-separated string, e.g. "id,view_count,like_count". `id` is always included.
+      All fields are requested by default.
+    - typed: If True, columns get the compact dtypes of `video_schema.VIDEO_SCHEMA`
+      (integer counts, datetime `create_time`, categorical region codes and usernames).
+    - since_last_run: If True and `start_date` lies within or right after the days that
+      previous runs of the same query and fields collected completely, `start_date` is
+      moved to the day after them, and an empty DataFrame is returned if there are no
+      days left. Use an `end_date` in the past,
+      the current day is not complete yet.
+    - watermark_dir: Optional; the directory of the watermark files, by default
+      `~/.researchtikpy/watermarks` (see `watermarks.WatermarkStore`).
 
     Returns:
     - A DataFrame containing the videos that match the given criteria.
@@ -138,59 +273,471 @@ def get_videos_query(
     data = rtk.get_videos_query(query, access_token, start_date, end_date, total_max_count)
     ```
     """
+    if since_last_run:
+        watermarks = WatermarkStore(watermark_dir or DEFAULT_WATERMARK_DIR)
+        key = watermark_key(query, fields)
+        missing_range = watermarks.missing_range(key, start_date, end_date)
+        if missing_range is None:
+            return pd.DataFrame()
+        start_date, end_date = missing_range
+
+    windows: list[DateWindow] = split_date_range(start_date, end_date, window_size)
+    query_dict = as_dict(query)
+    query_bodies = [
+        window_query_body(query_dict, window, max_count) for window in windows
+    ]
+
+    logger.info(
+        f"Querying TikTok API in {len(windows)} date window(s) with query={query_bodies[0]}"
+    )
 
-    start_date_dt = datetime.strptime(start_date, "%Y%m%d")
-    end_date_dt = datetime.strptime(end_date, "%Y%m%d")
+    videos = collect_videos(
+        query_bodies,
+        access_token=access_token,
+        total_max_count=total_max_count,
+        max_workers=max_workers,
+        fields=fields,
+    )
+    if since_last_run and (total_max_count is None or len(videos) < total_max_count):
+        watermarks.advance(key, start_date, completed_end_date(end_date), videos)
+    return to_video_frame(videos) if typed else pd.DataFrame(videos)
 
-    if start_date_dt > end_date_dt:
-        raise ValueError("start_date must be before or equal end_date!")
 
-    collected_videos = []
+def get_videos_query_split(
+    query: Query | CompiledQuery,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    total_max_count: int | None = None,
+    max_count=100,
+    values_per_query: int = 100,
+    window_size: int = WindowSize.month,
+    max_workers: int = 4,
+    verbose: bool = False,
+    fields=None,
+    since_last_run: bool = False,
+    watermark_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Like `get_videos_query`, but splits `IN` conditions with more than
+    `values_per_query` values into sub-queries (see `query_planner.plan_sub_queries`)
+    and paginates all sub-queries and date windows concurrently.
+
+    Videos found by several sub-queries are returned once. Two columns attribute
+    every video to the query terms without extra requests:
+    - sub_query: Index of the first sub-query that returned the video.
+    - matched_terms: The hashtags, keywords and usernames of the query that the
+      video matches, over all sub-queries that returned it.
+
+    The sub-queries are stored in `df.attrs["sub_queries"]`. With `since_last_run`,
+    the watermark of the original query is used (see `get_videos_query`).
+    """
+    if since_last_run:
+        watermarks = WatermarkStore(watermark_dir or DEFAULT_WATERMARK_DIR)
+        key = watermark_key(query, fields)
+        missing_range = watermarks.missing_range(key, start_date, end_date)
+        if missing_range is None:
+            return pd.DataFrame()
+        start_date, end_date = missing_range
+
+    sub_queries = plan_sub_queries(query, values_per_query)
+    windows = split_date_range(start_date, end_date, window_size)
+    logger.info(
+        f"Querying TikTok API with {len(sub_queries)} sub-queries in {len(windows)} date window(s)"
+    )
+    plan = [(i, sub_query) for i, sub_query in enumerate(sub_queries) for _ in windows]
+    query_bodies = [
+        window_query_body(sub_query.as_dict(), window, max_count)
+        for sub_query in sub_queries
+        for window in windows
+    ]
+    chains = collect_cursor_chains(
+        query_bodies, access_token, total_max_count, max_workers, verbose, fields
+    )
 
-    query_body = {
-        "query": as_dict(query),
-        "start_date": start_date_dt.strftime("%Y%m%d"),
-        "end_date": end_date_dt.strftime("%Y%m%d"),
+    videos_by_id: dict = {}
+    for (i, sub_query), videos in zip(plan, chains):
+        for video in videos:
+            terms = matched_terms(video, sub_query)
+            if video["id"] in videos_by_id:
+                known_terms = videos_by_id[video["id"]]["matched_terms"]
+                known_terms.extend(t for t in terms if t not in known_terms)
+            else:
+                videos_by_id[video["id"]] = video | dict(
+                    sub_query=i, matched_terms=terms
+                )
+
+    videos = list(videos_by_id.values())
+    if since_last_run and (total_max_count is None or len(videos) < total_max_count):
+        watermarks.advance(key, start_date, completed_end_date(end_date), videos)
+    videos_df = pd.DataFrame(videos[:total_max_count])
+    videos_df.attrs["sub_queries"] = sub_queries
+    return videos_df
+
+
+def window_query_body(query: dict, window: DateWindow, max_count: int) -> dict:
+    return {
+        "query": query,
+        "start_date": window.start_date,
+        "end_date": window.end_date,
         "max_count": max_count,
     }
 
-    logger.info(f"Querying TikTok API with query={query_body}")
 
-    for response in iter_responses(query_body, access_token):
-        if_needed_log_failures_and_wait(response)
+def collect_videos(
+    query_bodies: list[dict],
+    access_token: str,
+    total_max_count: int | None = None,
+    max_workers: int = 1,
+    fields=None,
+) -> list[dict]:
+    """Paginates every query body in a thread pool and merges the videos in the
+    order of `query_bodies`, dropping videos whose `id` was already seen.
+    Once `total_max_count` distinct videos are collected, all running
+    cursor chains stop after their current page and pending ones are skipped.
+    """
+    chains = collect_cursor_chains(
+        query_bodies, access_token, total_max_count, max_workers, fields=fields
+    )
+    return merge_videos(chains)[:total_max_count]
 
-        if response.status_code == 200:
-            videos: list[dict] = response.json()["data"]["videos"]
 
-            logger.info(f"Received {len(videos)} videos.")
+def collect_cursor_chains(
+    query_bodies: list[dict],
+    access_token: str,
+    total_max_count: int | None = None,
+    max_workers: int = 1,
+    verbose: bool = False,
+    fields=None,
+) -> list[list[dict]]:
+    """Like `collect_videos`, but returns the videos of each query body separately."""
+    limit = float("inf") if total_max_count is None else total_max_count
+    stop = threading.Event()
+    seen_ids = _SeenVideoIds(limit, stop)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [
+            pool.submit(
+                _collect_cursor_chain, body, access_token, seen_ids, stop, fields
+            )
+            for body in query_bodies
+        ]
+        for n_done, future in enumerate(as_completed(futures), start=1):
+            videos = future.result()
+            if len(query_bodies) > 1:
+                msg = f"Finished cursor chain {n_done}/{len(query_bodies)} with {len(videos)} videos."
+                logger.info(msg)
+                if verbose:
+                    print(msg)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return [future.result() for future in futures]
+
+
+class _SeenVideoIds:
+    """The distinct video ids collected by all cursor chains. Sets `stop` as soon as
+    `limit` of them are collected, so that no chain requests another page."""
+
+    def __init__(self, limit: float, stop: threading.Event):
+        self.limit = limit
+        self.stop = stop
+        self._ids = set()
+        self._lock = threading.Lock()
+
+    def add(self, videos: list[dict]) -> None:
+        with self._lock:
+            self._ids.update(video["id"] for video in videos)
+            if len(self._ids) >= self.limit:
+                self.stop.set()
+
+
+def _collect_cursor_chain(
+    query_body: dict,
+    access_token: str,
+    seen_ids: _SeenVideoIds,
+    stop: threading.Event,
+    fields=None,
+) -> list[dict]:
+    collected_videos = []
+    if stop.is_set():
+        return collected_videos
+
+    # the generator requests the next page only when the loop asks for it
+    for data in iter_pages(query_body, access_token, fields=fields):
+        collected_videos.extend(data["videos"])
+        seen_ids.add(data["videos"])
+        if stop.is_set():
+            break
 
-            collected_videos.extend(videos)
+    return collected_videos
 
-        if len(collected_videos) >= total_max_count:
-            break
 
-    return pd.DataFrame(collected_videos[:total_max_count])
+def merge_videos(pages: Iterable[list[dict]]) -> list[dict]:
+    """Concatenates lists of videos, keeping the first occurrence of each video id."""
+    seen_ids = set()
+    merged = []
+    for videos in pages:
+        for video in videos:
+            if video["id"] not in seen_ids:
+                seen_ids.add(video["id"])
+                merged.append(video)
+    return merged
 
 
-def post_query(full_query: dict, access_token: str) -> requests.Response:
-    """The full query includes e.g. 'max_count', 'search_id' and 'cursor' fields."""
-    assert isinstance(access_token, str), "access_token must be a string!"
+def iter_videos(
+    query: Query,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    total_max_count: int | None = None,
+    max_count=100,
+    window_size: int = WindowSize.month,
+    checkpoint_dir: Path | None = None,
+    resume: bool = False,
+    fields=None,
+) -> Iterator[dict]:
+    """Streams the videos matching a query one by one as the pages arrive,
+    so that arbitrarily large result sets can be written to disk with constant memory.
+    Takes the same parameters as `get_videos_query`, date windows are requested
+    one after the other. For `checkpoint_dir` and `resume`, see `iter_video_pages`.
 
-    endpoint = "https://open.tiktokapis.com/v2/research/video/query/"
-    fields = "id,video_description,create_time,region_code,share_count,view_count,like_count,comment_count,music_id,hashtag_names,username,effect_ids,playlist_id,voice_to_text"
-    url_with_fields = f"{endpoint}?fields={fields}"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-    }
+    Example:
+    ```
+    with open("videos.jsonl", "w") as f:
+        for video in iter_videos(query, access_token, "20240101", "20241231"):
+            f.write(json.dumps(video) + "\\n")
+    ```
+    """
+    for videos in iter_video_pages(
+        query,
+        access_token,
+        start_date,
+        end_date,
+        total_max_count=total_max_count,
+        max_count=max_count,
+        window_size=window_size,
+        checkpoint_dir=checkpoint_dir,
+        resume=resume,
+        fields=fields,
+    ):
+        yield from videos
+
+
+def iter_video_frames(
+    query: Query,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    total_max_count: int | None = None,
+    max_count=100,
+    window_size: int = WindowSize.month,
+    checkpoint_dir: Path | None = None,
+    resume: bool = False,
+    fields=None,
+    typed: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Like `iter_videos`, but yields one DataFrame chunk per page of the API.
+    With `typed=True`, the chunks have the dtypes of `video_schema.VIDEO_SCHEMA`.
+
+    Example:
+    ```
+    for chunk in iter_video_frames(query, access_token, "20240101", "20241231"):
+        append_df_to_file(chunk, Path("videos.csv"))
+    ```
+    """
+    for videos in iter_video_pages(
+        query,
+        access_token,
+        start_date,
+        end_date,
+        total_max_count=total_max_count,
+        max_count=max_count,
+        window_size=window_size,
+        checkpoint_dir=checkpoint_dir,
+        resume=resume,
+        fields=fields,
+    ):
+        yield to_video_frame(videos) if typed else pd.DataFrame(videos)
+
+
+def iter_video_pages(
+    query: Query,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    total_max_count: int | None = None,
+    max_count=100,
+    window_size: int = WindowSize.month,
+    checkpoint_dir: Path | None = None,
+    resume: bool = False,
+    fields=None,
+) -> Iterator[list[dict]]:
+    """Yields the list of videos of every successful page, walking the date windows
+    chronologically. Stops once `total_max_count` videos were yielded (if given).
+
+    If `checkpoint_dir` is given, the progress of the query is saved there after the
+    caller has processed each page (i.e. when the next page is requested). With
+    `resume=True`, finished date windows are skipped and the window in progress is
+    continued from the saved search_id and cursor. A page whose processing was
+    interrupted before the checkpoint was written is requested again.
+    """
+    windows: list[DateWindow] = split_date_range(start_date, end_date, window_size)
+    query_dict = as_dict(query)
+
+    store, checkpoint = None, None
+    if checkpoint_dir is not None:
+        store = CheckpointStore(checkpoint_dir)
+        key = checkpoint_key(
+            query=compile_query(query).digest,
+            start_date=start_date,
+            end_date=end_date,
+            max_count=max_count,
+            window_size=int(window_size),
+            fields=video_fields_param(fields),
+        )
+        checkpoint = store.load(key) if resume else None
+        checkpoint = checkpoint or QueryCheckpoint(key=key)
+        if checkpoint.done:
+            logger.info("Checkpoint says the query is already finished.")
+            return
+
+    n_yielded = checkpoint.rows_written if checkpoint else 0
+    for window in windows:
+        query_body = window_query_body(query_dict, window, max_count)
+        if checkpoint is not None:
+            if window.start_date in checkpoint.completed_windows:
+                continue
+            query_body = checkpoint.resume_body(query_body)
+
+        for data in iter_pages(query_body, access_token, fields=fields):
+            videos: list[dict] = data["videos"]
+            if total_max_count is not None:
+                videos = videos[: total_max_count - n_yielded]
+            n_yielded += len(videos)
+            yield videos
+
+            if checkpoint is not None:
+                checkpoint.advance(window.start_date, data, len(videos))
+                checkpoint.done = n_yielded == total_max_count
+                store.save(checkpoint)
+            if n_yielded == total_max_count:
+                return
+
+    if checkpoint is not None:
+        checkpoint.done = True
+        store.save(checkpoint)
+
+
+def iter_pages(
+    query_body: dict,
+    access_token: str,
+    session: requests.Session | None = None,
+    fields=None,
+) -> Iterator[dict]:
+    """Walks the cursor chain of a single query body and yields the 'data' object
+    (videos, cursor, search_id, has_more) of every successful response.
+    Raises a ValueError if a request still fails after the retries of `transport.post`.
+    """
+    for response in iter_responses(
+        query_body, access_token, session=session, fields=fields
+    ):
+        raise_for_failed_response(response)
+
+        if response.status_code == 200:
+            data: dict = response.json()["data"]
+
+            logger.info(
+                f"Received {len(data['videos'])} videos for window "
+                f"{query_body['start_date']}-{query_body['end_date']}."
+            )
+
+            yield data
+
+
+def dump_videos_query(
+    query: Query,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    tgt_jsonl: Path,
+    total_max_count: int | None = None,
+    max_count=100,
+    window_size: int = WindowSize.month,
+    resume: bool = True,
+    checkpoint_dir: Path | None = None,
+    fields=None,
+) -> bool:
+    """Appends the videos matching a query to a JSONL file, page by page, and keeps
+    a checkpoint next to it. If the collection is interrupted, calling the function
+    again with the same arguments continues where it stopped.
+
+    Parameters:
+    - tgt_jsonl: The JSONL file to append the videos to.
+    - resume: If True (default), continue from an existing checkpoint of the same query.
+    - checkpoint_dir: Directory of the checkpoint files. Defaults to a `.checkpoints`
+      directory next to `tgt_jsonl`.
+    - For the other parameters, see `get_videos_query`.
+
+    Returns:
+    - True if the query is finished, False if it stopped because the daily quota or the
+      request budget is used up (see `researchtikpy.quota`). Call it again to continue.
+    """
+    if checkpoint_dir is None:
+        checkpoint_dir = tgt_jsonl.parent / ".checkpoints"
+    frames = iter_video_frames(
+        query,
+        access_token,
+        start_date,
+        end_date,
+        total_max_count=total_max_count,
+        max_count=max_count,
+        window_size=window_size,
+        checkpoint_dir=checkpoint_dir,
+        resume=resume,
+        fields=fields,
+    )
+    try:
+        for df in frames:
+            append_df_to_file(df=df, path=tgt_jsonl, jsonl=True)
+    except BudgetExhausted as e:
+        logger.warning(f"Stopping at the last checkpoint: {e}")
+        return False
+    return True
+
+
+def post_query(
+    full_query: dict,
+    access_token: AccessToken,
+    session: requests.Session | None = None,
+    fields=None,
+) -> requests.Response:
+    """The full query includes e.g. 'max_count', 'search_id' and 'cursor' fields.
+    Pass a `session` to reuse pooled connections across requests, and `fields`
+    to request only some of the `VideoFields` (all by default)."""
+    assert isinstance(
+        access_token, (str, AccessTokenProvider)
+    ), "access_token must be a string or an AccessTokenProvider!"
+
+    url_with_fields = f"{endpoints.video_query}?fields={video_fields_param(fields)}"
     logger.debug(f"Calling TikTok API with url={url_with_fields} data={full_query}")
-    return requests.post(url_with_fields, headers=headers, json=full_query)
+    return transport.post(
+        url_with_fields, access_token, json=full_query, session=session
+    )
 
 
-def iter_responses(query_body: dict, access_token: str) -> Iterator[requests.Response]:
+def iter_responses(
+    query_body: dict,
+    access_token: str,
+    session: requests.Session | None = None,
+    fields=None,
+) -> Iterator[requests.Response]:
     """
     Creates an iterator that uses the cursor-based pagination to request all videos sequentially.
     If query_body['is_random'] is True, the iterator will not use cursor pagination.
+    `fields` selects the video fields to request (see `post_query`).
     Each element yielded is an http response from the API.
     """
     search_id = query_body.get("search_id", None)
@@ -199,7 +746,12 @@ def iter_responses(query_body: dict, access_token: str) -> Iterator[requests.Res
 
     while True:
         full_query = query_body | dict(search_id=search_id, cursor=cursor)
-        response = post_query(full_query=full_query, access_token=access_token)
+        response = post_query(
+            full_query=full_query,
+            access_token=access_token,
+            session=session,
+            fields=fields,
+        )
         yield response
         if response.status_code == 200:
             data: dict = response.json()["data"]
@@ -211,80 +763,15 @@ def iter_responses(query_body: dict, access_token: str) -> Iterator[requests.Res
                 cursor = data["cursor"]
 
 
-def if_needed_log_failures_and_wait(
-    response: requests.Response, secs: int = 10
-) -> None:
-    if response.status_code == 200:
-        return
-    elif not has_json(response):
-        raise new_api_response_error(response)
-    elif rate_limit_exceeded(response):
-        log_rate_limit_hit_and_wait(response)
-    elif is_uninformative_backend_failure(response):
-        log_backend_failure_and_wait(response, secs=secs)
-    elif search_id_was_not_found(response):
-        logger.warning(
-            "The search_id is not found in the beginning, but is found after waiting some seconds."
-        )
-        log_backend_failure_and_wait(response, secs=secs)
-    else:
+def raise_for_failed_response(response: requests.Response) -> None:
+    """Raises a ValueError for a failed response. Transient failures (rate limits,
+    backend hiccups, search ids that are not found yet) were already retried by
+    `transport.post`, so a failed response here is either not retryable or
+    exceeded its retry budget."""
+    if response.status_code != 200:
         raise new_api_response_error(response)
 
 
-def rate_limit_exceeded(response) -> bool:
-    """This is different from the daily quota limit."""
-    return (
-        response.status_code == 429
-        and response.json()["error"]["code"] == "rate_limit_exceeded"
-    )
-
-
-def log_rate_limit_hit_and_wait(response) -> None:
-    logger.warning(
-        f"Rate limit hit: status_code={response.status_code} Response={response.json()}\n"
-        f"Pausing 10s before continuing..."
-    )
-    time.sleep(10)
-
-
 def new_api_response_error(response):
     msg = f"API response error: status_code={response.status_code} body={response.text}"
     return ValueError(msg)
-
-
-def log_backend_failure_and_wait(response, secs: int = 10) -> None:
-    logger.warning(
-        f"Backend failure: status_code={response.status_code} Response={response.json()}\n"
-        f"Pausing {secs}s before retrying..."
-    )
-    time.sleep(secs)
-
-
-def is_uninformative_backend_failure(response) -> bool:
-    error_msg: str = json_error_message(response)
-    err_msgs = {
-        "Something is wrong. Please try again later.",
-        "Something went wrong. Please try again later.",
-        "Server Internal Error",
-        "Invalid count or cursor",
-    }
-    status_codes = {400, 500}
-    return response.status_code in status_codes and error_msg in err_msgs
-
-
-def json_error_message(response) -> str:
-    return response.json()["error"]["message"]
-
-
-def has_json(response: requests.Response) -> bool:
-    try:
-        response.json()
-        return True
-    except requests.JSONDecodeError:
-        return False
-
-
-def search_id_was_not_found(response) -> bool:
-    pattern = r"Search Id \d+ is invalid or expired"
-    match = re.match(pattern, json_error_message(response))
-    return response.status_code == 400 and bool(match)
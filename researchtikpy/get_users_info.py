@@ -2,8 +2,17 @@
 # coding: utf-8
 
 # In[1]:
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+
 import pandas as pd
+import requests
+
+from . import endpoints, transport
+from .profile_cache import ProfileCache
+from .transport import pooled_session
+
+logger = getLogger(__name__)
 
 
 default_fields = "display_name,bio_description,avatar_url,is_verified,follower_count,following_count,likes_count,video_count"
@@ -16,7 +25,7 @@ def get_users_info(usernames, access_token, fields=default_fields, verbose=True)
     Parameters:
     - usernames (list): List of TikTok usernames to fetch info for.
     - access_token (str): Access token for TikTok's API.
-    - fields (str): Comma-separated string of user fields to retrieve. 
+    - fields (str): Comma-separated string of user fields to retrieve.
     - verbose (bool): If True, prints detailed logs; if False, suppresses most print statements.
 
     Returns:
@@ -40,28 +49,100 @@ def get_users_info(usernames, access_token, fields=default_fields, verbose=True)
                     print(f"No data found for user: {username}")
         else:
             if verbose:
-                print(f"Error for user {username}: {response.status_code}", response.json())
-            users_data.append({"username": username, "error": "Failed to retrieve data"})
+                print(
+                    f"Error for user {username}: {response.status_code}",
+                    response.json(),
+                )
+            users_data.append(
+                {"username": username, "error": "Failed to retrieve data"}
+            )
 
     users_df = pd.DataFrame(users_data)
-    
+
     if verbose:
         print("User info retrieval complete.")
-    
+
     return users_df
 
 
+def get_users_info_bulk(
+    usernames,
+    access_token,
+    fields=default_fields,
+    max_workers=8,
+    profile_cache: ProfileCache | None = None,
+    verbose=False,
+):
+    """
+    Fetches user information for long lists of usernames with many repetitions, e.g. the
+    `username` column of a video or comment table.
+
+    Every distinct username is requested once, concurrently on a shared session, unless
+    `profile_cache` holds a fresh copy of its requested fields.
+
+    Parameters:
+    - usernames (list): TikTok usernames, possibly repeated.
+    - access_token (str): Access token for TikTok's API.
+    - fields (str): Comma-separated string of user fields to retrieve.
+    - max_workers (int): Number of users that are requested concurrently.
+    - profile_cache (ProfileCache): Optional persistent cache of user profiles.
+    - verbose (bool): If True, prints a summary.
+
+    Returns:
+    - pd.DataFrame: One row per element of `usernames`, in the same order, with a
+      `username` column. Users that could not be fetched have an `error`.
+    """
+    requested_fields = [field.strip() for field in fields.split(",")]
+    profiles: dict[str, dict] = {}
+    missing = []
+    for username in dict.fromkeys(usernames):  # distinct, in order of appearance
+        cached = (
+            profile_cache.get(username, requested_fields) if profile_cache else None
+        )
+        if cached is not None:
+            profiles[username] = cached
+        else:
+            missing.append(username)
+
+    session = pooled_session(max_workers)  # shared by all workers
+
+    def fetch(username):
+        return fetch_user_info(session, username, access_token, fields)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for username, response in zip(missing, pool.map(fetch, missing)):
+            if response.status_code == 200 and response.json().get("data"):
+                profiles[username] = response.json()["data"]
+                if profile_cache is not None:
+                    profile_cache.put(username, profiles[username])
+            else:
+                logger.info(
+                    f"Error for user {username}: {response.status_code} {response.text}"
+                )
+                profiles[username] = {"error": "Failed to retrieve data"}
+
+    if verbose:
+        print(
+            f"Fetched {len(missing)} of {len(profiles)} distinct users from the API, "
+            f"{len(profiles) - len(missing)} from the profile cache."
+        )
+    return pd.DataFrame(
+        [{"username": username, **profiles[username]} for username in usernames]
+    )
+
+
 def fetch_user_info(
     session: requests.Session, username: str, access_token: str, fields: str
 ) -> requests.Response:
     query_body = {"username": username}
     params = {"fields": fields}
-    endpoint = "https://open.tiktokapis.com/v2/research/user/info/"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-    return session.post(endpoint, headers=headers, json=query_body, params=params)
+    return transport.post(
+        endpoints.user_info,
+        access_token,
+        json=query_body,
+        params=params,
+        session=session,
+    )
 
 
-default_fields = "display_name,bio_description,avatar_url,is_verified,follower_count,following_count,likes_count,video_count"
\ No newline at end of file
+default_fields = "display_name,bio_description,avatar_url,is_verified,follower_count,following_count,likes_count,video_count"
@@ -4,11 +4,30 @@
 # In[1]:
 
 
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Iterator, NamedTuple
+
 import pandas as pd
-from time import sleep
+import requests
+
+from . import endpoints, transport
+from .quota import BudgetExhausted
+from .rtk_utilities import RecordAccumulator
+from .transport import pooled_session
+
+logger = getLogger(__name__)
 
-def get_video_comments(videos_df, access_token, fields="id,video_id,text,like_count,reply_count, create_time, parent_comment_id", max_count=100, verbose=True):
+default_fields = (
+    "id,video_id,text,like_count,reply_count, create_time, parent_comment_id"
+)
+max_cursor = 1000  # The API does not return comments beyond this cursor
+
+
+def get_video_comments(
+    videos_df, access_token, fields=default_fields, max_count=100, verbose=True
+):
     """
     Fetches comments for multiple videos and compiles them into a single DataFrame.
 
@@ -22,42 +41,213 @@ def get_video_comments(videos_df, access_token, fields="id,video_id,text,like_co
     Returns:
     - pd.DataFrame: DataFrame containing all comments from the provided videos.
     """
-    endpoint = "https://open.tiktokapis.com/v2/research/video/comment/list/"
-    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
-    all_comments_df = pd.DataFrame()
+    all_comments = RecordAccumulator()
     session = requests.Session()  # Use session for improved performance
 
-    for _, video in videos_df.iterrows():
-        video_id = video['id']
+    for video_id in (
+        videos_df["id"].drop_duplicates().tolist()
+    ):  # each video once, as Python ints
         has_more = True
         cursor = 0
 
-        while has_more and cursor < 1000:  # To respect the API's limit
-            body_params = {"video_id": video_id, "max_count": max_count, "cursor": cursor}
-            response = session.post(f"{endpoint}?fields={fields}", headers=headers, json=body_params)
-            
+        while has_more and cursor < max_cursor:  # To respect the API's limit
+            response = fetch_video_comments(
+                session, video_id, access_token, fields, cursor, max_count
+            )
+
             if verbose:
                 print(f"Fetching comments for video {video_id} with cursor at {cursor}")
-                
+
             if response.status_code == 200:
                 data = response.json().get("data", {})
                 comments = data.get("comments", [])
-                
-                if comments:
-                    comments_df = pd.DataFrame(comments)
-                    comments_df['video_id'] = video_id  # Add the video_id to each comment
-                    all_comments_df = pd.concat([all_comments_df, comments_df], ignore_index=True)
-                
+
+                all_comments.extend(
+                    comments, video_id=video_id
+                )  # Add the video_id to each comment
+
                 has_more = data.get("has_more", False)
                 cursor += max_count  # Increment cursor based on max_count
-            elif response.status_code == 429:
-                if verbose:
-                    print("Rate limit exceeded. Pausing before retrying...")
-                sleep(30)  # Pause execution before retrying
-            else:
+            else:  # rate limits and backend failures were already retried by transport.post
                 if verbose:
-                    print(f"Error fetching comments for video {video_id}: {response.status_code}", response.json())
+                    print(
+                        f"Error fetching comments for video {video_id}: {response.status_code}",
+                        response.json(),
+                    )
                 break  # Stop the loop in case of an error
 
-    return all_comments_df
+    return all_comments.to_frame()
+
+
+def fetch_video_comments(
+    session: requests.Session,
+    video_id: int,
+    access_token: str,
+    fields: str = default_fields,
+    cursor: int = 0,
+    max_count: int = 100,
+) -> requests.Response:
+    query_body = {"video_id": video_id, "max_count": max_count, "cursor": cursor}
+    return transport.post(
+        f"{endpoints.video_comments}?fields={fields}",
+        access_token,
+        json=query_body,
+        session=session,
+    )
+
+
+def iter_comment_responses(
+    access_token: str,
+    video_id: int,
+    session: requests.Session | None = None,
+    fields: str = default_fields,
+    max_count: int = 100,
+) -> Iterator[requests.Response]:
+    """Creates an iterator that uses the cursor-based pagination to request the comments
+    of a video sequentially, up to the API's cursor limit of 1000.
+    Each element yielded is an http response from the API. Iteration stops at the
+    first response that is not successful.
+    """
+    if session is None:
+        session = requests.Session()
+    cursor = 0
+    while cursor < max_cursor:
+        response = fetch_video_comments(
+            session, video_id, access_token, fields, cursor, max_count
+        )
+        yield response
+
+        if response.status_code != 200:
+            logger.info(
+                "Problem in response. status_code=%d, error='%s'",
+                response.status_code,
+                response.text,
+            )
+            return
+        data: dict = response.json().get("data", {})
+        if not data.get("has_more", False):
+            return
+        cursor = data.get("cursor", cursor + max_count)
+
+
+class CommentThread(NamedTuple):
+    """The comments collected for one video."""
+
+    video_id: int
+    comments: list[dict]
+    n_requests: int
+    truncated: bool  # the API had more comments beyond the cursor limit
+    complete: bool  # False if the collection stopped on an error or an exhausted budget
+
+
+def collect_video_comments(
+    videos_df: pd.DataFrame,
+    access_token: str,
+    fields: str = default_fields,
+    max_workers: int = 8,
+    verbose: bool = False,
+) -> pd.DataFrame:
+    """Fetches the comments of many videos concurrently, most commented videos first.
+
+    If `videos_df` has the `comment_count` column of `get_videos_query`, videos without
+    comments are skipped and `max_count` of every request is sized to the known number
+    of comments (plus a margin for comments added since), switching to full pages if
+    the count turns out to be stale. Videos are fetched in descending order of
+    `comment_count`, so when a request budget or the daily quota runs out (see
+    `researchtikpy.quota`), the most valuable threads are already collected. Each
+    video's cursor chain stops at the API's cursor limit of 1000.
+
+    Parameters:
+    - videos_df (pd.DataFrame): DataFrame with a column 'id' and optionally 'comment_count'.
+    - access_token (str): Access token for TikTok's API.
+    - fields (str): Comma-separated string of fields to retrieve for each comment.
+    - max_workers (int): Number of videos whose comments are fetched concurrently.
+    - verbose (bool): If True, prints a line per finished video.
+
+    Returns:
+    - pd.DataFrame: The comments with a `video_id` column. `df.attrs` holds the ids of the
+      videos that were skipped (`skipped_video_ids`), cut off at the cursor limit
+      (`truncated_video_ids`) and not completely fetched (`incomplete_video_ids`).
+    """
+    videos = videos_df.drop_duplicates("id")
+    skipped_video_ids = []
+    if "comment_count" in videos.columns:
+        has_no_comments = (videos["comment_count"] == 0).fillna(False).astype(bool)
+        skipped_video_ids = videos.loc[has_no_comments, "id"].tolist()
+        videos = videos[~has_no_comments].sort_values(
+            "comment_count", ascending=False, na_position="last", kind="stable"
+        )
+        comment_counts = videos["comment_count"].tolist()
+    else:
+        comment_counts = [None] * len(videos)
+
+    session = pooled_session(max_workers)  # shared by all workers
+    stop = threading.Event()
+
+    def collect(video_id, comment_count) -> CommentThread:
+        return _collect_comment_thread(
+            session, video_id, access_token, fields, _page_size(comment_count), stop
+        )
+
+    all_comments = RecordAccumulator()
+    truncated_video_ids, incomplete_video_ids = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # the pool starts the videos in the order of submission, i.e. by priority
+        for thread in pool.map(collect, videos["id"].tolist(), comment_counts):
+            all_comments.extend(thread.comments, video_id=thread.video_id)
+            if thread.truncated:
+                truncated_video_ids.append(thread.video_id)
+            if not thread.complete:
+                incomplete_video_ids.append(thread.video_id)
+            if verbose:
+                print(
+                    f"Fetched {len(thread.comments)} comments for video {thread.video_id}"
+                )
+
+    comments_df = all_comments.to_frame()
+    comments_df.attrs["skipped_video_ids"] = skipped_video_ids
+    comments_df.attrs["truncated_video_ids"] = truncated_video_ids
+    comments_df.attrs["incomplete_video_ids"] = incomplete_video_ids
+    return comments_df
+
+
+def _page_size(comment_count) -> int:
+    if comment_count is None or pd.isna(comment_count):
+        return 100
+    return int(min(100, comment_count + comment_count // 10 + 1))
+
+
+def _collect_comment_thread(
+    session: requests.Session,
+    video_id: int,
+    access_token: str,
+    fields: str,
+    max_count: int,
+    stop: threading.Event,
+) -> CommentThread:
+    comments, n_requests, data = [], 0, {}
+    if stop.is_set():
+        return CommentThread(video_id, comments, n_requests, False, False)
+    cursor = 0
+    try:
+        while cursor < max_cursor:
+            response = fetch_video_comments(
+                session, video_id, access_token, fields, cursor, max_count
+            )
+            n_requests += 1
+            if response.status_code != 200:
+                return CommentThread(video_id, comments, n_requests, False, False)
+            data = response.json().get("data", {})
+            comments.extend(data.get("comments", []))
+            if not data.get("has_more", False):
+                break
+            cursor = data.get("cursor", cursor + max_count)
+            # a sized page with more to come means a stale comment_count, use full pages
+            max_count = 100
+    except BudgetExhausted as e:
+        logger.warning(f"Stopping comment collection: {e}")
+        stop.set()
+        return CommentThread(video_id, comments, n_requests, False, False)
 
+    truncated = data.get("has_more", False) and data.get("cursor", 0) >= max_cursor
+    return CommentThread(video_id, comments, n_requests, truncated, True)
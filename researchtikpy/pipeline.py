@@ -0,0 +1,288 @@
+"""Streaming enrichment of a video query with authors, comments and followers.
+
+A typical collection chains `get_videos_query`, `get_users_info` for the authors
+of the videos, `get_video_comments` for the videos and `get_followers` for the
+most followed authors, each stage waiting for the previous one to finish.
+`run_enrichment_pipeline` runs these stages concurrently instead, connected by
+bounded queues: the authors and comments of the first page of videos are
+requested while the query keeps paging, and the followers of an author are
+requested as soon as its profile arrives. End-to-end, the job takes roughly as
+long as its slowest stage.
+
+```
+from researchtikpy.pipeline import Stage, run_enrichment_pipeline
+from researchtikpy.sinks import JsonlSink
+
+summary = run_enrichment_pipeline(
+    query, access_token, "20240101", "20240131",
+    sinks={
+        Stage.videos: JsonlSink(Path("videos.jsonl")),
+        Stage.authors: JsonlSink(Path("authors.jsonl")),
+        Stage.comments: JsonlSink(Path("comments.jsonl")),
+        Stage.followers: JsonlSink(Path("followers.jsonl")),
+    },
+    min_follower_count=100_000,
+)
+```
+
+Every video and author is processed once, even if it appears on many pages.
+The queues hold at most `queue_size` pages, so a slow stage holds back the
+query instead of piling up pages in memory.
+"""
+
+import queue
+import threading
+from enum import StrEnum, auto
+from logging import getLogger
+from typing import Callable
+
+import pandas as pd
+
+from .date_windows import WindowSize
+from .get_query import iter_video_frames
+from .get_users_info import default_fields as default_user_fields
+from .get_users_info import get_users_info_bulk
+from .get_video_comments import collect_video_comments
+from .get_video_comments import default_fields as default_comment_fields
+from .query_lang import Query
+from .social_graph import get_followers
+
+logger = getLogger(__name__)
+
+_done = object()  # sent through a queue after the last item
+
+
+class Stage(StrEnum):
+    videos = auto()
+    authors = auto()
+    comments = auto()
+    followers = auto()
+
+
+def run_enrichment_pipeline(
+    query: Query,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    sinks: dict[Stage, object],
+    total_max_count: int | None = None,
+    max_count: int = 100,
+    window_size: int = WindowSize.month,
+    fields=None,
+    user_fields: str = default_user_fields,
+    comment_fields: str = default_comment_fields,
+    min_follower_count: int = 100_000,
+    max_followers: int | None = None,
+    max_workers: int = 8,
+    queue_size: int = 4,
+) -> pd.DataFrame:
+    """
+    Collects the videos of a query and enriches them in concurrent stages.
+
+    A stage runs if `sinks` has a sink for it. The followers stage depends on the
+    authors stage, whose profiles decide which authors are followed up; it runs the
+    authors stage even without an authors sink.
+
+    Parameters:
+    - query (Query): The query, as for `get_videos_query`.
+    - access_token (str): Access token for TikTok's API.
+    - start_date (str), end_date (str): The date range, as for `get_videos_query`.
+    - sinks (dict): A sink per Stage, e.g. `sinks.JsonlSink`, `sinks.ParquetSink` or `sinks.MemorySink`.
+    - total_max_count, max_count, window_size, fields: As for `get_videos_query`.
+    - user_fields (str): Comma-separated string of user fields of the authors.
+    - comment_fields (str): Comma-separated string of comment fields.
+    - min_follower_count (int): Followers are collected for authors with at least this many followers.
+    - max_followers (int): Maximum number of followers to retrieve per author.
+    - max_workers (int): Number of concurrent requests within each stage.
+    - queue_size (int): Number of pages a stage may fall behind the one it depends on.
+
+    Returns:
+    - pd.DataFrame: One row per stage that ran, with the number of `items` it processed
+      (distinct videos, authors or followed authors) and of `rows` it wrote.
+    """
+    run_followers = Stage.followers in sinks
+    run_authors = Stage.authors in sinks or run_followers
+    if run_followers and "follower_count" not in user_fields.split(","):
+        user_fields += ",follower_count"
+
+    stats = {stage: {"stage": str(stage), "items": 0, "rows": 0} for stage in Stage}
+    errors: list[BaseException] = []
+    stop = threading.Event()  # set when a stage fails
+    authors_queue = queue.Queue(maxsize=queue_size) if run_authors else None
+    comments_queue = (
+        queue.Queue(maxsize=queue_size) if Stage.comments in sinks else None
+    )
+    followers_queue = queue.Queue(maxsize=queue_size) if run_followers else None
+
+    def write(stage: Stage, df: pd.DataFrame) -> None:
+        stats[stage]["rows"] += len(df)
+        if stage in sinks and len(df) > 0:
+            sinks[stage].write(df)
+
+    def produce_videos() -> None:
+        seen_video_ids = set()
+        for videos_df in iter_video_frames(
+            query,
+            access_token,
+            start_date,
+            end_date,
+            total_max_count=total_max_count,
+            max_count=max_count,
+            window_size=window_size,
+            fields=fields,
+        ):
+            if stop.is_set():
+                return
+            if "id" in videos_df.columns:
+                is_new = (
+                    ~videos_df["id"].isin(seen_video_ids)
+                    & ~videos_df["id"].duplicated()
+                )
+                videos_df = videos_df[is_new]
+                seen_video_ids.update(videos_df["id"].tolist())
+            if videos_df.empty:
+                continue
+            stats[Stage.videos]["items"] += len(videos_df)
+            write(Stage.videos, videos_df)
+            for downstream in (authors_queue, comments_queue):
+                if downstream is not None:
+                    downstream.put(videos_df)
+
+    def enrich_authors(videos_df: pd.DataFrame) -> None:
+        if "username" not in videos_df.columns:
+            return
+        new_usernames = [
+            username
+            for username in dict.fromkeys(videos_df["username"].dropna())
+            if username not in seen_usernames
+        ]
+        if not new_usernames:
+            return
+        seen_usernames.update(new_usernames)
+        users_df = get_users_info_bulk(
+            new_usernames, access_token, fields=user_fields, max_workers=max_workers
+        )
+        stats[Stage.authors]["items"] += len(users_df)
+        write(Stage.authors, users_df)
+        if followers_queue is not None and "follower_count" in users_df.columns:
+            follower_counts = pd.to_numeric(users_df["follower_count"], errors="coerce")
+            top_authors = users_df.loc[
+                follower_counts >= min_follower_count, "username"
+            ]
+            if len(top_authors) > 0:
+                followers_queue.put(top_authors.tolist())
+
+    def enrich_comments(videos_df: pd.DataFrame) -> None:
+        comments_df = collect_video_comments(
+            videos_df, access_token, fields=comment_fields, max_workers=max_workers
+        )
+        stats[Stage.comments]["items"] += len(videos_df)
+        write(Stage.comments, comments_df)
+
+    def enrich_followers(usernames: list[str]) -> None:
+        followers_df = get_followers(
+            usernames,
+            access_token,
+            total_count=max_followers,
+            verbose=False,
+            max_workers=max_workers,
+        )
+        stats[Stage.followers]["items"] += len(usernames)
+        write(Stage.followers, followers_df)
+
+    seen_usernames: set[str] = set()
+    threads = [
+        _stage_thread(
+            Stage.videos, produce_videos, [authors_queue, comments_queue], errors, stop
+        )
+    ]
+    if authors_queue is not None:
+        threads.append(
+            _stage_thread(
+                Stage.authors,
+                lambda: _consume(authors_queue, enrich_authors, stop),
+                [followers_queue],
+                errors,
+                stop,
+            )
+        )
+    if comments_queue is not None:
+        threads.append(
+            _stage_thread(
+                Stage.comments,
+                lambda: _consume(comments_queue, enrich_comments, stop),
+                [],
+                errors,
+                stop,
+            )
+        )
+    if followers_queue is not None:
+        threads.append(
+            _stage_thread(
+                Stage.followers,
+                lambda: _consume(followers_queue, enrich_followers, stop),
+                [],
+                errors,
+                stop,
+            )
+        )
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+    ran = [Stage.videos] + [
+        stage
+        for stage, runs in [
+            (Stage.authors, run_authors),
+            (Stage.comments, comments_queue is not None),
+            (Stage.followers, run_followers),
+        ]
+        if runs
+    ]
+    return pd.DataFrame([stats[stage] for stage in ran])
+
+
+def _consume(
+    items: queue.Queue, process: Callable[[object], None], stop: threading.Event
+) -> None:
+    """Processes the items of a queue until the end marker. Once a stage has failed,
+    the rest of the queue is drained without processing, so that upstream stages
+    never block on a full queue."""
+    failure = None
+    while (item := items.get()) is not _done:
+        if failure is None and not stop.is_set():
+            try:
+                process(item)
+            except BaseException as e:
+                failure = e
+                stop.set()
+    if failure is not None:
+        raise failure
+
+
+def _stage_thread(
+    stage: Stage,
+    run: Callable[[], None],
+    downstream: list[queue.Queue | None],
+    errors: list[BaseException],
+    stop: threading.Event,
+) -> threading.Thread:
+    """A thread that runs a stage and then marks the end of its downstream queues,
+    also if the stage fails. The error is appended to `errors` and stops all stages."""
+
+    def target() -> None:
+        try:
+            run()
+        except BaseException as e:
+            logger.error(f"Stage {stage} failed: {e!r}")
+            errors.append(e)
+            stop.set()
+        finally:
+            for items in downstream:
+                if items is not None:
+                    items.put(_done)
+
+    return threading.Thread(target=target, name=f"researchtikpy-{stage}", daemon=True)
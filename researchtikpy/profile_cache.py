@@ -0,0 +1,120 @@
+"""Persistent cache of user profiles for `get_users_info_bulk`.
+
+Profiles of the same authors are requested again and again when enriching video
+and comment tables. The cache keeps every field of a profile in a SQLite file
+together with the time it was fetched. Fields are grouped by how fast they
+change: counts (followers, likes, ...) go stale within a day, while the display
+name or bio change rarely. A cached profile is used if all requested fields are
+younger than the time-to-live of their group.
+
+```
+from researchtikpy.profile_cache import DAY, FieldGroup, ProfileCache
+
+cache = ProfileCache("profiles.sqlite", ttls={FieldGroup.counts: DAY})
+users_df = get_users_info_bulk(usernames, access_token, profile_cache=cache)
+```
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from enum import StrEnum, auto
+from logging import getLogger
+from pathlib import Path
+
+logger = getLogger(__name__)
+
+DAY = 24 * 60 * 60
+
+
+class FieldGroup(StrEnum):
+    counts = auto()
+    profile = auto()
+
+
+FIELD_GROUPS = {
+    "follower_count": FieldGroup.counts,
+    "following_count": FieldGroup.counts,
+    "likes_count": FieldGroup.counts,
+    "video_count": FieldGroup.counts,
+    "display_name": FieldGroup.profile,
+    "bio_description": FieldGroup.profile,
+    "avatar_url": FieldGroup.profile,
+    "is_verified": FieldGroup.profile,
+}
+
+DEFAULT_TTLS = {FieldGroup.counts: DAY, FieldGroup.profile: 30 * DAY}
+
+
+class ProfileCache:
+    """SQLite-backed cache of user profile fields.
+
+    Params:
+        path (Path): The SQLite file, created if it does not exist.
+        ttls (dict): Time-to-live in seconds per FieldGroup. Fields that are in no
+            group use the shortest time-to-live.
+    """
+
+    def __init__(self, path: Path, ttls: dict[FieldGroup, float] | None = None):
+        self.path = Path(path)
+        self.ttls = DEFAULT_TTLS | (ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS profile_fields (
+                    username TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (username, field)
+                )""")
+
+    def ttl(self, field: str) -> float:
+        group = FIELD_GROUPS.get(field)
+        return self.ttls[group] if group is not None else min(self.ttls.values())
+
+    def get(self, username: str, fields: list[str]) -> dict | None:
+        """The cached profile with the requested fields, or None if one is missing or stale."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT field, value, fetched_at FROM profile_fields
+                WHERE username = ? AND field IN ({", ".join("?" * len(fields))})""",
+                (username, *fields),
+            ).fetchall()
+            fresh = {
+                field: json.loads(value)
+                for field, value, fetched_at in rows
+                if now - fetched_at <= self.ttl(field)
+            }
+            if len(fresh) < len(fields):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return fresh
+
+    def put(self, username: str, profile: dict) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO profile_fields VALUES (?, ?, ?, ?)",
+                [
+                    (username, field, json.dumps(value), now)
+                    for field, value in profile.items()
+                    if field != "username"
+                ],
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (n_users,) = self._conn.execute(
+                "SELECT COUNT(DISTINCT username) FROM profile_fields"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "users": n_users}
+
+    def close(self) -> None:
+        self._conn.close()
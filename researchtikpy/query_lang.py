@@ -1,12 +1,16 @@
+import hashlib
+import json
 from dataclasses import field
 from enum import StrEnum
-from typing import List
-from pydantic import ConfigDict, RootModel
+from typing import Iterable, List, NamedTuple
+
+from pydantic import ConfigDict, TypeAdapter
 from pydantic.dataclasses import dataclass
 
 
 class VideoLengths(StrEnum):
     """Video lengths"""
+
     SHORT = "SHORT"
     MID = "MID"
     LONG = "LONG"
@@ -15,6 +19,7 @@ class VideoLengths(StrEnum):
 
 class RegionCodes(StrEnum):
     """Region codes"""
+
     FR = "FR"
     TH = "TH"
     MM = "MM"
@@ -264,6 +269,7 @@ class RegionCodes(StrEnum):
 
 class Fields(StrEnum):
     """Fields to query"""
+
     create_date = "create_date"
     username = "username"
     region_code = "region_code"
@@ -275,8 +281,45 @@ class Fields(StrEnum):
     video_length = "video_length"
 
 
+class VideoFields(StrEnum):
+    """Fields that can be requested for each video"""
+
+    id = "id"
+    video_description = "video_description"
+    create_time = "create_time"
+    region_code = "region_code"
+    share_count = "share_count"
+    view_count = "view_count"
+    like_count = "like_count"
+    comment_count = "comment_count"
+    music_id = "music_id"
+    hashtag_names = "hashtag_names"
+    username = "username"
+    effect_ids = "effect_ids"
+    playlist_id = "playlist_id"
+    voice_to_text = "voice_to_text"
+
+
+def video_fields_param(fields=None) -> str:
+    """Validates a selection of video fields and formats it for the `fields` URL parameter.
+
+    Args
+    ----
+    fields: Union[None, str, Iterable[VideoFields]]
+        None for all fields, a comma-separated string or an iterable of field names.
+        The `id` field is always included, as videos are deduplicated by it.
+    """
+    if fields is None:
+        return ",".join(VideoFields)
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    selected = {VideoFields(field.strip()) for field in fields} | {VideoFields.id}
+    return ",".join(field for field in VideoFields if field in selected)
+
+
 class Operators(StrEnum):
     """Operators to use in query"""
+
     equals = "EQ"
     isin = "IN"
     greater = "GT"
@@ -304,7 +347,11 @@ class Condition:
     field_values: List[str]
 
 
-@dataclass(config=ConfigDict(alias_generator=lambda x: x.removesuffix("_"), populate_by_name = True))
+@dataclass(
+    config=ConfigDict(
+        alias_generator=lambda x: x.removesuffix("_"), populate_by_name=True
+    )
+)
 class Query:
     """TikTok Research API Query
 
@@ -324,6 +371,118 @@ class Query:
     not_: List[Condition] = field(default_factory=list)
 
 
-def as_dict(query: Query):
+_query_adapter = TypeAdapter(Query)
+
+
+def as_dict(query: "Query | CompiledQuery | dict"):
     """Convert Query object to dictionary"""
-    return RootModel(query).model_dump(by_alias=True)
+    if isinstance(query, CompiledQuery):
+        return query.as_dict()
+    if isinstance(query, dict):
+        return query
+    return _query_adapter.dump_python(query, by_alias=True)
+
+
+class CompiledCondition(NamedTuple):
+    """Canonical, hashable form of a Condition with sorted, deduplicated values"""
+
+    field_name: Fields
+    operation: Operators
+    field_values: tuple[str, ...]
+
+    @classmethod
+    def create(
+        cls, field_name, operation, field_values: Iterable
+    ) -> "CompiledCondition":
+        return cls(
+            Fields(field_name),
+            Operators(operation),
+            tuple(sorted({str(value) for value in field_values})),
+        )
+
+
+class CompiledQuery:
+    """Immutable, hashable and canonical form of a Query.
+
+    Conditions of each clause are deduplicated and sorted, as are their values, so
+    queries that only differ in order compile to equal objects. The JSON
+    encoding and its digest are computed once, which makes `as_dict` a lookup and
+    lets the digest serve as key for caches, checkpoints and deduplication.
+    Build it with `compile_query`, or with `CompiledQuery.from_conditions` to
+    skip the validation of pydantic models when generating many queries.
+    """
+
+    __slots__ = ("and_", "or_", "not_", "json", "digest", "_dict")
+
+    def __init__(
+        self,
+        and_: Iterable[CompiledCondition] = (),
+        or_: Iterable[CompiledCondition] = (),
+        not_: Iterable[CompiledCondition] = (),
+    ):
+        set_ = object.__setattr__
+        set_(self, "and_", tuple(sorted(set(and_))))
+        set_(self, "or_", tuple(sorted(set(or_))))
+        set_(self, "not_", tuple(sorted(set(not_))))
+        as_json = json.dumps(
+            {
+                "and": [c._asdict() for c in self.and_],
+                "or": [c._asdict() for c in self.or_],
+                "not": [c._asdict() for c in self.not_],
+            },
+            separators=(",", ":"),
+        )
+        set_(self, "json", as_json)
+        set_(self, "digest", hashlib.sha256(as_json.encode()).hexdigest())
+        set_(self, "_dict", json.loads(as_json))
+
+    @classmethod
+    def from_conditions(cls, and_=(), or_=(), not_=()) -> "CompiledQuery":
+        """Compiles (field_name, operation, field_values) tuples, e.g.
+        `CompiledQuery.from_conditions(and_=[("username", "IN", usernames)])`."""
+        return cls(
+            [CompiledCondition.create(*c) for c in and_],
+            [CompiledCondition.create(*c) for c in or_],
+            [CompiledCondition.create(*c) for c in not_],
+        )
+
+    def as_dict(self) -> dict:
+        """The API representation. The same dict is returned on every call, don't mutate it."""
+        return self._dict
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledQuery is immutable")
+
+    def __reduce__(self):
+        return CompiledQuery, (self.and_, self.or_, self.not_)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, CompiledQuery) and self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"CompiledQuery({self.json})"
+
+
+def compile_query(query: "Query | CompiledQuery | dict") -> CompiledQuery:
+    """Converts a Query, or its dictionary representation, to a CompiledQuery"""
+    if isinstance(query, CompiledQuery):
+        return query
+    if isinstance(query, dict):
+        clauses = {
+            clause: [
+                (c["field_name"], c["operation"], c["field_values"])
+                for c in query.get(clause, query.get(f"{clause}_", []))
+            ]
+            for clause in ("and", "or", "not")
+        }
+        return CompiledQuery.from_conditions(
+            and_=clauses["and"], or_=clauses["or"], not_=clauses["not"]
+        )
+    return CompiledQuery.from_conditions(
+        and_=[(c.field_name, c.operation, c.field_values) for c in query.and_],
+        or_=[(c.field_name, c.operation, c.field_values) for c in query.or_],
+        not_=[(c.field_name, c.operation, c.field_values) for c in query.not_],
+    )
@@ -0,0 +1,90 @@
+"""Splitting of queries with oversized `IN` lists into smaller sub-queries.
+
+Queries with thousands of hashtags, keywords or usernames in one `IN` condition
+are rejected by the API or produce extremely deep cursor chains. The planner
+cuts such lists into chunks. Every resulting sub-query matches a subset of the
+videos of the original query, and together they match all of them, so their
+results can be fetched independently and merged.
+"""
+
+from typing import Callable
+
+from .query_lang import (
+    CompiledCondition,
+    CompiledQuery,
+    Fields,
+    Operators,
+    compile_query,
+)
+
+
+def plan_sub_queries(query, max_values: int = 100) -> list[CompiledQuery]:
+    """Splits every `IN` condition of the `and` and `or` clauses that has more than
+    `max_values` values into chunks, one sub-query per combination of chunks.
+    Conditions in the `not` clause are never split, as excluding a list of values
+    is not the union of excluding its parts.
+
+    Parameters:
+    - query: A Query, its dictionary representation or a CompiledQuery.
+    - max_values: The maximum number of values per `IN` condition.
+
+    Returns:
+    - A list of CompiledQuery objects. A query without oversized conditions is
+      returned as the only element.
+    """
+    if max_values < 1:
+        raise ValueError("max_values must be at least 1")
+    return _split(compile_query(query), max_values)
+
+
+def _split(query: CompiledQuery, max_values: int) -> list[CompiledQuery]:
+    for clause in ("and_", "or_"):
+        conditions: tuple[CompiledCondition, ...] = getattr(query, clause)
+        for i, condition in enumerate(conditions):
+            values = condition.field_values
+            if condition.operation != Operators.isin or len(values) <= max_values:
+                continue
+            sub_queries = []
+            for start in range(0, len(values), max_values):
+                chunk = condition._replace(
+                    field_values=values[start : start + max_values]
+                )
+                clauses = {
+                    "and_": query.and_,
+                    "or_": query.or_,
+                    "not_": query.not_,
+                    clause: conditions[:i] + (chunk,) + conditions[i + 1 :],
+                }
+                sub_queries.extend(_split(CompiledQuery(**clauses), max_values))
+            return sub_queries
+    return [query]
+
+
+def _lower_set(values) -> set[str]:
+    return {str(value).lower() for value in values or []}
+
+
+_term_matchers: dict[Fields, Callable[[dict, tuple[str, ...]], list[str]]] = {
+    Fields.hashtag_name: lambda video, terms: [
+        term for term in terms if term.lower() in _lower_set(video.get("hashtag_names"))
+    ],
+    Fields.keyword: lambda video, terms: [
+        term
+        for term in terms
+        if term.lower() in str(video.get("video_description") or "").lower()
+    ],
+    Fields.username: lambda video, terms: [
+        term for term in terms if term == video.get("username")
+    ],
+}
+
+
+def matched_terms(video: dict, query: CompiledQuery) -> list[str]:
+    """The hashtags, keywords and usernames of the `and` and `or` clauses of a query
+    that a video matches, judged from the fields returned for the video."""
+    terms = []
+    for condition in query.and_ + query.or_:
+        matcher = _term_matchers.get(condition.field_name)
+        if matcher is not None:
+            terms.extend(matcher(video, condition.field_values))
+    return terms
@@ -0,0 +1,239 @@
+"""Accounting of the daily request quota of the Research API.
+
+Two opt-in mechanisms, both checked by `transport.post` before every request
+that goes out to the API (cache hits are free):
+
+- A `QuotaLedger` counts the requests per endpoint and UTC day in a SQLite
+  file that persists across runs. With daily limits per endpoint family, it
+  refuses requests once the quota of the day is used up.
+- A `RequestBudget` caps the number of requests of one job, e.g. to keep
+  quota for other jobs of the day.
+
+Either raises `BudgetExhausted`. `dump_videos_query` catches it and stops
+after the last checkpointed page, so the job continues on the next run.
+
+```
+from researchtikpy.quota import enable_quota_ledger, request_budget
+from researchtikpy.ratelimit import EndpointFamily
+
+ledger = enable_quota_ledger("rtk_quota.sqlite")
+with request_budget(200):
+    dump_videos_query(query, access_token, "20240101", "20241231", Path("videos.jsonl"))
+print(ledger.remaining(EndpointFamily.video_query))
+```
+
+The ledger only knows the requests sent by ResearchTikPy on this host. Requests
+made with the same credentials elsewhere are not counted.
+"""
+
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging import getLogger
+from pathlib import Path
+from typing import Iterator
+
+from .ratelimit import EndpointFamily, endpoint_family
+
+logger = getLogger(__name__)
+
+DEFAULT_DAILY_LIMITS = {family: 1000 for family in EndpointFamily}
+
+_quota_ledger = None
+_request_budget = None
+
+
+class BudgetExhausted(Exception):
+    """Raised instead of sending a request that would exceed a quota or budget."""
+
+
+def utc_day() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%d")
+
+
+class QuotaLedger:
+    """SQLite-backed count of the requests per endpoint and UTC day.
+
+    Params:
+        path (Path): The SQLite file, created if it does not exist.
+        daily_limits (dict): Requests per day per EndpointFamily, adjust them to the quota
+            of your project. Families missing from the dict are counted but not limited.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        daily_limits: dict[EndpointFamily, int] | None = None,
+    ):
+        self.path = Path(path)
+        self.daily_limits = (
+            dict(DEFAULT_DAILY_LIMITS) if daily_limits is None else daily_limits
+        )
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS requests (
+                day TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                family TEXT,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, endpoint)
+            )""")
+
+    def record(self, url: str) -> None:
+        """Counts a request to `url`. Raises BudgetExhausted, without counting it,
+        if the daily limit of its endpoint family is reached."""
+        endpoint = url.split("?", 1)[0]
+        family = endpoint_family(url)
+        limit = self.daily_limits.get(family)
+        day = utc_day()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")  # serializes all processes
+            try:
+                if limit is not None and self._used(day, family) >= limit:
+                    raise BudgetExhausted(
+                        f"Daily quota of {limit} {family} requests is used up for {day}"
+                    )
+                self._conn.execute(
+                    """INSERT INTO requests VALUES (?, ?, ?, 1)
+                    ON CONFLICT (day, endpoint) DO UPDATE SET count = count + 1""",
+                    (day, endpoint, None if family is None else str(family)),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _used(self, day: str, family: EndpointFamily | None) -> int:
+        if family is None:
+            query, params = "SELECT SUM(count) FROM requests WHERE day = ?", (day,)
+        else:
+            query = "SELECT SUM(count) FROM requests WHERE day = ? AND family = ?"
+            params = (day, str(family))
+        (used,) = self._conn.execute(query, params).fetchone()
+        return used or 0
+
+    def used(self, family: EndpointFamily | None = None, day: str | None = None) -> int:
+        """Requests of a family (all families if None) on a UTC day (today if None)."""
+        with self._lock:
+            return self._used(day or utc_day(), family)
+
+    def remaining(self, family: EndpointFamily, day: str | None = None) -> float:
+        """Requests left for a family on a UTC day, infinite if it is not limited."""
+        limit = self.daily_limits.get(family)
+        if limit is None:
+            return math.inf
+        return max(0, limit - self.used(family, day))
+
+    def usage(self) -> dict[str, dict[str, int]]:
+        """Requests per endpoint, per UTC day."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, endpoint, count FROM requests ORDER BY day, endpoint"
+            ).fetchall()
+        usage: dict[str, dict[str, int]] = {}
+        for day, endpoint, count in rows:
+            usage.setdefault(day, {})[endpoint] = count
+        return usage
+
+    def days_needed(self, n_requests: int, family: EndpointFamily) -> int:
+        """Number of UTC days, starting today, that `n_requests` requests of a family
+        take at the daily limit, counting the requests still left today."""
+        limit = self.daily_limits.get(family)
+        if limit is None:
+            return 1
+        left_today = self.remaining(family)
+        if n_requests <= left_today:
+            return 1
+        return 1 + math.ceil((n_requests - left_today) / limit)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RequestBudget:
+    """Thread-safe cap on the number of requests of a job.
+
+    Params:
+        max_requests (int): The number of requests the job may send.
+    """
+
+    def __init__(self, max_requests: int):
+        self.max_requests = max_requests
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return self.max_requests - self.spent
+
+    def spend(self) -> None:
+        with self._lock:
+            if self.spent >= self.max_requests:
+                raise BudgetExhausted(
+                    f"Request budget of {self.max_requests} requests is used up"
+                )
+            self.spent += 1
+
+    def refund(self) -> None:
+        """Gives back a request that was charged but not sent."""
+        with self._lock:
+            self.spent -= 1
+
+
+def estimate_requests(n_items: int, max_count: int = 100, n_chains: int = 1) -> int:
+    """Upper bound of the requests needed to page through `n_items` results that are
+    spread over `n_chains` cursor chains (e.g. date windows or sub-queries), at
+    `max_count` results per page. Combine with `QuotaLedger.days_needed` to plan
+    collections that take several days."""
+    return math.ceil(n_items / max_count) + n_chains
+
+
+def spend(url: str) -> None:
+    """Charges a request to `url` to the active request budget and quota ledger.
+    If either refuses, neither is charged."""
+    budget = _request_budget
+    if budget is not None:
+        budget.spend()
+    if _quota_ledger is not None:
+        try:
+            _quota_ledger.record(url)
+        except BaseException:
+            if budget is not None:
+                budget.refund()
+            raise
+
+
+def enable_quota_ledger(path: Path, **kwargs) -> QuotaLedger:
+    """Enables the quota ledger for all requests of this process.
+    Keyword arguments are passed on to `QuotaLedger`."""
+    global _quota_ledger
+    _quota_ledger = QuotaLedger(path, **kwargs)
+    return _quota_ledger
+
+
+def disable_quota_ledger() -> None:
+    global _quota_ledger
+    if _quota_ledger is not None:
+        _quota_ledger.close()
+    _quota_ledger = None
+
+
+def get_quota_ledger() -> QuotaLedger | None:
+    return _quota_ledger
+
+
+@contextmanager
+def request_budget(max_requests: int) -> Iterator[RequestBudget]:
+    """Caps the requests of this process, from all threads, within the block."""
+    global _request_budget
+    previous = _request_budget
+    _request_budget = RequestBudget(max_requests)
+    try:
+        yield _request_budget
+    finally:
+        _request_budget = previous
@@ -0,0 +1,195 @@
+"""Opt-in client-side rate limiting of Research API requests.
+
+Without a limiter, workers find the rate limit by running into 429 responses
+and backing off (see `researchtikpy.retry`). A token bucket per endpoint family
+instead spaces the requests of all threads just under the limit:
+
+```
+from researchtikpy.ratelimit import EndpointFamily, enable_rate_limiter
+
+enable_rate_limiter({EndpointFamily.video_query: 2.0, EndpointFamily.user: 5.0})
+```
+
+Rates are requests per second, `burst` is the number of requests that may be
+sent at once after a quiet period. With `path`, the buckets are kept in a
+SQLite file, so that several processes on one host share the same budget.
+Families without a rate are not limited.
+"""
+
+import sqlite3
+import threading
+import time
+from enum import StrEnum, auto
+from logging import getLogger
+from pathlib import Path
+
+from . import endpoints
+
+logger = getLogger(__name__)
+
+_rate_limiter = None
+
+
+class EndpointFamily(StrEnum):
+    video_query = auto()
+    user = auto()
+    comments = auto()
+    shop = auto()
+
+
+_families = {
+    endpoints.video_query: EndpointFamily.video_query,
+    endpoints.video_comments: EndpointFamily.comments,
+    endpoints.user_info: EndpointFamily.user,
+    endpoints.liked_videos: EndpointFamily.user,
+    endpoints.pinned_videos: EndpointFamily.user,
+    endpoints.followings: EndpointFamily.user,
+    endpoints.followers: EndpointFamily.user,
+    endpoints.shop: EndpointFamily.shop,
+    endpoints.product: EndpointFamily.shop,
+    endpoints.review: EndpointFamily.shop,
+}
+
+
+def endpoint_family(url: str) -> EndpointFamily | None:
+    """The family of an endpoint URL, which may include a query string."""
+    return _families.get(url.split("?", 1)[0])
+
+
+def _reserve(
+    tokens: float, updated_at: float, now: float, rate: float, capacity: float
+) -> tuple[float, float]:
+    """Refills the bucket and takes one token, going into debt if the bucket is
+    empty. Returns the new number of tokens and the seconds to wait until the
+    token is paid off."""
+    tokens = min(capacity, tokens + (now - updated_at) * rate) - 1
+    return tokens, max(0.0, -tokens / rate)
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Params:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens, i.e. the largest burst.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Blocks until a token is available. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = _reserve(
+                self._tokens, self._updated_at, now, self.rate, self.capacity
+            )
+            self._updated_at = now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SQLiteTokenBucket:
+    """Token bucket whose state is kept in a SQLite file and shared by all
+    processes that use the same file and name. See `TokenBucket` for the params."""
+
+    def __init__(self, path: Path, name: str, rate: float, capacity: float = 1):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.path = Path(path)
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("""CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+
+    def acquire(self) -> float:
+        """Blocks until a token is available. Returns the seconds waited."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # serializes all processes
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            tokens, updated_at = row if row is not None else (self.capacity, now)
+            tokens, wait = _reserve(tokens, updated_at, now, self.rate, self.capacity)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                (self.name, tokens, now),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """One token bucket per endpoint family.
+
+    Params:
+        rates (dict): Requests per second per EndpointFamily.
+        burst (int): Capacity of every bucket.
+        path (Path): Optional SQLite file to share the buckets between processes.
+    """
+
+    def __init__(
+        self,
+        rates: dict[EndpointFamily, float],
+        burst: int = 1,
+        path: Path | None = None,
+    ):
+        self.buckets: dict[EndpointFamily, TokenBucket | SQLiteTokenBucket] = {
+            family: (
+                TokenBucket(rate, burst)
+                if path is None
+                else SQLiteTokenBucket(path, str(family), rate, burst)
+            )
+            for family, rate in rates.items()
+        }
+
+    def acquire(self, url: str) -> None:
+        """Blocks until a request to `url` may be sent."""
+        bucket = self.buckets.get(endpoint_family(url))
+        if bucket is None:
+            return
+        wait = bucket.acquire()
+        if wait > 0:
+            logger.debug(f"Rate limiter delayed a request to {url} by {wait:.2f}s")
+
+
+def enable_rate_limiter(rates: dict[EndpointFamily, float], **kwargs) -> RateLimiter:
+    """Enables rate limiting for all requests of this process.
+    Keyword arguments are passed on to `RateLimiter`."""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rates, **kwargs)
+    return _rate_limiter
+
+
+def disable_rate_limiter() -> None:
+    global _rate_limiter
+    _rate_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    return _rate_limiter
@@ -0,0 +1,232 @@
+"""Retries of failed Research API requests.
+
+`transport.post` sends every request through `send_with_retries`. Failed
+responses are classified by the predicates below, and each class of errors has
+its own `RetryPolicy`: up to `max_attempts` retries, waiting a random time
+between zero and an exponentially growing backoff ("full jitter"). If the API
+says how long to wait, in a `Retry-After` or `X-RateLimit-Reset` header, that
+time is used instead. All retries of one request together are limited to
+`max_elapsed` seconds. Responses that are not retried, or that still fail once
+the budget is used up, are returned to the caller.
+
+```
+from researchtikpy.retry import ErrorClass, RetryConfig, RetryPolicy, set_retry_config
+
+set_retry_config(RetryConfig(policies={ErrorClass.rate_limit: RetryPolicy(max_attempts=20)}))
+```
+"""
+
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from enum import StrEnum, auto
+from logging import getLogger
+from typing import Callable
+
+import requests
+
+logger = getLogger(__name__)
+
+
+class ErrorClass(StrEnum):
+    rate_limit = auto()
+    backend_failure = auto()
+    search_id_not_found = auto()
+    server_error = auto()
+    connection_error = auto()
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how long to retry one class of errors.
+
+    Params:
+        max_attempts (int): Maximum number of retries after the first request.
+        base_delay (float): Backoff of the first retry in seconds, doubled for every further retry.
+        max_delay (float): Upper bound of the backoff in seconds.
+    """
+
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        """Random delay before retry number `attempt` (starting at 0)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+DEFAULT_POLICIES = {
+    ErrorClass.rate_limit: RetryPolicy(max_attempts=10, base_delay=2, max_delay=60),
+    ErrorClass.backend_failure: RetryPolicy(max_attempts=8, base_delay=1, max_delay=30),
+    ErrorClass.search_id_not_found: RetryPolicy(
+        max_attempts=5, base_delay=2, max_delay=20
+    ),
+    ErrorClass.server_error: RetryPolicy(max_attempts=5, base_delay=1, max_delay=30),
+    ErrorClass.connection_error: RetryPolicy(
+        max_attempts=5, base_delay=1, max_delay=30
+    ),
+}
+
+
+@dataclass
+class RetryConfig:
+    """Retry policies per error class. Classes without a policy are not retried,
+    `RetryConfig(policies={})` disables retries.
+
+    Params:
+        policies (dict): The RetryPolicy per ErrorClass.
+        max_elapsed (float): Maximum time in seconds spent on one request, including waits.
+    """
+
+    policies: dict[ErrorClass, RetryPolicy] = field(
+        default_factory=lambda: dict(DEFAULT_POLICIES)
+    )
+    max_elapsed: float = 15 * 60
+
+
+_retry_config = RetryConfig()
+
+
+def set_retry_config(config: RetryConfig) -> None:
+    """Sets the retry configuration for all requests of this process."""
+    global _retry_config
+    _retry_config = config
+
+
+def get_retry_config() -> RetryConfig:
+    return _retry_config
+
+
+def send_with_retries(
+    send: Callable[[], requests.Response], config: RetryConfig | None = None
+) -> requests.Response:
+    """Calls `send` until it returns a response that is not retried, or the retry
+    budget is used up. Connection errors are re-raised once the budget is used up."""
+    config = config or _retry_config
+    started = time.monotonic()
+    attempts = {error_class: 0 for error_class in ErrorClass}
+
+    while True:
+        try:
+            response = send()
+            error = None
+            error_class = classify(response)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            response = None
+            error = exc
+            error_class = ErrorClass.connection_error
+
+        policy = config.policies.get(error_class) if error_class else None
+        if policy is None or attempts[error_class] >= policy.max_attempts:
+            break
+        delay = retry_after(response)
+        if delay is None:
+            delay = policy.backoff(attempts[error_class])
+        if time.monotonic() - started + delay > config.max_elapsed:
+            logger.warning(
+                f"Retry budget of {config.max_elapsed}s exhausted, giving up"
+            )
+            break
+
+        attempts[error_class] += 1
+        logger.warning(
+            f"{error_class} ({_describe(response, error)}), "
+            f"retry {attempts[error_class]}/{policy.max_attempts} in {delay:.1f}s"
+        )
+        time.sleep(delay)
+
+    if error is not None:
+        raise error
+    return response
+
+
+def classify(response: requests.Response) -> ErrorClass | None:
+    """The class of a failed response, or None for successful and non-retryable ones."""
+    if response.status_code == 200:
+        return None
+    if not has_json(response):
+        return ErrorClass.server_error if response.status_code >= 500 else None
+    if rate_limit_exceeded(response):
+        return ErrorClass.rate_limit
+    if is_uninformative_backend_failure(response):
+        return ErrorClass.backend_failure
+    if search_id_was_not_found(response):
+        return ErrorClass.search_id_not_found
+    if response.status_code in {502, 503, 504}:
+        return ErrorClass.server_error
+    return None
+
+
+def retry_after(response: requests.Response | None) -> float | None:
+    """Seconds to wait as requested by the `Retry-After` header (seconds or HTTP date)
+    or the `X-RateLimit-Reset` header (seconds or epoch time), if present."""
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if isinstance(value, str):
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    value = headers.get("X-RateLimit-Reset")
+    if isinstance(value, str):
+        try:
+            reset = float(value)
+        except ValueError:
+            return None
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+
+def _describe(response: requests.Response | None, error: Exception | None) -> str:
+    if error is not None:
+        return repr(error)
+    return f"status_code={response.status_code} body={response.text[:200]}"
+
+
+def rate_limit_exceeded(response) -> bool:
+    """This is different from the daily quota limit."""
+    return (
+        response.status_code == 429
+        and _error_field(response, "code") == "rate_limit_exceeded"
+    )
+
+
+def is_uninformative_backend_failure(response) -> bool:
+    error_msg: str = json_error_message(response)
+    err_msgs = {
+        "Something is wrong. Please try again later.",
+        "Something went wrong. Please try again later.",
+        "Server Internal Error",
+        "Invalid count or cursor",
+    }
+    status_codes = {400, 500}
+    return response.status_code in status_codes and error_msg in err_msgs
+
+
+def search_id_was_not_found(response) -> bool:
+    pattern = r"Search Id \d+ is invalid or expired"
+    match = re.match(pattern, json_error_message(response))
+    return response.status_code == 400 and bool(match)
+
+
+def json_error_message(response) -> str:
+    return _error_field(response, "message")
+
+
+def _error_field(response, key: str) -> str:
+    payload = response.json()
+    error = payload.get("error") if isinstance(payload, dict) else None
+    value = error.get(key) if isinstance(error, dict) else None
+    return value if isinstance(value, str) else ""
+
+
+def has_json(response: requests.Response) -> bool:
+    try:
+        response.json()
+        return True
+    except requests.JSONDecodeError:
+        return False
@@ -1,7 +1,11 @@
+import json
+import os
+import threading
 from logging import getLogger
 from pathlib import Path
-import pandas as pd
+from typing import Iterable
 
+import pandas as pd
 
 logger = getLogger(__name__)
 
@@ -21,3 +25,44 @@ def append_df_to_file(
         df.to_csv(path, mode="a", header=not path.exists(), index=False)
     if not quiet:
         logger.info(f"Appended {len(df)} rows to '{path.absolute()}'")
+
+
+class RecordAccumulator:
+    """Collects the records of many API pages and builds a DataFrame from all of them
+    at once. Concatenating a DataFrame per page copies the rows collected so far on
+    every page, which takes time quadratic in the number of rows."""
+
+    def __init__(self):
+        self._records: list[dict] = []
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def extend(self, records: Iterable[dict], **columns) -> None:
+        """Adds records, setting the given columns (e.g. `username=...`) on each of them."""
+        if columns:
+            self._records.extend({**record, **columns} for record in records)
+        else:
+            self._records.extend(records)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self._records)
+
+
+def write_json_atomic(data: dict, path: Path) -> None:
+    """Writes `data` to `path` so that readers see either the old or the new file,
+    never a partially written one, even if the process dies mid-write."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,121 @@
+"""Random samples of the videos matching a query.
+
+With `is_random` set, the video query endpoint returns a random selection of
+the matching videos on every request instead of walking a cursor chain. This
+module draws such pages concurrently from all date windows of a range, keeps
+the videos whose id was not seen before, and stops once the requested sample
+size is reached. A window whose pages consist almost only of known videos is
+saturated, i.e. nearly all of its matching videos are already in the sample,
+and is not requested any further.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from typing import Iterator
+
+import pandas as pd
+
+from .date_windows import WindowSize, split_date_range
+from .get_query import iter_pages, window_query_body
+from .query_lang import CompiledQuery, Query, as_dict
+
+logger = getLogger(__name__)
+
+
+def sample_videos(
+    query: Query | CompiledQuery,
+    access_token: str,
+    start_date: str,
+    end_date: str,
+    n: int,
+    max_count: int = 100,
+    window_size: int = WindowSize.month,
+    max_workers: int = 4,
+    max_duplicate_rate: float = 0.9,
+    fields=None,
+) -> pd.DataFrame:
+    """Collects up to `n` distinct random videos matching a query.
+
+    The date windows are requested in turns, so every window that is not saturated
+    contributes pages at the same rate. The sample is therefore spread evenly over
+    the windows, not in proportion to the number of videos in each window.
+
+    Parameters:
+    - query: The query to post to the API.
+    - access_token: Your valid access token for the TikTok Research API.
+    - start_date: The start date for the search (format YYYYMMDD).
+    - end_date: The end date for the search (format YYYYMMDD).
+    - n: The number of distinct videos to collect.
+    - max_count: The maximum number of videos to return per request (up to 100).
+    - window_size: Days per date window (see `get_videos_query`).
+    - max_workers: Number of requests that run concurrently.
+    - max_duplicate_rate: A window is saturated once the share of already seen videos
+      in one of its pages reaches this rate.
+    - fields: Optional; the video fields to request (see `get_videos_query`).
+
+    Returns:
+    - A DataFrame with at most `n` videos. It is shorter if all windows are saturated
+      first. `df.attrs["sampling"]` holds the number of requests, the overall duplicate
+      rate and the number of saturated windows.
+    """
+    if not 0 < max_duplicate_rate <= 1:
+        raise ValueError("max_duplicate_rate must be in (0, 1]")
+    query_dict = as_dict(query)
+    windows = split_date_range(start_date, end_date, window_size)
+    active: deque[Iterator[dict]] = deque(
+        iter_pages(
+            window_query_body(query_dict, window, max_count) | {"is_random": True},
+            access_token,
+            fields=fields,
+        )
+        for window in windows
+    )
+    seen_ids = set()
+    sample: list[dict] = []
+    n_requests = n_received = n_saturated = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # at most one request per window is in flight, its pages are a generator
+        pending: dict[Future, Iterator[dict]] = {}
+
+        def submit_next() -> None:
+            while active and len(pending) < max_workers:
+                window_pages = active.popleft()
+                pending[pool.submit(next, window_pages, None)] = window_pages
+
+        submit_next()
+        while pending and len(sample) < n:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                window_pages = pending.pop(future)
+                data = future.result()
+                n_requests += 1
+                videos = [] if data is None else data["videos"]
+                n_new = 0
+                for video in videos:
+                    if video["id"] not in seen_ids:
+                        seen_ids.add(video["id"])
+                        sample.append(video)
+                        n_new += 1
+                n_received += len(videos)
+                duplicate_rate = 1 - n_new / len(videos) if videos else 1.0
+                if duplicate_rate < max_duplicate_rate:
+                    active.append(window_pages)
+                else:
+                    n_saturated += 1
+                    logger.info(
+                        f"Window saturated after {n_requests} requests "
+                        f"({duplicate_rate:.0%} duplicates in the last page)"
+                    )
+            if len(sample) < n:
+                submit_next()
+
+    logger.info(f"Sampled {min(len(sample), n)} videos with {n_requests} requests")
+    videos_df = pd.DataFrame(sample[:n])
+    videos_df.attrs["sampling"] = {
+        "requests": n_requests,
+        "duplicate_rate": 1 - len(sample) / n_received if n_received else 0.0,
+        "saturated_windows": n_saturated,
+    }
+    return videos_df
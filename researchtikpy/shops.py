@@ -8,15 +8,41 @@
 #     "limit": 10
 # }'
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from typing import Callable, Iterator
+
+import pandas as pd
 import requests
 
+from . import endpoints, transport
+from .quota import BudgetExhausted
+from .rtk_utilities import RecordAccumulator
+from .transport import pooled_session
+from .video_schema import apply_schema, integers, timestamps
+
+logger = getLogger(__name__)
+
+shop_fields = "shop_name,shop_rating,shop_review_count,item_sold_count,shop_id,shop_performance_value"
+product_fields = "product_id,product_sold_count,product_description,product_price,product_review_count,product_name,product_rating_1_count,product_rating_2_count,product_rating_3_count,product_rating_4_count,product_rating_5_count"
+review_fields = (
+    "product_name,review_text,display_name,review_like_count,create_time,review_rating"
+)
+
 
-def get_shop_info(shop_name: str, access_token: str) -> requests.Response:
-    fields = "shop_name,shop_rating,shop_review_count,item_sold_count,shop_id,shop_performance_value"
-    response = requests.post(
-        "https://open.tiktokapis.com/v2/research/tts/shop/",
-        headers={"Authorization": f"Bearer {access_token}"},
-        json={"shop_name": shop_name, "fields": fields, "limit": 10},
+def get_shop_info(
+    shop_name: str,
+    access_token: str,
+    session: requests.Session | None = None,
+    fields: str = shop_fields,
+    limit: int = 10,
+) -> requests.Response:
+    response = transport.post(
+        endpoints.shop,
+        access_token,
+        json={"shop_name": shop_name, "fields": fields, "limit": limit},
+        session=session,
     )
     return response
 
@@ -32,12 +58,24 @@ def get_shop_info(shop_name: str, access_token: str) -> requests.Response:
 # }'
 
 
-def get_product_info(shop_id: str, access_token: str) -> requests.Response:
-    fields = "product_id,product_sold_count,product_description,product_price,product_review_count,product_name,product_rating_1_count,product_rating_2_count,product_rating_3_count,product_rating_4_count,product_rating_5_count"
-    response = requests.post(
-        "https://open.tiktokapis.com/v2/research/tts/product/",
-        headers={"Authorization": f"Bearer {access_token}"},
-        json={"shop_id": shop_id, "fields": fields, "page_start": 1, "page_size": 10},
+def get_product_info(
+    shop_id: str,
+    access_token: str,
+    session: requests.Session | None = None,
+    fields: str = product_fields,
+    page_start: int = 1,
+    page_size: int = 10,
+) -> requests.Response:
+    response = transport.post(
+        endpoints.product,
+        access_token,
+        json={
+            "shop_id": shop_id,
+            "fields": fields,
+            "page_start": page_start,
+            "page_size": page_size,
+        },
+        session=session,
     )
     return response
 
@@ -53,21 +91,387 @@ def get_product_info(shop_id: str, access_token: str) -> requests.Response:
 # }'
 
 
-def get_product_reviews(product_id: str, access_token: str) -> requests.Response:
+def get_product_reviews(
+    product_id: str,
+    access_token: str,
+    session: requests.Session | None = None,
+    fields: str = "product_name",  # review_fields
+    page_start: int = 1,
+    page_size: int = 10,
+) -> requests.Response:
     """
     As of 2025-01-13, the documentation showed conflicting descriptions: https://developers.tiktok.com/doc/research-api-specs-query-tiktok-shop-reviews?enter_method=left_navigation
     Its unclear if one has to pass shop_id or product_id.
     """
-    fields = "product_name"  # ,review_text,display_name,review_like_count,create_time,review_rating"
-
-    response = requests.post(
-        "https://open.tiktokapis.com/v2/research/tts/review/",
-        headers={"Authorization": f"Bearer {access_token}"},
+    response = transport.post(
+        endpoints.review,
+        access_token,
         json={
             "product_id": product_id,
             "fields": fields,
-            "page_start": 1,
-            "page_size": 10,
+            "page_start": page_start,
+            "page_size": page_size,
         },
+        session=session,
     )
     return response
+
+
+# The product and review endpoints are paginated by page number instead of an
+# opaque cursor, so the pages of a shop or product can be requested concurrently.
+
+SHOP_SCHEMA = {
+    "shop_id": integers("Int64"),
+    "shop_name": lambda column: column.astype("string"),
+    "shop_rating": lambda column: pd.to_numeric(column, errors="coerce"),
+    "shop_review_count": integers("Int64"),
+    "item_sold_count": integers("Int64"),
+}
+
+PRODUCT_SCHEMA = {
+    "shop_id": integers("int64"),
+    "product_id": integers("Int64"),
+    "product_name": lambda column: column.astype("string"),
+    "product_description": lambda column: column.astype("string"),
+    "product_sold_count": integers("Int64"),
+    "product_review_count": integers("Int64"),
+    **{f"product_rating_{i}_count": integers("Int64") for i in range(1, 6)},
+}
+
+REVIEW_SCHEMA = {
+    "product_id": integers("int64"),
+    "product_name": lambda column: column.astype("string"),
+    "review_text": lambda column: column.astype("string"),
+    "display_name": lambda column: column.astype("string"),
+    "review_like_count": integers("Int64"),
+    "create_time": timestamps,
+    "review_rating": integers("Int8"),
+}
+
+
+def _page_records(response: requests.Response, key: str) -> list[dict]:
+    return response.json().get("data", {}).get(key) or []
+
+
+def _is_last_page(response: requests.Response, key: str, page_size: int) -> bool:
+    data = response.json().get("data", {})
+    if "has_more" in data:
+        return not data["has_more"]
+    return len(data.get(key) or []) < page_size
+
+
+def _iter_pages(
+    fetch_page: Callable[[int], requests.Response],
+    key: str,
+    page_size: int,
+    pool: ThreadPoolExecutor,
+    max_wave: int,
+    first_wave: int = 1,
+) -> Iterator[requests.Response]:
+    """Requests the numbered pages of one shop or product concurrently and yields the
+    responses in page order, up to the last page or the first failed response.
+    Pages are requested in waves, `first_wave` pages at first, then twice as many per
+    wave up to `max_wave`. The pages of a wave that lie beyond the last page are
+    requested in vain; growing the waves keeps them fewer than the useful pages."""
+    page, wave_size = 1, max(1, min(first_wave, max_wave))
+    while True:
+        futures = [pool.submit(fetch_page, p) for p in range(page, page + wave_size)]
+        try:
+            for future in futures:
+                response = future.result()
+                yield response
+                if response.status_code != 200 or _is_last_page(
+                    response, key, page_size
+                ):
+                    return
+        finally:
+            for future in futures:
+                future.cancel()
+        page += wave_size
+        wave_size = min(2 * wave_size, max_wave)
+
+
+def iter_product_pages(
+    shop_id: str,
+    access_token: str,
+    fields: str = product_fields,
+    page_size: int = 100,
+    max_workers: int = 4,
+    session: requests.Session | None = None,
+) -> Iterator[requests.Response]:
+    """Creates an iterator over the product pages of a shop, of which up to
+    `max_workers` are requested concurrently. Each element yielded is an http
+    response from the API. Iteration stops after the last page or at the first
+    response that is not successful."""
+    if session is None:
+        session = pooled_session(max_workers)
+
+    def fetch_page(page: int) -> requests.Response:
+        return get_product_info(shop_id, access_token, session, fields, page, page_size)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from _iter_pages(fetch_page, "products", page_size, pool, max_workers)
+
+
+def iter_review_pages(
+    product_id: str,
+    access_token: str,
+    fields: str = review_fields,
+    page_size: int = 100,
+    max_workers: int = 4,
+    session: requests.Session | None = None,
+    review_count: int | None = None,
+) -> Iterator[requests.Response]:
+    """Creates an iterator over the review pages of a product, like `iter_product_pages`.
+    With the `product_review_count` of the product as `review_count`, all of its
+    pages are requested in the first wave."""
+    if session is None:
+        session = pooled_session(max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from _iter_review_pages(
+            product_id,
+            access_token,
+            fields,
+            page_size,
+            session,
+            pool,
+            max_workers,
+            review_count,
+        )
+
+
+def _iter_review_pages(
+    product_id, access_token, fields, page_size, session, pool, max_wave, review_count
+) -> Iterator[requests.Response]:
+    def fetch_page(page: int) -> requests.Response:
+        return get_product_reviews(
+            product_id, access_token, session, fields, page, page_size
+        )
+
+    first_wave = 1 if review_count is None else _expected_pages(review_count, page_size)
+    return _iter_pages(fetch_page, "reviews", page_size, pool, max_wave, first_wave)
+
+
+def _expected_pages(n_records: int, page_size: int) -> int:
+    # a full last page does not tell that it is the last, so it takes one page more
+    return n_records // page_size + 1
+
+
+def _collect_pages(
+    pages: Iterator[requests.Response], key: str, stop: threading.Event
+) -> tuple[list[dict], bool]:
+    """The records of all pages, and whether the pages were collected completely."""
+    records = []
+    if stop.is_set():
+        return records, False
+    try:
+        for response in pages:
+            if response.status_code != 200:
+                return records, False
+            records.extend(_page_records(response, key))
+    except BudgetExhausted as e:
+        logger.warning(f"Stopping shop collection: {e}")
+        stop.set()
+        return records, False
+    return records, True
+
+
+def collect_shops(
+    shop_names: list[str],
+    access_token: str,
+    fields: str = shop_fields,
+    max_workers: int = 8,
+) -> pd.DataFrame:
+    """
+    Searches many shops by name concurrently.
+
+    Parameters:
+    - shop_names (list): Shop names to search for.
+    - access_token (str): Access token for TikTok's API.
+    - fields (str): Comma-separated string of fields to retrieve for each shop.
+    - max_workers (int): Number of shop names that are requested concurrently.
+
+    Returns:
+    - pd.DataFrame: The shops found, typed by `SHOP_SCHEMA`, with the `shop_name_query`
+      that found them. `df.attrs["failed_shop_names"]` lists the names whose request failed,
+      `df.attrs["incomplete_shop_names"]` those that were not requested because a request
+      budget or the daily quota ran out (see `researchtikpy.quota`).
+    """
+    session = pooled_session(max_workers)  # shared by all workers
+    stop = threading.Event()
+
+    def collect(shop_name):
+        if stop.is_set():
+            return None
+        try:
+            return get_shop_info(shop_name, access_token, session, fields)
+        except BudgetExhausted as e:
+            logger.warning(f"Stopping shop collection: {e}")
+            stop.set()
+            return None
+
+    shop_names = list(dict.fromkeys(shop_names))
+    all_shops = RecordAccumulator()
+    failed_shop_names = []
+    incomplete_shop_names = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for shop_name, response in zip(shop_names, pool.map(collect, shop_names)):
+            if response is None:
+                incomplete_shop_names.append(shop_name)
+                continue
+            if response.status_code != 200:
+                failed_shop_names.append(shop_name)
+                continue
+            all_shops.extend(
+                _page_records(response, "shops"), shop_name_query=shop_name
+            )
+
+    shops_df = apply_schema(all_shops.to_frame(), SHOP_SCHEMA)
+    shops_df.attrs["failed_shop_names"] = failed_shop_names
+    shops_df.attrs["incomplete_shop_names"] = incomplete_shop_names
+    return shops_df
+
+
+def collect_products(
+    shop_ids: list[str],
+    access_token: str,
+    fields: str = product_fields,
+    page_size: int = 100,
+    max_workers: int = 8,
+    pages_per_shop: int = 4,
+) -> pd.DataFrame:
+    """
+    Fetches all products of many shops, paging through every shop concurrently.
+
+    Parameters:
+    - shop_ids (list): Ids of the shops, e.g. the `shop_id` column of `collect_shops`.
+    - access_token (str): Access token for TikTok's API.
+    - fields (str): Comma-separated string of fields to retrieve for each product.
+    - page_size (int): Number of products per request.
+    - max_workers (int): Number of shops that are fetched concurrently.
+    - pages_per_shop (int): Maximum number of pages of one shop that are requested concurrently.
+
+    Returns:
+    - pd.DataFrame: The products with a `shop_id` column, typed by `PRODUCT_SCHEMA`.
+      `df.attrs["incomplete_shop_ids"]` lists the shops that were not completely fetched,
+      e.g. because a request budget or the daily quota ran out.
+    """
+    session = pooled_session(max_workers * pages_per_shop)  # shared by all workers
+    stop = threading.Event()
+
+    def collect(shop_id, pool):
+        def fetch_page(page: int) -> requests.Response:
+            return get_product_info(
+                shop_id, access_token, session, fields, page, page_size
+            )
+
+        pages = _iter_pages(fetch_page, "products", page_size, pool, pages_per_shop)
+        return _collect_pages(pages, "products", stop)
+
+    shop_ids = list(dict.fromkeys(shop_ids))
+    products_df, incomplete_shop_ids = _collect_items(
+        shop_ids, collect, "shop_id", max_workers, pages_per_shop
+    )
+    products_df = apply_schema(products_df, PRODUCT_SCHEMA)
+    products_df.attrs["incomplete_shop_ids"] = incomplete_shop_ids
+    return products_df
+
+
+def collect_product_reviews(
+    products_df: pd.DataFrame,
+    access_token: str,
+    fields: str = review_fields,
+    page_size: int = 100,
+    max_workers: int = 8,
+    pages_per_product: int = 4,
+) -> pd.DataFrame:
+    """
+    Fetches all reviews of many products, paging through every product concurrently.
+
+    If `products_df` has the `product_review_count` column of `collect_products`,
+    products without reviews are skipped, the known number of pages of a product is
+    requested at once and products are fetched in descending order of reviews, so
+    that the largest threads are collected first when a request budget or the daily
+    quota runs out (see `researchtikpy.quota`).
+
+    Parameters:
+    - products_df (pd.DataFrame): DataFrame with a column 'product_id' and optionally 'product_review_count'.
+    - access_token (str): Access token for TikTok's API.
+    - fields (str): Comma-separated string of fields to retrieve for each review.
+    - page_size (int): Number of reviews per request.
+    - max_workers (int): Number of products that are fetched concurrently.
+    - pages_per_product (int): Maximum number of pages of one product that are requested concurrently.
+
+    Returns:
+    - pd.DataFrame: The reviews with a `product_id` column, typed by `REVIEW_SCHEMA`. `df.attrs`
+      holds the ids of the products that were skipped (`skipped_product_ids`) and not
+      completely fetched (`incomplete_product_ids`).
+    """
+    products = products_df.drop_duplicates("product_id")
+    skipped_product_ids = []
+    if "product_review_count" in products.columns:
+        has_no_reviews = (
+            (products["product_review_count"] == 0).fillna(False).astype(bool)
+        )
+        skipped_product_ids = products.loc[has_no_reviews, "product_id"].tolist()
+        products = products[~has_no_reviews].sort_values(
+            "product_review_count", ascending=False, na_position="last", kind="stable"
+        )
+        review_counts = {
+            product_id: None if pd.isna(count) else int(count)
+            for product_id, count in zip(
+                products["product_id"].tolist(),
+                products["product_review_count"].tolist(),
+            )
+        }
+    else:
+        review_counts = dict.fromkeys(products["product_id"].tolist())
+
+    session = pooled_session(max_workers * pages_per_product)  # shared by all workers
+    stop = threading.Event()
+
+    def collect(product_id, pool):
+        pages = _iter_review_pages(
+            product_id,
+            access_token,
+            fields,
+            page_size,
+            session,
+            pool,
+            pages_per_product,
+            review_counts[product_id],
+        )
+        return _collect_pages(pages, "reviews", stop)
+
+    reviews_df, incomplete_product_ids = _collect_items(
+        list(review_counts), collect, "product_id", max_workers, pages_per_product
+    )
+    reviews_df = apply_schema(reviews_df, REVIEW_SCHEMA)
+    reviews_df.attrs["skipped_product_ids"] = skipped_product_ids
+    reviews_df.attrs["incomplete_product_ids"] = incomplete_product_ids
+    return reviews_df
+
+
+def _collect_items(
+    item_ids: list,
+    collect: Callable[[object, ThreadPoolExecutor], tuple[list[dict], bool]],
+    id_column: str,
+    max_workers: int,
+    pages_per_item: int,
+) -> tuple[pd.DataFrame, list]:
+    """Runs `collect` for every item on a pool of `max_workers` threads. The page
+    requests of all items share a second pool, so that waiting items never hold
+    the threads that their pages need."""
+    all_records = RecordAccumulator()
+    incomplete_ids = []
+    with (
+        ThreadPoolExecutor(max_workers=max_workers * pages_per_item) as page_pool,
+        ThreadPoolExecutor(max_workers=max_workers) as pool,
+    ):
+        # the pool starts the items in the order of submission, i.e. by priority
+        results = pool.map(lambda item_id: collect(item_id, page_pool), item_ids)
+        for item_id, (records, complete) in zip(item_ids, results):
+            all_records.extend(records, **{id_column: item_id})
+            if not complete:
+                incomplete_ids.append(item_id)
+    return all_records.to_frame(), incomplete_ids
@@ -0,0 +1,92 @@
+"""Thread-safe destinations for rows that collectors stream page by page.
+
+Concurrent collectors, e.g. `collect_liked_videos`, hand every page to a sink as
+soon as it arrives, so that large panels of accounts never have to fit into
+memory at once. A sink has a `write(df)` method that can be called from several
+threads.
+"""
+
+import threading
+from logging import getLogger
+from pathlib import Path
+
+import pandas as pd
+
+from .rtk_utilities import RecordAccumulator, append_df_to_file
+
+logger = getLogger(__name__)
+
+
+class JsonlSink:
+    """Appends rows to a JSONL file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def write(self, df: pd.DataFrame) -> None:
+        with self._lock:
+            append_df_to_file(df=df, path=self.path, jsonl=True, quiet=True)
+
+
+class ParquetSink:
+    """Writes every batch of rows as a part file into a directory, which
+    `pd.read_parquet(directory)` reads as one table. Requires `pyarrow`.
+
+    All part files must share one schema, as the reader takes the schema of the
+    first one. Every batch is converted to `schema`, adding missing columns as
+    nulls and dropping unknown ones. Without a schema, the collectors set the
+    schema of their fields (see `video_schema.video_arrow_schema`), and other
+    writers fix the schema of the first batch.
+    """
+
+    def __init__(self, directory: Path, schema=None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "ParquetSink requires pyarrow: pip install researchtikpy[arrow]"
+            ) from e
+        self.schema = schema
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._n_parts = len(list(self.directory.glob("part-*.parquet")))
+        self._lock = threading.Lock()
+
+    def write(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if df.empty:
+            return
+        with self._lock:
+            if self.schema is None:
+                self.schema = pa.Schema.from_pandas(
+                    df, preserve_index=False
+                ).remove_metadata()
+            schema = self.schema
+            path = self.directory / f"part-{self._n_parts:06d}.parquet"
+            self._n_parts += 1
+        missing = [name for name in schema.names if name not in df.columns]
+        df = df.assign(
+            **{name: pd.Series(None, index=df.index, dtype=object) for name in missing}
+        )
+        table = pa.Table.from_pandas(
+            df[schema.names], schema=schema, preserve_index=False
+        )
+        pq.write_table(table, path)
+
+
+class MemorySink:
+    """Keeps all rows in memory, `to_frame()` returns them as one DataFrame."""
+
+    def __init__(self):
+        self._records = RecordAccumulator()
+        self._lock = threading.Lock()
+
+    def write(self, df: pd.DataFrame) -> None:
+        with self._lock:
+            self._records.extend(df.to_dict("records"))
+
+    def to_frame(self) -> pd.DataFrame:
+        return self._records.to_frame()
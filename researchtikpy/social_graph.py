@@ -1,33 +1,36 @@
 """ResearchTikPy's functions for collecting TikTok's social graph.
 
 Note:
-    You might encounter a varying number of followers fetched per request. 
-    This is due to how TikTok's API handles pagination and possibly how it limits data per request.
-    As you approach the total limit of followers you want to fetch (total_count),
-    the API might return fewer followers per request,
-    especially if the remaining number to reach the total is less than your specified max_count.
-    This is normal behavior for APIs when handling paginated results close to the limit of a dataset.
-    It however unecessarily uses your daily quota faster than it should. Have to optimize that in the future. 
+    You might encounter a varying number of followers fetched per request.
+    This is due to how TikTok's API handles pagination and possibly how it limits data per request:
+    pages are often shorter than the requested `max_count`, even when more followers follow.
+    A short page is therefore no sign of the end of the list, only `has_more` is.
+    `get_followers` always requests full pages and trims the last one locally
+    instead of shrinking `max_count` towards `total_count`, which would spend a
+    request of the daily quota on every few followers.
 """
 
 import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from enum import StrEnum, auto
 from logging import getLogger
 from pathlib import Path
-from time import sleep
-from typing import Iterator, List, TypedDict
+from typing import Callable, Iterable, Iterator, List, TypedDict, TypeVar
 
 import pandas as pd
 import requests
 import tqdm
 
-from . import endpoints
-from .get_access_token import get_access_token_cached
-from .get_query import has_json
-from .rtk_utilities import append_df_to_file
+from . import endpoints, transport
+from .get_access_token import default_token_provider
+from .retry import has_json
+from .rtk_utilities import RecordAccumulator, append_df_to_file
+from .transport import pooled_session
 
 logger = getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class Username(TypedDict):
     display_name: str
@@ -40,72 +43,105 @@ class FollowDirection(StrEnum):
 
 
 def get_followers(
-    usernames_list, access_token, max_count=100, total_count=None, verbose=True
+    usernames_list,
+    access_token,
+    max_count=100,
+    total_count=None,
+    verbose=True,
+    max_workers=1,
 ):
     """
     Fetches followers for multiple users and compiles them into a single DataFrame. It is advised to keep the list of
-    usernames short to avoid longer runtimes.
+    usernames short to avoid longer runtimes, or to fetch several users concurrently with `max_workers`.
 
     Parameters:
     - usernames_list (list): List of usernames to fetch followers for.
     - access_token (str): Access token for TikTok's API.
     - max_count (int): Maximum number of followers to retrieve per request (default 100).
+      Every request asks for this many followers, also near `total_count`.
     - total_count (int): Maximum total number of followers to retrieve per user.
     - verbose (bool): If True, prints detailed logs; if False, suppresses most print statements.
+    - max_workers (int): Number of users whose followers are fetched concurrently (default 1).
 
     Returns:
-    - pd.DataFrame: DataFrame containing all followers from the provided usernames.
+    - pd.DataFrame: DataFrame containing all followers from the provided usernames, in the
+      order of `usernames_list`. `df.attrs["paging_stats"]` holds, per username, the number
+      of requests, the number of followers kept and the requests spent per follower.
     """
-    all_followers_df = pd.DataFrame()
-    session = requests.Session()  # Use session for improved performance
-
-    for username in usernames_list:
-        followers_list = []
-        cursor = 0  # Initialize cursor for pagination
-        has_more = True
-        retrieved_count = 0  # Track the count of retrieved followers
-        effective_max_count = max_count  # Reset max_count for each user
-
-        while has_more and (total_count is None or retrieved_count < total_count):
-            # Adjust max_count based on remaining followers needed
-            if total_count is not None:
-                effective_max_count = min(max_count, total_count - retrieved_count)
-
-            response = get_user_followers(
-                access_token, session, username, cursor, effective_max_count
-            )
+    session = pooled_session(max_workers)  # shared by all workers
 
-            if response.status_code == 200:
-                data = response.json().get("data", {})
-                followers = data.get("user_followers", [])
-                followers_list.extend(followers)
-                retrieved_count += len(followers)
-                has_more = data.get("has_more", False)
-                cursor = data.get(
-                    "cursor", cursor + effective_max_count
-                )  # Update cursor based on response
-                if verbose:
-                    print(
-                        f"Retrieved {len(followers)} followers for user {username} (total retrieved: {retrieved_count})"
-                    )
-            elif response.status_code == 429:
-                if verbose:
-                    print(
-                        f"Rate limit exceeded fetching followers for user {username}. Pausing before retrying..."
-                    )
-        if followers_list:
-            followers_df = pd.DataFrame(followers_list)
-            followers_df["target_account"] = (
-                username  # Identify the account these followers belong to
-            )
-            all_followers_df = pd.concat(
-                [all_followers_df, followers_df], ignore_index=True
-            )
+    def collect(username):
+        return _collect_followers(
+            access_token, session, username, max_count, total_count, verbose
+        )
 
+    followers = RecordAccumulator()
+    paging_stats = {}
+    for username, (followers_list, n_requests) in zip(
+        usernames_list, _map_users(collect, usernames_list, max_workers)
+    ):
+        paging_stats[username] = {
+            "requests": n_requests,
+            "rows": len(followers_list),
+            "requests_per_row": (
+                n_requests / len(followers_list) if followers_list else None
+            ),
+        }
+        # Identify the account these followers belong to
+        followers.extend(followers_list, target_account=username)
+
+    all_followers_df = followers.to_frame()
+    all_followers_df.attrs["paging_stats"] = paging_stats
     return all_followers_df
 
 
-def get_following(usernames_list, access_token, max_count=100, verbose=True):
+def _collect_followers(
+    access_token: str,
+    session: requests.Session,
+    username: str,
+    max_count: int,
+    total_count: int | None,
+    verbose: bool,
+) -> tuple[list[dict], int]:
+    """Pages through the followers of one user. Returns them and the number of requests."""
+    followers_list = []
+    cursor = 0  # Initialize cursor for pagination
+    has_more = True
+    n_requests = 0
+
+    # Short pages do not mean that the list is about to end, keep going while has_more
+    while has_more and (total_count is None or len(followers_list) < total_count):
+        response = get_user_followers(
+            access_token, session, username, cursor, max_count
+        )
+        n_requests += 1
+
+        if response.status_code == 200:
+            data = response.json().get("data", {})
+            followers = data.get("user_followers", [])
+            followers_list.extend(followers)
+            has_more = data.get("has_more", False)
+            cursor = data.get(
+                "cursor", cursor + max_count
+            )  # Update cursor based on response
+            if verbose:
+                print(
+                    f"Retrieved {len(followers)} followers for user {username} (total retrieved: {len(followers_list)})"
+                )
+        else:  # rate limits and backend failures were already retried by transport.post
+            if verbose:
+                print(
+                    f"Error fetching followers for user {username}: {response.status_code}",
+                    response.text,
+                )
+            break  # Stop the loop for the current user
+
+    return followers_list[:total_count], n_requests  # trim the last page locally
+
+
+def get_following(
+    usernames_list, access_token, max_count=100, verbose=True, max_workers=1
+):
     """
     Fetches accounts that a user follows. Each username in the list is used to fetch accounts they follow.
 
@@ -114,69 +150,71 @@ def get_following(usernames_list, access_token, max_count=100, verbose=True):
     - access_token (str): Access token for TikTok's API.
     - max_count (int): Maximum number of followed accounts to retrieve per request (default 100).
     - verbose (bool): If True, prints detailed logs; if False, suppresses most print statements.
+    - max_workers (int): Number of users whose followed accounts are fetched concurrently (default 1).
 
     Returns:
-    - pd.DataFrame: DataFrame containing all followed accounts from the provided usernames.
+    - pd.DataFrame: DataFrame containing all followed accounts from the provided usernames,
+      in the order of `usernames_list`.
     """
-    all_following_df = pd.DataFrame()
-    session = requests.Session()  # Use session for improved performance
-
-    for username in usernames_list:
-        following_list = []
-        cursor = 0  # Initialize cursor for pagination
-        has_more = True
-
-        while has_more:
-            endpoint = "https://open.tiktokapis.com/v2/research/user/following/"
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-            }
-            query_body = {
-                "username": username,
-                "max_count": max_count,
-                "cursor": cursor,
-            }
-
-            response = session.post(endpoint, headers=headers, json=query_body)
-
-            if response.status_code == 200:
-                data = response.json().get("data", {})
-                following = data.get("user_following", [])
-                following_list.extend(following)
-                has_more = data.get("has_more", False)
-                cursor = data.get(
-                    "cursor", cursor + max_count
-                )  # Update cursor based on response
-                if verbose:
-                    print(f"Retrieved {len(following)} accounts for user {username}")
-            elif response.status_code == 429:
-                if verbose:
-                    print(
-                        f"Rate limit exceeded fetching following for user {username}. Pausing before retrying..."
-                    )
-                sleep(
-                    60
-                )  # Adjust sleep time based on the API's rate limit reset window
-                continue  # Continue to the next iteration without breaking the loop
-            else:
-                if verbose:
-                    print(
-                        f"Error fetching followers for user {username}: {response.status_code}",
-                        response.json(),
-                    )
-                break  # Stop the loop for the current user
-
-        if following_list:
-            following_df = pd.DataFrame(following_list)
-            following_df["target_account"] = (
-                username  # Identify the account these followers belong to
-            )
-            all_following_df = pd.concat(
-                [all_following_df, following_df], ignore_index=True
-            )
+    session = pooled_session(max_workers)  # shared by all workers
+
+    def collect(username):
+        return _collect_following(access_token, session, username, max_count, verbose)
 
-    return all_following_df
+    following = RecordAccumulator()
+    for username, following_list in zip(
+        usernames_list, _map_users(collect, usernames_list, max_workers)
+    ):
+        # Identify the account these followings belong to
+        following.extend(following_list, target_account=username)
+
+    return following.to_frame()
+
+
+def _collect_following(
+    access_token: str,
+    session: requests.Session,
+    username: str,
+    max_count: int,
+    verbose: bool,
+) -> list[dict]:
+    """Pages through the accounts that one user follows."""
+    following_list = []
+    cursor = 0  # Initialize cursor for pagination
+    has_more = True
+
+    while has_more:
+        response = get_user_following(
+            access_token, session, username, cursor, max_count
+        )
+
+        if response.status_code == 200:
+            data = response.json().get("data", {})
+            following = data.get("user_following", [])
+            following_list.extend(following)
+            has_more = data.get("has_more", False)
+            cursor = data.get(
+                "cursor", cursor + max_count
+            )  # Update cursor based on response
+            if verbose:
+                print(f"Retrieved {len(following)} accounts for user {username}")
+        else:  # rate limits and backend failures were already retried by transport.post
+            if verbose:
+                print(
+                    f"Error fetching followers for user {username}: {response.status_code}",
+                    response.json(),
+                )
+            break  # Stop the loop for the current user
+
+    return following_list
+
+
+def _map_users(
+    func: Callable[[str], T], usernames: Iterable[str], max_workers: int
+) -> Iterator[T]:
+    """Applies `func` to every username on a thread pool, yielding the results in order."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(func, usernames)
 
 
 def get_user_followers(
@@ -254,19 +292,20 @@ def get_user_response(
         f"Calling get_{ mode } endpoint for {username}, cursor={cursor} (equivalent to {date_str}), max_count={max_count}"
     )
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-
     query_body = {"username": username, "max_count": max_count, "cursor": cursor}
-    return session.post(endpoint, headers=headers, json=query_body)
+    return transport.post(endpoint, access_token, json=query_body, session=session)
 
 
 def to_date_str(x: int) -> str:
     return datetime.datetime.fromtimestamp(x).strftime("%Y-%m-%d %H:%M:%S")
 
 
+_user_list_keys = {
+    FollowDirection.FOLLOWER: "user_followers",
+    FollowDirection.FOLLOWING: "user_following",
+}
+
+
 def extract_followers(response: requests.Response) -> list[Username]:
     return _extract_user_list(response, "user_followers")
 
@@ -280,7 +319,10 @@ def _extract_user_list(reponse: requests.Response, key: str) -> List[Username]:
 
 
 def iter_user_responses(
-    mode: FollowDirection, access_token: str, username: str
+    mode: FollowDirection,
+    access_token: str,
+    username: str,
+    session: requests.Session | None = None,
 ) -> Iterator[requests.Response]:
     """Creates an iterator that uses the cursor-based pagination to request all followers sequentially.
     Each element yielded is an http response from the API.
@@ -289,11 +331,13 @@ def iter_user_responses(
         mode (Literat["following", "follower"]): The direction of the social graph to fetch.
         access_token (str): The access token for the TikTok API.
         username (str): The username to fetch the social graph for.
+        session (requests.Session): Optional session to share pooled connections with other calls.
 
     Returns:
         Iterator[requests.Response]: An iterator that yields http responses from the API.
     """
-    session = requests.Session()
+    if session is None:
+        session = requests.Session()
     cursor = 0
     max_count = 100
     while True:
@@ -368,7 +412,7 @@ def is_response_ok(response: requests.Response) -> bool:
 
 
 def is_ok_but_empty(response: requests.Response, direction: FollowDirection) -> bool:
-    key = f"user_{direction}s"
+    key = _user_list_keys[direction]
     is_ok: bool = is_response_ok(response)
 
     return is_ok and key not in response.json()["data"]
@@ -382,7 +426,9 @@ def construct_dataframe(
 
     if ok and not is_ok_but_empty(response, mode):
         data["error"] = ""
-        user_connections: list[Username] = _extract_user_list(mode, response)
+        user_connections: list[Username] = _extract_user_list(
+            response, _user_list_keys[mode]
+        )
         fdf = pd.DataFrame(user_connections)
         new_colnames = {
             "username": f"{mode}_username",
@@ -399,8 +445,14 @@ def construct_dataframe(
 
 
 def dump_users_connections(
-    mode: FollowDirection, usernames: pd.Series, tgt_jsonl: Path
+    mode: FollowDirection, usernames: pd.Series, tgt_jsonl: Path, max_workers: int = 1
 ):
+    """Appends the followers or followings of every user to a JSONL file, one row per
+    account with the user in the `username` and `target_account` columns. Users that
+    are already in the file are skipped. With `max_workers` > 1, the cursor chains of
+    several users run concurrently on a shared session. The rows of a user are written
+    together once the user is finished, so an interrupted run never leaves a user
+    half written."""
     if tgt_jsonl.exists():
         done_usernames = pd.read_json(tgt_jsonl, lines=True)["username"].unique()
 
@@ -408,18 +460,36 @@ def dump_users_connections(
 
         usernames = usernames[~usernames.isin(done_usernames)]
 
-    for username in tqdm.tqdm(usernames):
-        for response in iter_user_responses(
-            mode=mode, access_token=get_access_token_cached(), username=username
-        ):
-            df = construct_dataframe(mode, response)
-            df = df.assign(username=username)
-            append_df_to_file(df=df, path=tgt_jsonl, jsonl=True)
+    session = pooled_session(max_workers)  # shared by all workers
+    # transport.post resolves the token per request and refreshes it after a 401
+    access_token = default_token_provider()
+
+    def collect(username: str) -> pd.DataFrame:
+        frames = [
+            construct_dataframe(mode, response)
+            for response in iter_user_responses(
+                mode=mode,
+                access_token=access_token,
+                username=username,
+                session=session,
+            )
+        ]
+        return pd.concat(frames, ignore_index=True).assign(
+            username=username, target_account=username
+        )
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [pool.submit(collect, username) for username in usernames]
+        for future in tqdm.tqdm(as_completed(futures), total=len(futures)):
+            append_df_to_file(df=future.result(), path=tgt_jsonl, jsonl=True)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
-def dump_users_following(usernames: pd.Series, tgt_jsonl: Path):
-    dump_users_connections(FollowDirection.FOLLOWING, usernames, tgt_jsonl)
+def dump_users_following(usernames: pd.Series, tgt_jsonl: Path, max_workers: int = 1):
+    dump_users_connections(FollowDirection.FOLLOWING, usernames, tgt_jsonl, max_workers)
 
 
-def dump_users_follower(usernames: pd.Series, tgt_jsonl: Path):
-    dump_users_connections(FollowDirection.FOLLOWER, usernames, tgt_jsonl)
+def dump_users_follower(usernames: pd.Series, tgt_jsonl: Path, max_workers: int = 1):
+    dump_users_connections(FollowDirection.FOLLOWER, usernames, tgt_jsonl, max_workers)
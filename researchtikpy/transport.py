@@ -0,0 +1,81 @@
+"""The single place where ResearchTikPy sends requests to the Research API.
+
+Every endpoint function builds its URL and JSON body and hands them to `post`,
+which takes care of the concerns shared by all endpoints: serving responses
+from the optional response cache (see `researchtikpy.cache`), charging the
+optional quota ledger and request budget (see `researchtikpy.quota`), waiting
+for the optional rate limiter (see `researchtikpy.ratelimit`), retrying
+failed requests (see `researchtikpy.retry`) and refreshing the access token of
+an `AccessTokenProvider` when the API rejects it.
+"""
+
+from logging import getLogger
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import quota
+from .cache import get_response_cache
+from .get_access_token import AccessToken, AccessTokenProvider, resolve_token
+from .ratelimit import get_rate_limiter
+from .retry import send_with_retries
+
+logger = getLogger(__name__)
+
+
+def pooled_session(pool_size: int = 10) -> requests.Session:
+    """A session whose connection pool fits `pool_size` concurrent requests,
+    for sharing between the workers of a thread pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
+
+
+def post(
+    url: str,
+    access_token: AccessToken,
+    json: dict,
+    params: dict | None = None,
+    session: requests.Session | None = None,
+) -> requests.Response:
+    """Posts `json` to a Research API endpoint.
+
+    Params:
+        url (str): The endpoint URL, optionally including the `fields` query string.
+        access_token (str | AccessTokenProvider): The access token for the TikTok API,
+            or a provider that supplies a fresh one. With a provider, a request that
+            fails with 401 is sent once more with a new token.
+        json (dict): The request body.
+        params (dict): Optional query string parameters.
+        session (requests.Session): Optional session to reuse pooled connections.
+    """
+    cache = get_response_cache()
+    if cache is not None and cache.is_cacheable(json):
+        cached = cache.get(url, json, params)
+        if cached is not None:
+            return cached
+
+    token = resolve_token(access_token)
+    http = requests if session is None else session
+
+    def send() -> requests.Response:
+        quota.spend(url)
+        rate_limiter = get_rate_limiter()
+        if rate_limiter is not None:
+            rate_limiter.acquire(url)
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        return http.post(url, headers=headers, json=json, params=params)
+
+    response = send_with_retries(send)
+    if response.status_code == 401 and isinstance(access_token, AccessTokenProvider):
+        logger.info("The API rejected the access token, retrying with a fresh one.")
+        token = access_token.refresh(stale_token=token)
+        response = send_with_retries(send)
+
+    if cache is not None and cache.is_cacheable(json):
+        cache.put(url, json, params, response)
+    return response
@@ -0,0 +1,131 @@
+"""Typed, memory-compact DataFrames of collected videos.
+
+`pd.DataFrame(videos)` stores most video fields as Python objects: counts as
+ints inside object or float columns, `create_time` as a raw epoch and hashtags
+as Python lists. `to_video_frame` converts each known field to an explicit
+dtype instead:
+
+- ids and counts as (nullable) integers,
+- `create_time` as a timezone-aware datetime,
+- `region_code` and `username` as categoricals,
+- texts as pandas strings,
+- `hashtag_names` and `effect_ids` as Arrow list columns if `pyarrow` is
+  installed (`pip install researchtikpy[arrow]`), otherwise as lists.
+
+Columns that are not video fields, e.g. `matched_terms`, are left unchanged.
+"""
+
+from logging import getLogger
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from .query_lang import VideoFields, video_fields_param
+
+logger = getLogger(__name__)
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional dependency
+    pa = None
+
+
+_max_exact_float = 2**53  # larger integers are not all representable as float64
+
+
+def integers(dtype: str) -> Callable[[pd.Series], pd.Series]:
+    """Converter of a column to the integer `dtype`, e.g. "Int64" for nullable integers."""
+
+    def convert(column: pd.Series) -> pd.Series:
+        numbers = pd.to_numeric(column)
+        if column.dtype == object and numbers.dtype.kind == "f":
+            if numbers.abs().max() > _max_exact_float:
+                # float64 would round the 64-bit ids of the column, Python ints keep them exact
+                values = [
+                    None if _is_missing(value) else int(value) for value in column
+                ]
+                return pd.Series(pd.array(values, dtype=dtype), index=column.index)
+        return numbers.astype(dtype)
+
+    return convert
+
+
+def _is_missing(value) -> bool:
+    return value is None or (not isinstance(value, (list, str)) and pd.isna(value))
+
+
+def timestamps(column: pd.Series) -> pd.Series:
+    """Converts a column of epoch seconds to timezone-aware UTC datetimes."""
+    return pd.to_datetime(pd.to_numeric(column, errors="coerce"), unit="s", utc=True)
+
+
+def _string_lists(column: pd.Series) -> pd.Series:
+    values = [
+        [str(item) for item in value] if isinstance(value, list) else None
+        for value in column
+    ]
+    if pa is None:
+        return pd.Series(values, index=column.index, dtype=object)
+    dtype = pd.ArrowDtype(pa.list_(pa.string()))
+    return pd.Series(values, index=column.index, dtype=dtype)
+
+
+VIDEO_SCHEMA: dict[VideoFields, Callable[[pd.Series], pd.Series]] = {
+    VideoFields.id: integers("int64"),
+    VideoFields.video_description: lambda column: column.astype("string"),
+    VideoFields.create_time: timestamps,
+    VideoFields.region_code: lambda column: column.astype("category"),
+    VideoFields.share_count: integers("UInt32"),
+    VideoFields.view_count: integers("Int64"),
+    VideoFields.like_count: integers("Int64"),
+    VideoFields.comment_count: integers("UInt32"),
+    VideoFields.music_id: integers("Int64"),
+    VideoFields.hashtag_names: _string_lists,
+    VideoFields.username: lambda column: column.astype("category"),
+    VideoFields.effect_ids: _string_lists,
+    VideoFields.playlist_id: integers("Int64"),
+    VideoFields.voice_to_text: lambda column: column.astype("string"),
+}
+
+
+def to_video_frame(videos: Iterable[dict] | pd.DataFrame) -> pd.DataFrame:
+    """Builds a DataFrame with the dtypes of `VIDEO_SCHEMA` from video records,
+    or converts a DataFrame returned by one of the video query functions."""
+    return apply_schema(videos, VIDEO_SCHEMA)
+
+
+def apply_schema(
+    records: Iterable[dict] | pd.DataFrame,
+    schema: dict[str, Callable[[pd.Series], pd.Series]],
+) -> pd.DataFrame:
+    """Builds a DataFrame from records, or copies one, converting the columns of `schema`."""
+    if isinstance(records, pd.DataFrame):
+        df = records.copy()
+    else:
+        df = pd.DataFrame(list(records), dtype=object)
+    for column, convert in schema.items():
+        if column in df.columns:
+            df[column] = convert(df[column])
+    return df.infer_objects()
+
+
+def video_arrow_schema(fields=None, **columns) -> "pa.Schema":
+    """Arrow schema of raw video records with the given fields (all by default),
+    followed by the extra `columns`, e.g. `source_username=pa.string()`.
+    Part files written with the same schema can be read back as one table."""
+    if pa is None:
+        raise ImportError(
+            "video_arrow_schema requires pyarrow: pip install researchtikpy[arrow]"
+        )
+    types = {
+        VideoFields.video_description: pa.string(),
+        VideoFields.region_code: pa.string(),
+        VideoFields.hashtag_names: pa.list_(pa.string()),
+        VideoFields.username: pa.string(),
+        VideoFields.effect_ids: pa.list_(pa.string()),
+        VideoFields.voice_to_text: pa.string(),
+    }
+    names = video_fields_param(fields).split(",")
+    return pa.schema(
+        [(name, types.get(name, pa.int64())) for name in names] + list(columns.items())
+    )
@@ -0,0 +1,147 @@
+"""Watermarks for incremental, "only new since last run" video collection.
+
+A watermark remembers, per query, the contiguous range of days for which all
+videos were collected and the latest `create_time` seen. Daily refresh jobs
+that pass `since_last_run=True` to `get_videos_query` or `get_videos_hashtag`
+then only request the days after the watermark instead of the whole history
+again. A range that starts before the watermark, or leaves a gap after it, is
+requested in full, so that no day is ever skipped.
+"""
+
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from pathlib import Path
+from typing import Iterable
+
+from .checkpoint import checkpoint_key
+from .date_windows import format_date, parse_date
+from .query_lang import compile_query, video_fields_param
+from .rtk_utilities import read_json, write_json_atomic
+
+logger = getLogger(__name__)
+
+DEFAULT_WATERMARK_DIR = Path.home() / ".researchtikpy" / "watermarks"
+
+
+@dataclass
+class Watermark:
+    """Collection progress of one query over past runs.
+
+    Args
+    ----
+    key: str
+        Hash of the query and the requested fields, see `watermark_key`
+    start_date: str
+        First date (YYYYMMDD) of the days whose videos were all collected
+    end_date: str
+        Last date (YYYYMMDD) of the days whose videos were all collected
+    latest_create_time: int | None
+        Largest `create_time` (epoch seconds) of the collected videos
+    updated_at: float
+        Time of the last update, in epoch seconds
+    """
+
+    key: str
+    start_date: str
+    end_date: str
+    latest_create_time: int | None = None
+    updated_at: float = 0.0
+
+
+def watermark_key(query, fields=None) -> str:
+    """Key of the canonical form of a query. Runs requesting other fields get
+    their own watermark, as they did not collect the same data."""
+    return checkpoint_key(
+        query=compile_query(query).digest, fields=video_fields_param(fields)
+    )
+
+
+class WatermarkStore:
+    """Directory of watermark files, one JSON file per query key."""
+
+    def __init__(self, directory: Path = DEFAULT_WATERMARK_DIR):
+        self.directory = Path(directory)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> Watermark | None:
+        data = read_json(self.path(key))
+        if data is None:
+            return None
+        data.setdefault(
+            "start_date", data["end_date"]
+        )  # written before ranges were kept
+        return Watermark(**data)
+
+    def save(self, watermark: Watermark) -> None:
+        write_json_atomic(asdict(watermark), self.path(watermark.key))
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def missing_range(
+        self, key: str, start_date: str, end_date: str
+    ) -> tuple[str, str] | None:
+        """Narrows the range between start_date and end_date to the days after the
+        watermark, if it starts within or right after the watermark's range.
+        Returns None if there is nothing left to collect."""
+        watermark = self.load(key)
+        if watermark is None or not (
+            watermark.start_date <= start_date <= _next_day(watermark.end_date)
+        ):
+            return start_date, end_date
+        if watermark.end_date >= end_date:
+            logger.info(f"Already collected up to {watermark.end_date}, nothing to do")
+            return None
+        next_day = _next_day(watermark.end_date)
+        logger.info(
+            f"Already collected up to {watermark.end_date}, starting at {next_day}"
+        )
+        return next_day, end_date
+
+    def advance(
+        self, key: str, start_date: str, end_date: str, videos: Iterable[dict]
+    ) -> Watermark | None:
+        """Records that all videos from `start_date` to `end_date` were collected.
+        The range is joined with the watermark's range if they overlap or touch.
+        Otherwise, the later of the two ranges is kept, as the days between them
+        were not collected. Pass an `end_date` clamped by `completed_end_date`.
+        Returns None, without recording anything, if the range is empty."""
+        if end_date < start_date:
+            return None
+        watermark = self.load(key)
+        if watermark is None:
+            watermark = Watermark(key=key, start_date=start_date, end_date=end_date)
+        elif start_date <= _next_day(
+            watermark.end_date
+        ) and watermark.start_date <= _next_day(end_date):
+            watermark.start_date = min(watermark.start_date, start_date)
+            watermark.end_date = max(watermark.end_date, end_date)
+        elif end_date > watermark.end_date:
+            watermark.start_date, watermark.end_date = start_date, end_date
+        create_times = [
+            video["create_time"]
+            for video in videos
+            if video.get("create_time") is not None
+        ]
+        if create_times:
+            watermark.latest_create_time = max(
+                [*create_times, watermark.latest_create_time or 0]
+            )
+        watermark.updated_at = time.time()
+        self.save(watermark)
+        return watermark
+
+
+def _next_day(date: str) -> str:
+    return format_date(parse_date(date) + timedelta(days=1))
+
+
+def completed_end_date(end_date: str) -> str:
+    """`end_date`, but at most yesterday in UTC. Videos can still be posted on the
+    current day, so it must not be recorded as collected."""
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    return min(end_date, format_date(yesterday))
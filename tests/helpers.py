@@ -1,8 +1,9 @@
+import json
+import os
 from functools import cache
-from researchtikpy import get_access_token
-
+from unittest.mock import Mock
 
-import os
+from researchtikpy import get_access_token
 
 
 @cache
@@ -11,4 +12,20 @@ def access_token() -> str:
         client_key=os.environ["TIKTOK_CLIENT_KEY"],
         client_secret=os.environ["TIKTOK_CLIENT_SECRET"],
     )
-    return data["access_token"]
\ No newline at end of file
+    return data["access_token"]
+
+
+def fake_response(payload: dict, status_code: int = 200) -> Mock:
+    """A stand-in for `requests.Response` carrying a JSON payload."""
+    response = Mock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = json.dumps(payload)
+    response.headers = {}
+    return response
+
+
+def fake_videos_page(ids: list, has_more: bool = False, cursor: int = 0) -> Mock:
+    videos = [{"id": video_id} for video_id in ids]
+    data = {"videos": videos, "has_more": has_more, "cursor": cursor, "search_id": "1"}
+    return fake_response({"data": data, "error": {"code": "ok", "message": ""}})
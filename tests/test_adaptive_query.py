@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch
+
+from researchtikpy.adaptive_query import get_videos_query_adaptive
+from researchtikpy.date_windows import DateWindow
+from tests.helpers import fake_videos_page
+
+
+class TestDateWindowHalves(unittest.TestCase):
+    def test_halves(self):
+        self.assertEqual(
+            DateWindow("20240101", "20240105").halves(),
+            (DateWindow("20240101", "20240102"), DateWindow("20240103", "20240105")),
+        )
+        with self.assertRaises(ValueError):
+            DateWindow("20240101", "20240101").halves()
+
+
+class TestAdaptiveQuery(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_dense_window_is_split(self, mock_post_query):
+        def respond(full_query, **kwargs):
+            window = (full_query["start_date"], full_query["end_date"])
+            if window == ("20240101", "20240102"):
+                return fake_videos_page([1, 2], has_more=True, cursor=2)
+            if window == ("20240101", "20240101"):
+                return fake_videos_page([1])
+            return fake_videos_page([2, 3])
+
+        mock_post_query.side_effect = respond
+
+        df = get_videos_query_adaptive(
+            {"and": []}, "token", "20240101", "20240102", max_pages_per_window=1
+        )
+
+        self.assertEqual(list(df["id"]), [1, 2, 3])
+        windows = [
+            (c.kwargs["full_query"]["start_date"], c.kwargs["full_query"]["end_date"])
+            for c in mock_post_query.call_args_list
+        ]
+        self.assertEqual(
+            sorted(windows),
+            [
+                ("20240101", "20240101"),
+                ("20240101", "20240102"),
+                ("20240102", "20240102"),
+            ],
+        )
+        self.assertEqual(
+            df.attrs["splitting"],
+            {"split_windows": 1, "refetched_pages": 1, "duplicate_videos": 2},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from researchtikpy.aio import AsyncClient
+from tests.helpers import fake_response, fake_videos_page
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    @patch("researchtikpy.get_query.post_query")
+    async def test_iter_responses_follows_cursor(self, mock_post_query):
+        mock_post_query.side_effect = [
+            fake_videos_page([1, 2], has_more=True, cursor=2),
+            fake_videos_page([3]),
+        ]
+        async with AsyncClient("token", max_concurrency=2) as client:
+            responses = [r async for r in client.iter_responses({"max_count": 2})]
+
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(
+            mock_post_query.call_args_list[1].kwargs["full_query"]["cursor"], 2
+        )
+
+    @patch("researchtikpy.aio.fetch_user_info")
+    async def test_concurrent_requests_share_session(self, mock_fetch_user_info):
+        mock_fetch_user_info.side_effect = (
+            lambda session, username, token, fields: fake_response(
+                {"data": {"username": username}}
+            )
+        )
+        async with AsyncClient("token", max_concurrency=4) as client:
+            responses = await asyncio.gather(
+                *(client.fetch_user_info(name) for name in ["a", "b", "c"])
+            )
+            sessions = {call.args[0] for call in mock_fetch_user_info.call_args_list}
+
+        self.assertEqual(
+            [r.json()["data"]["username"] for r in responses], ["a", "b", "c"]
+        )
+        self.assertEqual(sessions, {client.session})
+
+    async def test_stopped_iteration_closes_the_generator(self):
+        closed = []
+
+        def pages():
+            try:
+                yield from range(10)
+            finally:
+                closed.append(True)
+
+        async with AsyncClient("token", max_concurrency=2) as client:
+            iterator = client._iterate(pages())
+            async for page in iterator:
+                break
+            await iterator.aclose()
+
+        self.assertEqual(page, 0)
+        self.assertEqual(closed, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
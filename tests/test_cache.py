@@ -0,0 +1,125 @@
+import json
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest.mock import Mock
+
+import requests
+
+from researchtikpy import endpoints
+from researchtikpy.cache import (
+    ResponseCache,
+    disable_response_cache,
+    enable_response_cache,
+)
+from researchtikpy.get_users_info import fetch_user_info
+
+
+def json_response(payload: dict, status_code: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "cache.sqlite"
+
+    def tearDown(self):
+        disable_response_cache()
+        self.tmp.cleanup()
+
+    def test_repeated_request_is_served_from_cache(self):
+        cache = enable_response_cache(self.path)
+        session = Mock()
+        session.post.return_value = json_response({"data": {"follower_count": 3}})
+
+        first = fetch_user_info(session, "alice", "token", "follower_count")
+        second = fetch_user_info(session, "alice", "token", "follower_count")
+        other_fields = fetch_user_info(session, "alice", "token", "bio_description")
+
+        self.assertEqual(session.post.call_count, 2)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(other_fields.status_code, 200)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_errors_and_random_queries_are_not_cached(self):
+        cache = ResponseCache(self.path)
+        url = endpoints.video_query
+        cache.put(url, {"a": 1}, None, json_response({"error": {}}, status_code=429))
+        self.assertIsNone(cache.get(url, {"a": 1}))
+        self.assertFalse(cache.is_cacheable({"is_random": True}))
+
+    def test_ttl_and_key_normalization(self):
+        cache = ResponseCache(self.path, ttls={endpoints.user_info: -1})
+        cache.put(
+            endpoints.video_query, {"a": 1, "b": 2}, None, json_response({"x": 1})
+        )
+        cache.put(endpoints.user_info, {"a": 1}, None, json_response({"x": 1}))
+
+        self.assertIsNotNone(cache.get(endpoints.video_query, {"b": 2, "a": 1}))
+        self.assertIsNone(cache.get(endpoints.user_info, {"a": 1}))  # expired
+
+    def test_lru_eviction(self):
+        entry_size = len(zlib.compress(json_response({"x": 1}).content))
+        cache = ResponseCache(self.path, max_bytes=2 * entry_size)
+        url = endpoints.video_query
+        cache.put(url, {"page": 1}, None, json_response({"x": 1}))
+        cache.put(url, {"page": 2}, None, json_response({"x": 2}))
+        cache.get(url, {"page": 1})
+        cache.put(url, {"page": 3}, None, json_response({"x": 3}))
+
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNotNone(cache.get(url, {"page": 1}))
+        self.assertIsNone(cache.get(url, {"page": 2}))
+
+    def test_cursor_chain_expires_together(self):
+        cache = ResponseCache(self.path, ttls={endpoints.video_query: 60})
+        url = endpoints.video_query
+        first_page = {"query": {}, "cursor": 0}
+        second_page = {"query": {}, "cursor": 100, "search_id": "s1"}
+        cache.put(
+            url,
+            first_page,
+            None,
+            json_response({"data": {"search_id": "s1", "has_more": True}}),
+        )
+        cache.put(
+            url,
+            second_page,
+            None,
+            json_response({"data": {"search_id": "s1", "has_more": False}}),
+        )
+        self.assertIsNotNone(cache.get(url, first_page))
+
+        # only the second page has expired
+        with cache._conn:
+            cache._conn.execute(
+                "UPDATE responses SET created_at = created_at - 120 WHERE key = ?",
+                (cache.make_key(url, second_page),),
+            )
+
+        self.assertIsNone(cache.get(url, first_page))
+        self.assertIsNone(cache.get(url, second_page))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_incomplete_cursor_chain_is_not_served(self):
+        cache = ResponseCache(self.path)
+        url = endpoints.video_query
+        first_page = {"query": {}, "cursor": 0}
+        cache.put(
+            url,
+            first_page,
+            None,
+            json_response({"data": {"search_id": "s1", "has_more": True}}),
+        )
+
+        self.assertIsNone(cache.get(url, first_page))
+
+
+if __name__ == "__main__":
+    unittest.main()
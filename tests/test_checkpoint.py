@@ -0,0 +1,110 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+from researchtikpy.checkpoint import CheckpointStore, QueryCheckpoint
+from researchtikpy.date_windows import WindowSize
+from researchtikpy.get_query import dump_videos_query, iter_video_pages
+from tests.helpers import fake_videos_page
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CheckpointStore(Path(tmp))
+            checkpoint = QueryCheckpoint(key="abc")
+            checkpoint.advance(
+                "20240101", {"has_more": True, "search_id": "7", "cursor": 100}, 100
+            )
+            store.save(checkpoint)
+
+            self.assertEqual(store.load("abc"), checkpoint)
+            self.assertIsNone(store.load("other"))
+            self.assertEqual(list(Path(tmp).iterdir()), [store.path("abc")])
+
+
+class TestResume(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_interrupted_query_resumes_from_cursor(self, mock_post_query):
+        mock_post_query.side_effect = [
+            fake_videos_page([1, 2], has_more=True, cursor=2),
+            fake_videos_page([3, 4], has_more=True, cursor=4),
+            fake_videos_page([3, 4], has_more=True, cursor=4),
+            fake_videos_page([5]),
+            fake_videos_page([6]),
+        ]
+        params = dict(
+            query={"and": []},
+            access_token="token",
+            start_date="20240101",
+            end_date="20240102",
+            window_size=WindowSize.day,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            pages = iter_video_pages(**params, checkpoint_dir=Path(tmp))
+            next(pages)
+            next(pages)  # the process dies while handling this page
+            pages.close()
+
+            resumed = list(
+                iter_video_pages(**params, checkpoint_dir=Path(tmp), resume=True)
+            )
+            finished = list(
+                iter_video_pages(**params, checkpoint_dir=Path(tmp), resume=True)
+            )
+
+        self.assertEqual(resumed, [[{"id": 3}, {"id": 4}], [{"id": 5}], [{"id": 6}]])
+        self.assertEqual(finished, [])
+        resumed_body = mock_post_query.call_args_list[2].kwargs["full_query"]
+        self.assertEqual((resumed_body["search_id"], resumed_body["cursor"]), ("1", 2))
+        self.assertEqual(
+            mock_post_query.call_args_list[4].kwargs["full_query"]["start_date"],
+            "20240102",
+        )
+
+    @patch("researchtikpy.get_query.post_query")
+    def test_other_fields_do_not_resume_the_checkpoint(self, mock_post_query):
+        mock_post_query.side_effect = lambda full_query, **kwargs: fake_videos_page([1])
+        params = dict(
+            query={"and": []},
+            access_token="token",
+            start_date="20240101",
+            end_date="20240101",
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            list(iter_video_pages(**params, checkpoint_dir=Path(tmp)))
+            same_fields = list(
+                iter_video_pages(**params, checkpoint_dir=Path(tmp), resume=True)
+            )
+            other_fields = list(
+                iter_video_pages(
+                    **params,
+                    checkpoint_dir=Path(tmp),
+                    resume=True,
+                    fields="id,view_count",
+                )
+            )
+
+        self.assertEqual(same_fields, [])
+        self.assertEqual(other_fields, [[{"id": 1}]])
+
+    @patch("researchtikpy.get_query.post_query")
+    def test_dump_videos_query(self, mock_post_query):
+        mock_post_query.side_effect = [
+            fake_videos_page([1, 2], has_more=True, cursor=2),
+            fake_videos_page([3]),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            tgt = Path(tmp) / "videos.jsonl"
+            dump_videos_query({"and": []}, "token", "20240101", "20240101", tgt)
+            dump_videos_query({"and": []}, "token", "20240101", "20240101", tgt)
+
+            self.assertEqual(list(pd.read_json(tgt, lines=True)["id"]), [1, 2, 3])
+        self.assertEqual(mock_post_query.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
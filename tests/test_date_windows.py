@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import patch
+
+from researchtikpy import get_videos_query
+from researchtikpy.date_windows import DateWindow, WindowSize, split_date_range
+from tests.helpers import fake_videos_page
+
+
+class TestSplitDateRange(unittest.TestCase):
+    def test_short_range_is_single_window(self):
+        windows = split_date_range("20240101", "20240131")
+        self.assertEqual(windows, [DateWindow("20240101", "20240131")])
+
+    def test_long_range_is_split(self):
+        windows = split_date_range("20240101", "20240315", WindowSize.month)
+        self.assertEqual(
+            windows,
+            [
+                DateWindow("20240101", "20240131"),
+                DateWindow("20240201", "20240302"),
+                DateWindow("20240303", "20240315"),
+            ],
+        )
+        self.assertTrue(all(w.n_days <= WindowSize.month for w in windows))
+
+    def test_day_windows(self):
+        windows = split_date_range("20240228", "20240301", WindowSize.day)
+        self.assertEqual(
+            [w.start_date for w in windows], ["20240228", "20240229", "20240301"]
+        )
+        self.assertTrue(all(w.start_date == w.end_date for w in windows))
+
+    def test_invalid_ranges(self):
+        with self.assertRaises(ValueError):
+            split_date_range("20240102", "20240101")
+        with self.assertRaises(ValueError):
+            split_date_range("20240101", "20240301", window_size=40)
+
+
+class TestShardedVideosQuery(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_windows_are_merged_and_deduplicated(self, mock_post_query):
+        pages = {
+            "20240101": [
+                fake_videos_page([1, 2], has_more=True, cursor=2),
+                fake_videos_page([3]),
+            ],
+            "20240108": [fake_videos_page([3, 4])],
+        }
+        mock_post_query.side_effect = lambda full_query, **kwargs: pages[
+            full_query["start_date"]
+        ].pop(0)
+
+        df = get_videos_query(
+            query={"and": []},
+            access_token="token",
+            start_date="20240101",
+            end_date="20240110",
+            total_max_count=100,
+            window_size=WindowSize.week,
+            max_workers=2,
+        )
+
+        self.assertEqual(list(df["id"]), [1, 2, 3, 4])
+        self.assertEqual(mock_post_query.call_count, 3)
+
+    @patch("researchtikpy.get_query.post_query")
+    def test_total_max_count_stops_pending_windows(self, mock_post_query):
+        mock_post_query.return_value = fake_videos_page([1, 2, 3])
+
+        df = get_videos_query(
+            query={"and": []},
+            access_token="token",
+            start_date="20240101",
+            end_date="20240110",
+            total_max_count=2,
+            window_size=WindowSize.day,
+        )
+
+        self.assertEqual(list(df["id"]), [1, 2])
+        self.assertEqual(mock_post_query.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,29 @@
 # test_get_access_token.py
+import tempfile
+import time
 import unittest
-from unittest.mock import patch
-from researchtikpy.get_access_token import get_access_token
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from researchtikpy import transport
+from researchtikpy.get_access_token import AccessTokenProvider, get_access_token
+from tests.helpers import fake_response
+
 
 class TestGetAccessToken(unittest.TestCase):
 
-    @patch('researchtikpy.get_access_token.requests.post')
+    @patch("researchtikpy.get_access_token.requests.post")
     def test_token_retrieval_success(self, mock_post):
         # Arrange
         expected_response = {
             "access_token": "test_access_token",
             "expires_in": 3600,
-            "token_type": "Bearer"
+            "token_type": "Bearer",
         }
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = expected_response
-        client_key = 'test_client_key'
-        client_secret = 'test_client_secret'
+        client_key = "test_client_key"
+        client_secret = "test_client_secret"
 
         # Act
         response = get_access_token(client_key, client_secret)
@@ -24,19 +31,92 @@ class TestGetAccessToken(unittest.TestCase):
         # Assert
         self.assertEqual(response, expected_response)
 
-    @patch('researchtikpy.get_access_token.requests.post')
+    @patch("researchtikpy.get_access_token.requests.post")
     def test_token_retrieval_failure(self, mock_post):
         # Arrange
         mock_post.return_value.status_code = 400
-        mock_post.return_value.text = 'Bad Request'
-        client_key = 'test_client_key'
-        client_secret = 'test_client_secret'
+        mock_post.return_value.text = "Bad Request"
+        client_key = "test_client_key"
+        client_secret = "test_client_secret"
 
         # Act & Assert
         with self.assertRaises(Exception) as context:
             get_access_token(client_key, client_secret)
-        
-        self.assertIn('Failed to obtain access token', str(context.exception))
 
-if __name__ == '__main__':
+        self.assertIn("Failed to obtain access token", str(context.exception))
+
+
+def issue_tokens(expires_in=7200):
+    counter = iter(range(1, 1000))
+    return lambda client_key, client_secret: {
+        "access_token": f"token-{next(counter)}",
+        "expires_in": expires_in,
+        "token_type": "Bearer",
+    }
+
+
+class TestAccessTokenProvider(unittest.TestCase):
+
+    @patch("researchtikpy.get_access_token.get_access_token")
+    def test_refreshes_ahead_of_expiry(self, mock_get_access_token):
+        mock_get_access_token.side_effect = issue_tokens(expires_in=400)
+        provider = AccessTokenProvider("key", "secret", refresh_margin=300)
+
+        self.assertEqual(provider.token(), "token-1")
+        self.assertEqual(provider.token(), "token-1")
+        with patch(
+            "researchtikpy.get_access_token.time.time", return_value=time.time() + 101
+        ):
+            self.assertEqual(provider.token(), "token-2")
+        self.assertNotIn("secret", repr(provider))
+
+    @patch("researchtikpy.get_access_token.get_access_token")
+    def test_refresh_replaces_a_stale_token_once(self, mock_get_access_token):
+        mock_get_access_token.side_effect = issue_tokens()
+        provider = AccessTokenProvider("key", "secret")
+
+        stale = provider.token()
+        self.assertEqual(provider.refresh(stale_token=stale), "token-2")
+        self.assertEqual(
+            provider.refresh(stale_token=stale), "token-2"
+        )  # already replaced
+        self.assertEqual(mock_get_access_token.call_count, 2)
+
+    @patch("researchtikpy.get_access_token.get_access_token")
+    def test_processes_share_the_token_through_a_file(self, mock_get_access_token):
+        mock_get_access_token.side_effect = issue_tokens()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "token.sqlite"
+            first = AccessTokenProvider("key", "secret", shared_path=path)
+            second = AccessTokenProvider("key", "secret", shared_path=path)
+
+            self.assertEqual(first.token(), "token-1")
+            self.assertEqual(second.token(), "token-1")
+            self.assertEqual(second.refresh(stale_token="token-1"), "token-2")
+            self.assertEqual(first.refresh(stale_token="token-1"), "token-2")
+        self.assertEqual(mock_get_access_token.call_count, 2)
+
+    @patch("researchtikpy.get_access_token.get_access_token")
+    def test_request_is_retried_once_after_401(self, mock_get_access_token):
+        mock_get_access_token.side_effect = issue_tokens()
+        provider = AccessTokenProvider("key", "secret")
+        provider.token()
+        session = Mock()
+        session.post.side_effect = [
+            fake_response({"error": {"code": "access_token_invalid"}}, 401),
+            fake_response({"data": {}}),
+        ]
+
+        response = transport.post(
+            "https://example.com", provider, json={}, session=session
+        )
+
+        self.assertEqual(response.status_code, 200)
+        headers = [
+            c.kwargs["headers"]["Authorization"] for c in session.post.call_args_list
+        ]
+        self.assertEqual(headers, ["Bearer token-1", "Bearer token-2"])
+
+
+if __name__ == "__main__":
     unittest.main()
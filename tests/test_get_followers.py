@@ -1,15 +1,21 @@
+import tempfile
 import unittest
-from unittest.mock import patch, Mock
+from pathlib import Path
+from unittest.mock import Mock, patch
+
 import pandas as pd
 import requests
+
 from researchtikpy import get_followers
+from researchtikpy.retry import DEFAULT_POLICIES, ErrorClass
 from researchtikpy.social_graph import (
     Username,
+    dump_users_follower,
     extract_followers,
     get_user_followers,
     iter_followers_responses,
 )
-from tests.helpers import access_token
+from tests.helpers import access_token, fake_response
 
 
 class TestGetFollowers(unittest.TestCase):
@@ -42,23 +48,50 @@ class TestGetFollowers(unittest.TestCase):
         self.assertEqual(len(result_df), 2)
         self.assertEqual(result_df.iloc[0]["username"], "follower1")
 
-    @unittest.skip("Skipping test_get_followers_rate_limit")
+    @patch("researchtikpy.retry.time.sleep")
     @patch("researchtikpy.social_graph.requests.Session")
-    def test_get_followers_rate_limit(self, mock_session):
+    def test_get_followers_rate_limit(self, mock_session, mock_sleep):
         # Arrange
-        mock_response = Mock()
-        mock_response.status_code = 429  # Simulate a rate limit error from the API
-        mock_session().post.return_value = mock_response
+        # Simulate a rate limit error from the API that persists through all retries
+        mock_session().post.return_value = fake_response(
+            {"error": {"code": "rate_limit_exceeded", "message": ""}}, 429
+        )
 
         usernames_list = ["testuser"]
         access_token = "test_access_token"
 
-        # Act & Assert
-        # Checking if the DataFrame is empty since the API is rate-limited
-        # Alternatively, could check for a specific exception or log message
+        # Act
         result_df = get_followers(usernames_list, access_token, verbose=False)
+
+        # Assert
+        # The request is retried with backoff, then the user is given up on
+        max_attempts = DEFAULT_POLICIES[ErrorClass.rate_limit].max_attempts
+        self.assertEqual(mock_session().post.call_count, 1 + max_attempts)
+        self.assertEqual(mock_sleep.call_count, max_attempts)
         self.assertTrue(result_df.empty)
 
+    @patch("researchtikpy.social_graph.requests.Session")
+    def test_get_followers_requests_full_pages_and_trims(self, mock_session):
+        def page(start):
+            followers = [{"username": f"follower{i}"} for i in range(start, start + 40)]
+            data = {"user_followers": followers, "has_more": True, "cursor": start + 40}
+            return fake_response({"data": data, "error": {"code": "ok", "message": ""}})
+
+        mock_session().post.side_effect = [page(0), page(40), page(80)]
+
+        result_df = get_followers(
+            ["testuser"], "test_access_token", total_count=100, verbose=False
+        )
+
+        self.assertEqual(len(result_df), 100)
+        max_counts = [
+            c.kwargs["json"]["max_count"] for c in mock_session().post.call_args_list
+        ]
+        self.assertEqual(max_counts, [100, 100, 100])
+        stats = result_df.attrs["paging_stats"]["testuser"]
+        self.assertEqual((stats["requests"], stats["rows"]), (3, 100))
+        self.assertAlmostEqual(stats["requests_per_row"], 0.03)
+
     def test_get_user_followers(self):
         response: requests.Response = get_user_followers(
             access_token=access_token(),
@@ -86,5 +119,53 @@ class TestGetFollowers(unittest.TestCase):
     # Add more tests to cover different scenarios like different error codes or partial data fetching
 
 
+class TestConcurrentSocialGraph(unittest.TestCase):
+    @staticmethod
+    def respond(url, headers, json, params=None):
+        username = json["username"]
+        if json["cursor"] == 0:
+            users = [{"username": f"{username}_a", "display_name": "A"}]
+            data = {"user_followers": users, "has_more": True, "cursor": 1}
+        else:
+            users = [{"username": f"{username}_b", "display_name": "B"}]
+            data = {"user_followers": users, "has_more": False, "cursor": 2}
+        return fake_response({"data": data, "error": {"code": "ok", "message": ""}})
+
+    @patch("researchtikpy.social_graph.pooled_session")
+    def test_get_followers_concurrently_keeps_input_order(self, mock_pooled_session):
+        mock_pooled_session.return_value.post.side_effect = self.respond
+        usernames = [f"user{i}" for i in range(8)]
+
+        result_df = get_followers(usernames, "token", verbose=False, max_workers=4)
+
+        mock_pooled_session.assert_called_once_with(4)
+        self.assertEqual(
+            list(result_df["target_account"]), [u for u in usernames for _ in "ab"]
+        )
+        self.assertEqual(list(result_df["username"][:2]), ["user0_a", "user0_b"])
+
+    @patch("researchtikpy.social_graph.default_token_provider", return_value="token")
+    @patch("researchtikpy.social_graph.pooled_session")
+    def test_dump_users_connections_concurrently(self, mock_pooled_session, _):
+        mock_pooled_session.return_value.post.side_effect = self.respond
+        with tempfile.TemporaryDirectory() as tmp:
+            tgt = Path(tmp) / "followers.jsonl"
+            dump_users_follower(
+                pd.Series(["user0", "user1", "user2"]), tgt, max_workers=3
+            )
+            dump_users_follower(pd.Series(["user0", "user3"]), tgt, max_workers=3)
+            df = pd.read_json(tgt, lines=True)
+
+        self.assertEqual(
+            sorted(df["target_account"].unique()), ["user0", "user1", "user2", "user3"]
+        )
+        self.assertEqual(len(df), 8)
+        self.assertTrue(df["success"].all())
+        self.assertEqual(
+            set(df["follower_username"]),
+            {f"user{i}_{x}" for i in range(4) for x in "ab"},
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,12 @@
-from pathlib import Path
 import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import requests
 
+from researchtikpy import get_following
+from researchtikpy.retry import DEFAULT_POLICIES, ErrorClass
 from researchtikpy.social_graph import (
     Username,
     dump_users_following,
@@ -11,11 +14,7 @@ from researchtikpy.social_graph import (
     get_user_following,
     iter_following_responses,
 )
-from tests.helpers import access_token
-
-
-from unittest.mock import patch, MagicMock
-from researchtikpy import get_following
+from tests.helpers import access_token, fake_response
 
 
 class TestGetFollowing(unittest.TestCase):
@@ -49,13 +48,14 @@ class TestGetFollowing(unittest.TestCase):
         self.assertEqual(len(result_df), 2)
         self.assertEqual(list(result_df["username"]), ["following1", "following2"])
 
-    @unittest.skip("Skipping test_get_followings_rate_limit")
+    @patch("researchtikpy.retry.time.sleep")
     @patch("researchtikpy.social_graph.requests.Session")
-    def test_get_following_rate_limit(self, mock_session):
+    def test_get_following_rate_limit(self, mock_session, mock_sleep):
         # Arrange
-        mock_response = MagicMock()
-        mock_response.status_code = 429  # Simulate rate limit error from the API
-        mock_session.return_value.post.return_value = mock_response
+        # Simulate a rate limit error from the API that persists through all retries
+        mock_session.return_value.post.return_value = fake_response(
+            {"error": {"code": "rate_limit_exceeded", "message": ""}}, 429
+        )
         usernames_list = ["testuser"]
         access_token = "test_access_token"
 
@@ -63,6 +63,9 @@ class TestGetFollowing(unittest.TestCase):
         result_df = get_following(usernames_list, access_token, verbose=False)
 
         # Assert
+        max_attempts = DEFAULT_POLICIES[ErrorClass.rate_limit].max_attempts
+        self.assertEqual(mock_session.return_value.post.call_count, 1 + max_attempts)
+        self.assertEqual(mock_sleep.call_count, max_attempts)
         self.assertTrue(result_df.empty)
 
     def test_get_user_following(self):
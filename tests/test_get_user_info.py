@@ -1,6 +1,15 @@
+import tempfile
+import time
 import unittest
-from researchtikpy import get_users_info
-from .helpers import access_token
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+from researchtikpy import get_users_info, get_users_info_bulk
+from researchtikpy.profile_cache import FieldGroup, ProfileCache
+
+from .helpers import access_token, fake_response
 
 
 class TestGetAccessToken(unittest.TestCase):
@@ -10,3 +19,53 @@ class TestGetAccessToken(unittest.TestCase):
             access_token=access_token(),
         )
         assert len(df) == 2
+
+
+class TestGetUsersInfoBulk(unittest.TestCase):
+    @staticmethod
+    def respond(url, headers, json, params=None):
+        if json["username"] == "missing":
+            return fake_response(
+                {"data": {}, "error": {"code": "invalid_params", "message": ""}}, 400
+            )
+        profile = {"display_name": json["username"].upper(), "follower_count": 7}
+        return fake_response({"data": profile, "error": {"code": "ok", "message": ""}})
+
+    @patch("researchtikpy.get_users_info.pooled_session")
+    def test_dedups_caches_and_keeps_input_order(self, mock_pooled_session):
+        post = mock_pooled_session.return_value.post
+        post.side_effect = self.respond
+        usernames = ["b", "a", "b", "missing", "a"]
+        fields = "display_name,follower_count"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ProfileCache(Path(tmp) / "profiles.sqlite")
+            first = get_users_info_bulk(
+                usernames, "token", fields=fields, profile_cache=cache
+            )
+            second = get_users_info_bulk(
+                usernames, "token", fields=fields, profile_cache=cache
+            )
+            cache.close()
+
+        self.assertEqual(list(first["username"]), usernames)
+        self.assertEqual(list(first["display_name"][:3]), ["B", "A", "B"])
+        self.assertTrue(pd.isna(first["display_name"][3]))
+        self.assertEqual(first["error"][3], "Failed to retrieve data")
+        self.assertEqual(
+            post.call_count, 3 + 1
+        )  # second run only retries the failed user
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_stale_field_groups_are_refetched(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ProfileCache(
+                Path(tmp) / "profiles.sqlite", ttls={FieldGroup.counts: 0}
+            )
+            cache.put("a", {"display_name": "A", "follower_count": 7})
+            self.assertEqual(cache.get("a", ["display_name"]), {"display_name": "A"})
+            with patch(
+                "researchtikpy.profile_cache.time.time", return_value=time.time() + 1
+            ):
+                self.assertIsNone(cache.get("a", ["display_name", "follower_count"]))
+            cache.close()
@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from researchtikpy import collect_video_comments, get_video_comments
+from tests.helpers import fake_response
+
+
+def comments_page(video_id, n, has_more=False, cursor=0):
+    comments = [{"id": f"{video_id}-{cursor + i}", "text": "nice"} for i in range(n)]
+    data = {"comments": comments, "has_more": has_more, "cursor": cursor + n}
+    return fake_response({"data": data, "error": {"code": "ok", "message": ""}})
+
+
+class TestGetVideoComments(unittest.TestCase):
+    @patch("researchtikpy.get_video_comments.requests.Session")
+    def test_collects_all_pages_once_per_video(self, mock_session):
+        def respond(url, headers, json, params=None):
+            if json["video_id"] == 1 and json["cursor"] == 0:
+                return comments_page(1, 2, has_more=True)
+            return comments_page(json["video_id"], 1, cursor=json["cursor"])
+
+        mock_session().post.side_effect = respond
+        videos_df = pd.DataFrame({"id": [1, 2, 1]})
+
+        comments_df = get_video_comments(videos_df, "token", max_count=2, verbose=False)
+
+        self.assertEqual(list(comments_df["video_id"]), [1, 1, 1, 2])
+        self.assertEqual(list(comments_df["id"]), ["1-0", "1-1", "1-2", "2-0"])
+        self.assertEqual(mock_session().post.call_count, 3)
+
+
+class TestCollectVideoComments(unittest.TestCase):
+    @patch("researchtikpy.get_video_comments.pooled_session")
+    def test_prioritizes_skips_and_flags_truncation(self, mock_pooled_session):
+        def respond(url, headers, json, params=None):
+            if json["video_id"] == 3:  # a huge thread, the API always has more
+                return comments_page(
+                    3, json["max_count"], has_more=True, cursor=json["cursor"]
+                )
+            return comments_page(json["video_id"], 2, cursor=json["cursor"])
+
+        mock_pooled_session.return_value.post.side_effect = respond
+        videos_df = pd.DataFrame(
+            {"id": [1, 2, 3, 4], "comment_count": [2, 0, 5000, None]}
+        )
+
+        comments_df = collect_video_comments(videos_df, "token", max_workers=1)
+
+        requested = [
+            c.kwargs["json"]
+            for c in mock_pooled_session.return_value.post.call_args_list
+        ]
+        self.assertEqual([body["video_id"] for body in requested], [3] * 10 + [1, 4])
+        self.assertEqual(requested[-2]["max_count"], 3)  # sized from comment_count=2
+        self.assertEqual(requested[-1]["max_count"], 100)  # unknown comment_count
+        self.assertEqual(comments_df.attrs["skipped_video_ids"], [2])
+        self.assertEqual(comments_df.attrs["truncated_video_ids"], [3])
+        self.assertEqual(len(comments_df), 1000 + 2 + 2)
+
+    @patch("researchtikpy.get_video_comments.pooled_session")
+    def test_stale_comment_count_switches_to_full_pages(self, mock_pooled_session):
+        def respond(url, headers, json, params=None):
+            n = min(json["max_count"], 250 - json["cursor"])
+            return comments_page(
+                1, n, has_more=json["cursor"] + n < 250, cursor=json["cursor"]
+            )
+
+        mock_pooled_session.return_value.post.side_effect = respond
+        videos_df = pd.DataFrame({"id": [1], "comment_count": [5]})
+
+        comments_df = collect_video_comments(videos_df, "token", max_workers=1)
+
+        requested = [
+            c.kwargs["json"]
+            for c in mock_pooled_session.return_value.post.call_args_list
+        ]
+        self.assertEqual([body["max_count"] for body in requested], [6, 100, 100, 100])
+        self.assertEqual(len(comments_df), 250)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch
+
+from researchtikpy import get_videos_info
+from tests.helpers import fake_response
+
+
+def videos_page(videos: list[dict]):
+    data = {"videos": videos, "has_more": False, "cursor": 0, "search_id": "1"}
+    return fake_response({"data": data, "error": {"code": "ok", "message": ""}})
+
+
+class TestGetVideosInfo(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_usernames_are_chunked_into_in_conditions(self, mock_post_query):
+        def respond(full_query, **kwargs):
+            usernames = full_query["query"]["and"][0]["field_values"]
+            return videos_page(
+                [
+                    {"id": i, "username": u}
+                    for i, u in enumerate(usernames)
+                    if u != "quiet"
+                ]
+            )
+
+        mock_post_query.side_effect = respond
+
+        df = get_videos_info(
+            ["alice", "bob", "alice", "quiet"],
+            "token",
+            "20240101",
+            "20240102",
+            usernames_per_query=2,
+        )
+
+        conditions = sorted(
+            (
+                c.kwargs["full_query"]["query"]["and"][0]["operation"],
+                tuple(c.kwargs["full_query"]["query"]["and"][0]["field_values"]),
+            )
+            for c in mock_post_query.call_args_list
+        )
+        self.assertEqual(conditions, [("IN", ("alice", "bob")), ("IN", ("quiet",))])
+        self.assertEqual(sorted(df["username"]), ["alice", "bob"])
+        self.assertEqual(
+            df.attrs["videos_per_username"].to_dict(),
+            {"alice": 1, "bob": 1, "quiet": 0},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
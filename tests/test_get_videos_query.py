@@ -1,26 +1,45 @@
 import unittest
+from unittest.mock import patch
 
 import pandas as pd
-from researchtikpy import get_videos_query
-from .helpers import access_token
+
+from researchtikpy import get_videos_query, iter_video_frames, iter_videos
+
+from .helpers import access_token, fake_videos_page
 
 
 class TestGetVideosQuery(unittest.TestCase):
     def test_get_videos_query(self):
         df = get_videos_query(
-            query={"and": [{"operation": "IN", "field_name": "hashtag_name", "field_values": ["germany"]}]},
+            query={
+                "and": [
+                    {
+                        "operation": "IN",
+                        "field_name": "hashtag_name",
+                        "field_values": ["germany"],
+                    }
+                ]
+            },
             access_token=access_token(),
             start_date="20240101",
             end_date="20240103",
             total_max_count=12,  # at least 2 calls needed
-            max_count=10
+            max_count=10,
         )
         assert isinstance(df, pd.DataFrame)
         assert len(df) >= 12
-    
+
     def test_invalid_query(self):
         # 'operation' EQ must have one field value
-        invalid_query = {"and": [{"operation": "EQ", "field_name": "keyword", "field_values": ["one", "two"]}]}
+        invalid_query = {
+            "and": [
+                {
+                    "operation": "EQ",
+                    "field_name": "keyword",
+                    "field_values": ["one", "two"],
+                }
+            ]
+        }
         with self.assertRaises(ValueError):
             get_videos_query(
                 query=invalid_query,
@@ -28,5 +47,49 @@ class TestGetVideosQuery(unittest.TestCase):
                 start_date="20240101",
                 end_date="20240102",
                 total_max_count=5,
-                max_count=30
+                max_count=30,
             )
+
+
+class TestIterVideos(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_iter_videos_streams_pages(self, mock_post_query):
+        mock_post_query.side_effect = [
+            fake_videos_page([1, 2], has_more=True, cursor=2),
+            fake_videos_page([3, 4]),
+        ]
+        videos = iter_videos({"and": []}, "token", "20240101", "20240102")
+
+        self.assertEqual(next(videos)["id"], 1)
+        self.assertEqual(mock_post_query.call_count, 1)  # pages are requested lazily
+        self.assertEqual([v["id"] for v in videos], [2, 3, 4])
+
+    @patch("researchtikpy.get_query.post_query")
+    def test_iter_video_frames_respects_total_max_count(self, mock_post_query):
+        mock_post_query.side_effect = [
+            fake_videos_page([1, 2], has_more=True, cursor=2),
+            fake_videos_page([3, 4], has_more=True, cursor=4),
+        ]
+        frames = list(
+            iter_video_frames(
+                {"and": []}, "token", "20240101", "20240102", total_max_count=3
+            )
+        )
+
+        self.assertEqual([len(frame) for frame in frames], [2, 1])
+        self.assertEqual(mock_post_query.call_count, 2)
+
+
+class TestFieldProjection(unittest.TestCase):
+    @patch("researchtikpy.get_query.transport.post")
+    def test_fields_are_passed_to_the_url(self, mock_post):
+        mock_post.return_value = fake_videos_page([1])
+        get_videos_query(
+            {"and": []},
+            "token",
+            "20240101",
+            "20240102",
+            fields=["view_count", "like_count"],
+        )
+        url = mock_post.call_args.args[0]
+        self.assertTrue(url.endswith("?fields=id,view_count,like_count"), url)
@@ -0,0 +1,82 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from researchtikpy.pipeline import Stage, run_enrichment_pipeline
+from researchtikpy.sinks import MemorySink
+
+
+class TestEnrichmentPipeline(unittest.TestCase):
+    @patch("researchtikpy.pipeline.get_followers")
+    @patch("researchtikpy.pipeline.collect_video_comments")
+    @patch("researchtikpy.pipeline.get_users_info_bulk")
+    @patch("researchtikpy.pipeline.iter_video_frames")
+    def test_stages_overlap_and_dedup(
+        self, mock_iter_video_frames, mock_users, mock_comments, mock_followers
+    ):
+        first_page_enriched = threading.Event()
+
+        def pages(*args, **kwargs):
+            yield pd.DataFrame({"id": [1, 2], "username": ["a", "b"]})
+            # the authors of the first page are fetched while the query is still paging
+            self.assertTrue(first_page_enriched.wait(timeout=5))
+            yield pd.DataFrame({"id": [2, 3], "username": ["b", "c"]})
+
+        def users(usernames, access_token, fields, max_workers):
+            first_page_enriched.set()
+            counts = {"a": 10, "b": 500_000, "c": 200_000}
+            return pd.DataFrame(
+                [{"username": u, "follower_count": counts[u]} for u in usernames]
+            )
+
+        mock_iter_video_frames.side_effect = pages
+        mock_users.side_effect = users
+        mock_comments.side_effect = lambda videos_df, *args, **kwargs: pd.DataFrame(
+            {"video_id": videos_df["id"].tolist()}
+        )
+        mock_followers.side_effect = lambda usernames, *args, **kwargs: pd.DataFrame(
+            {"target_account": usernames}
+        )
+        sinks = {
+            Stage.videos: MemorySink(),
+            Stage.authors: MemorySink(),
+            Stage.comments: MemorySink(),
+            Stage.followers: MemorySink(),
+        }
+
+        summary = run_enrichment_pipeline(
+            {"and": []}, "token", "20240101", "20240131", sinks=sinks, queue_size=1
+        )
+
+        self.assertEqual(list(sinks[Stage.videos].to_frame()["id"]), [1, 2, 3])
+        self.assertEqual(
+            list(sinks[Stage.authors].to_frame()["username"]), ["a", "b", "c"]
+        )
+        self.assertEqual(
+            sorted(sinks[Stage.comments].to_frame()["video_id"]), [1, 2, 3]
+        )
+        self.assertEqual(
+            sorted(sinks[Stage.followers].to_frame()["target_account"]), ["b", "c"]
+        )
+        self.assertEqual(list(summary["items"]), [3, 3, 3, 2])
+
+    @patch("researchtikpy.pipeline.get_users_info_bulk")
+    @patch("researchtikpy.pipeline.iter_video_frames")
+    def test_failing_stage_stops_the_pipeline(self, mock_iter_video_frames, mock_users):
+        mock_iter_video_frames.return_value = iter(
+            [pd.DataFrame({"id": [i], "username": [f"u{i}"]}) for i in range(10)]
+        )
+        mock_users.side_effect = RuntimeError("boom")
+
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            run_enrichment_pipeline(
+                {"and": []},
+                "token",
+                "20240101",
+                "20240131",
+                sinks={Stage.authors: MemorySink()},
+                queue_size=1,
+            )
+        self.assertEqual(mock_users.call_count, 1)
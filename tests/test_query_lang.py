@@ -1,65 +1,223 @@
 import pytest
 
-from researchtikpy import Query, Condition, Fields, Operators, RegionCodes, VideoLengths
-from researchtikpy.query_lang import as_dict
+from researchtikpy import (
+    CompiledQuery,
+    Condition,
+    Fields,
+    Operators,
+    Query,
+    RegionCodes,
+    VideoLengths,
+    compile_query,
+)
+from researchtikpy.query_lang import VideoFields, as_dict, video_fields_param
 
-@pytest.mark.parametrize("expected, actual", [
-    pytest.param(
-        {"and": [{"field_name": "hashtag_name", "operation": "IN", "field_values": ["#python"]}], "or": [], "not": []},
-        Query(and_=[Condition(Fields.hashtag_name, Operators.isin, ["#python"])]),
-        id="hashtag_and"
-    ),
-    pytest.param(
-        {"and": [], "or": [{"field_name": "hashtag_name", "operation": "IN", "field_values": ["#python"]}], "not": []},
-        Query(or_=[Condition(Fields.hashtag_name, Operators.isin, ["#python"])]),
-        id="hashtag_or"
-    ),
-    pytest.param(
-        {"and": [], "or": [], "not": [{"field_name": "hashtag_name", "operation": "IN", "field_values": ["#python"]}]},
-        Query(not_=[Condition(Fields.hashtag_name, Operators.isin, ["#python"])]),
-        id="hashtag_not"
-    ),
-    pytest.param(
-        {"and": [
-            {"field_name": "keyword", "operation": "EQ", "field_values": ["enemenemuh"]},
-            {"field_name": "username", "operation": "EQ", "field_values": ["ernie_und_bert"]},
-        ], "or": [], "not": []},
-        Query(and_=[
-            Condition(Fields.keyword, Operators.equals, ["enemenemuh"]),
-            Condition(Fields.username, Operators.equals, ["ernie_und_bert"])
-        ]),
-        id="keyword_and_username"
-    ),
-    pytest.param(
-        {"and": [
-            {"field_name": "video_length", "operation": "EQ", "field_values": ["SHORT"]},
-            {"field_name": "username", "operation": "EQ", "field_values": ["ernie_und_bert"]},
-        ], "or": [], "not": []},
-        Query(and_=[
-            Condition(Fields.video_length, Operators.equals, [VideoLengths.SHORT]),
-            Condition(Fields.username, Operators.equals, ["ernie_und_bert"])
-        ]),
-        id="video_length_and_username"
-    ),
-    pytest.param(
-        {"and": [
-            {"field_name": "keyword", "operation": "EQ", "field_values": ["enemenemuh"]},
-            {"field_name": "region_code", "operation": "EQ", "field_values": ["DE"]},
-        ], "or": [], "not": []},
-        Query(and_=[
-            Condition(Fields.keyword, Operators.equals, ["enemenemuh"]),
-            Condition(Fields.region_code, Operators.equals, [RegionCodes.DE])
-        ]),
-        id="keyword_and_region_code"
-    ),
-])
+
+@pytest.mark.parametrize(
+    "expected, actual",
+    [
+        pytest.param(
+            {
+                "and": [
+                    {
+                        "field_name": "hashtag_name",
+                        "operation": "IN",
+                        "field_values": ["#python"],
+                    }
+                ],
+                "or": [],
+                "not": [],
+            },
+            Query(and_=[Condition(Fields.hashtag_name, Operators.isin, ["#python"])]),
+            id="hashtag_and",
+        ),
+        pytest.param(
+            {
+                "and": [],
+                "or": [
+                    {
+                        "field_name": "hashtag_name",
+                        "operation": "IN",
+                        "field_values": ["#python"],
+                    }
+                ],
+                "not": [],
+            },
+            Query(or_=[Condition(Fields.hashtag_name, Operators.isin, ["#python"])]),
+            id="hashtag_or",
+        ),
+        pytest.param(
+            {
+                "and": [],
+                "or": [],
+                "not": [
+                    {
+                        "field_name": "hashtag_name",
+                        "operation": "IN",
+                        "field_values": ["#python"],
+                    }
+                ],
+            },
+            Query(not_=[Condition(Fields.hashtag_name, Operators.isin, ["#python"])]),
+            id="hashtag_not",
+        ),
+        pytest.param(
+            {
+                "and": [
+                    {
+                        "field_name": "keyword",
+                        "operation": "EQ",
+                        "field_values": ["enemenemuh"],
+                    },
+                    {
+                        "field_name": "username",
+                        "operation": "EQ",
+                        "field_values": ["ernie_und_bert"],
+                    },
+                ],
+                "or": [],
+                "not": [],
+            },
+            Query(
+                and_=[
+                    Condition(Fields.keyword, Operators.equals, ["enemenemuh"]),
+                    Condition(Fields.username, Operators.equals, ["ernie_und_bert"]),
+                ]
+            ),
+            id="keyword_and_username",
+        ),
+        pytest.param(
+            {
+                "and": [
+                    {
+                        "field_name": "video_length",
+                        "operation": "EQ",
+                        "field_values": ["SHORT"],
+                    },
+                    {
+                        "field_name": "username",
+                        "operation": "EQ",
+                        "field_values": ["ernie_und_bert"],
+                    },
+                ],
+                "or": [],
+                "not": [],
+            },
+            Query(
+                and_=[
+                    Condition(
+                        Fields.video_length, Operators.equals, [VideoLengths.SHORT]
+                    ),
+                    Condition(Fields.username, Operators.equals, ["ernie_und_bert"]),
+                ]
+            ),
+            id="video_length_and_username",
+        ),
+        pytest.param(
+            {
+                "and": [
+                    {
+                        "field_name": "keyword",
+                        "operation": "EQ",
+                        "field_values": ["enemenemuh"],
+                    },
+                    {
+                        "field_name": "region_code",
+                        "operation": "EQ",
+                        "field_values": ["DE"],
+                    },
+                ],
+                "or": [],
+                "not": [],
+            },
+            Query(
+                and_=[
+                    Condition(Fields.keyword, Operators.equals, ["enemenemuh"]),
+                    Condition(Fields.region_code, Operators.equals, [RegionCodes.DE]),
+                ]
+            ),
+            id="keyword_and_region_code",
+        ),
+    ],
+)
 def test_query_builder(expected, actual):
     assert expected == as_dict(actual)
 
-@pytest.mark.parametrize("actual", [
-    pytest.param({"and": [{"field_name": "nope", "operation": "IN", "field_values": ["bibo"]}], "or": [], "not": []}, id="wrong_field_name"),
-    pytest.param({"and": [{"field_name": "keyword", "operation": "==", "field_values": ["bibo"]}], "or": [], "not": []}, id="wrong_operator"),
-])
+
+@pytest.mark.parametrize(
+    "actual",
+    [
+        pytest.param(
+            {
+                "and": [
+                    {"field_name": "nope", "operation": "IN", "field_values": ["bibo"]}
+                ],
+                "or": [],
+                "not": [],
+            },
+            id="wrong_field_name",
+        ),
+        pytest.param(
+            {
+                "and": [
+                    {
+                        "field_name": "keyword",
+                        "operation": "==",
+                        "field_values": ["bibo"],
+                    }
+                ],
+                "or": [],
+                "not": [],
+            },
+            id="wrong_operator",
+        ),
+    ],
+)
 def test_query_builder_invalid(actual):
     with pytest.raises(ValueError):
         Query(**actual)
+
+
+def test_compiled_query_is_canonical():
+    query = Query(
+        and_=[
+            Condition(Fields.username, Operators.isin, ["b", "a", "a"]),
+            Condition(Fields.region_code, Operators.equals, [RegionCodes.DE]),
+        ]
+    )
+    reordered = {
+        "and": [
+            {"field_name": "region_code", "operation": "EQ", "field_values": ["DE"]},
+            {"field_name": "username", "operation": "IN", "field_values": ["a", "b"]},
+        ]
+    }
+    compiled = compile_query(query)
+
+    assert compiled == compile_query(reordered)
+    assert compiled.digest == compile_query(reordered).digest
+    assert len({compiled, compile_query(reordered)}) == 1
+    assert as_dict(compiled) == {
+        "and": [
+            {"field_name": "region_code", "operation": "EQ", "field_values": ["DE"]},
+            {"field_name": "username", "operation": "IN", "field_values": ["a", "b"]},
+        ],
+        "or": [],
+        "not": [],
+    }
+    with pytest.raises(AttributeError):
+        compiled.digest = "x"
+
+
+def test_compiled_query_from_conditions_validates():
+    compiled = CompiledQuery.from_conditions(or_=[("hashtag_name", "IN", ["x", "y"])])
+    assert compiled.or_[0].field_values == ("x", "y")
+    with pytest.raises(ValueError):
+        CompiledQuery.from_conditions(and_=[("nope", "IN", ["x"])])
+
+
+def test_video_fields_param():
+    assert video_fields_param().split(",") == list(VideoFields)
+    assert video_fields_param("like_count, view_count") == "id,view_count,like_count"
+    assert video_fields_param([VideoFields.share_count, "id"]) == "id,share_count"
+    with pytest.raises(ValueError):
+        video_fields_param(["nope"])
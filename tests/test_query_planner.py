@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+
+from researchtikpy import (
+    CompiledQuery,
+    Condition,
+    Fields,
+    Operators,
+    Query,
+    get_videos_hashtag,
+)
+from researchtikpy.query_planner import matched_terms, plan_sub_queries
+from tests.helpers import fake_response
+
+
+class TestPlanSubQueries(unittest.TestCase):
+    def test_small_query_is_not_split(self):
+        query = Query(and_=[Condition(Fields.hashtag_name, Operators.isin, ["a", "b"])])
+        self.assertEqual(len(plan_sub_queries(query, max_values=2)), 1)
+
+    def test_oversized_in_lists_are_chunked(self):
+        query = CompiledQuery.from_conditions(
+            and_=[
+                ("hashtag_name", "IN", ["a", "b", "c"]),
+                ("region_code", "IN", ["DE", "FR", "US"]),
+            ],
+            not_=[("keyword", "IN", ["x", "y", "z"])],
+        )
+        sub_queries = plan_sub_queries(query, max_values=2)
+
+        self.assertEqual(len(sub_queries), 4)
+        for sub_query in sub_queries:
+            self.assertTrue(all(len(c.field_values) <= 2 for c in sub_query.and_))
+            self.assertEqual(sub_query.not_, query.not_)
+        hashtags = {
+            v
+            for q in sub_queries
+            for c in q.and_
+            if c.field_name == "hashtag_name"
+            for v in c.field_values
+        }
+        self.assertEqual(hashtags, {"a", "b", "c"})
+
+    def test_matched_terms(self):
+        query = CompiledQuery.from_conditions(
+            and_=[("hashtag_name", "IN", ["FYP", "cats"])],
+            or_=[("keyword", "EQ", ["dog"])],
+        )
+        video = {"hashtag_names": ["fyp", "dogs"], "video_description": "My Dog!"}
+        self.assertEqual(matched_terms(video, query), ["FYP", "dog"])
+
+
+class TestSplitVideosQuery(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_hashtag_sub_queries_are_merged_with_attribution(self, mock_post_query):
+        def respond(full_query, **kwargs):
+            hashtags = full_query["query"]["and"][0]["field_values"]
+            videos = [{"id": 1, "hashtag_names": ["a", "c"]}]
+            if "b" in hashtags:
+                videos.append({"id": 2, "hashtag_names": ["b"]})
+            data = {"videos": videos, "has_more": False, "cursor": 0, "search_id": "1"}
+            return fake_response({"data": data})
+
+        mock_post_query.side_effect = respond
+
+        df = get_videos_hashtag(
+            ["a", "b", "c"], "token", "20240101", "20240102", None, hashtags_per_query=2
+        )
+
+        self.assertEqual(mock_post_query.call_count, 2)
+        self.assertEqual(list(df["id"]), [1, 2])
+        self.assertEqual(list(df["sub_query"]), [0, 0])
+        self.assertEqual(df.iloc[0]["matched_terms"], ["a", "c"])
+        self.assertEqual(df.iloc[1]["matched_terms"], ["b"])
+        self.assertEqual(len(df.attrs["sub_queries"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
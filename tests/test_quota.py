@@ -0,0 +1,107 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from researchtikpy import endpoints
+from researchtikpy.get_query import dump_videos_query
+from researchtikpy.quota import (
+    BudgetExhausted,
+    QuotaLedger,
+    disable_quota_ledger,
+    enable_quota_ledger,
+    estimate_requests,
+    request_budget,
+)
+from researchtikpy.ratelimit import EndpointFamily
+from researchtikpy.transport import post
+from tests.helpers import fake_response, fake_videos_page
+
+
+class TestQuotaLedger(unittest.TestCase):
+    def test_counts_and_limits_per_family(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = QuotaLedger(
+                Path(tmp) / "quota.sqlite", daily_limits={EndpointFamily.user: 2}
+            )
+            ledger.record(endpoints.followers)
+            ledger.record(f"{endpoints.user_info}?fields=display_name")
+            ledger.record(endpoints.video_query)
+
+            with self.assertRaises(BudgetExhausted):
+                ledger.record(endpoints.followers)
+            self.assertEqual(ledger.used(EndpointFamily.user), 2)
+            self.assertEqual(ledger.remaining(EndpointFamily.user), 0)
+            self.assertEqual(ledger.used(), 3)
+            self.assertEqual(ledger.days_needed(5, EndpointFamily.user), 4)
+            ledger.close()
+
+            reopened = QuotaLedger(Path(tmp) / "quota.sqlite")
+            (usage,) = reopened.usage().values()
+            self.assertEqual(usage[endpoints.followers], 1)
+            reopened.close()
+
+    def test_estimate_requests(self):
+        self.assertEqual(estimate_requests(1000, max_count=100, n_chains=3), 13)
+
+
+class TestRequestBudget(unittest.TestCase):
+    @patch("researchtikpy.transport.requests.post", return_value=fake_response({}))
+    def test_transport_charges_ledger_and_budget(self, mock_post):
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = enable_quota_ledger(Path(tmp) / "quota.sqlite")
+            try:
+                with request_budget(2) as budget:
+                    post(endpoints.video_query, "token", json={})
+                    post(endpoints.video_query, "token", json={})
+                    with self.assertRaises(BudgetExhausted):
+                        post(endpoints.video_query, "token", json={})
+                self.assertEqual(budget.remaining, 0)
+                self.assertEqual(ledger.used(EndpointFamily.video_query), 2)
+            finally:
+                disable_quota_ledger()
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch("researchtikpy.transport.requests.post", return_value=fake_response({}))
+    def test_budget_is_not_charged_when_ledger_refuses(self, mock_post):
+        with tempfile.TemporaryDirectory() as tmp:
+            enable_quota_ledger(
+                Path(tmp) / "quota.sqlite", daily_limits={EndpointFamily.video_query: 1}
+            )
+            try:
+                with request_budget(5) as budget:
+                    post(endpoints.video_query, "token", json={})
+                    for _ in range(3):
+                        with self.assertRaises(BudgetExhausted):
+                            post(endpoints.video_query, "token", json={})
+                self.assertEqual(budget.remaining, 4)
+            finally:
+                disable_quota_ledger()
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch("researchtikpy.transport.requests.post")
+    def test_dump_stops_cleanly_and_resumes(self, mock_post):
+        mock_post.side_effect = [
+            fake_videos_page([1, 2], has_more=True, cursor=2),
+            fake_videos_page([3]),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            tgt = Path(tmp) / "videos.jsonl"
+            params = dict(
+                query={"and": []},
+                access_token="token",
+                start_date="20240101",
+                end_date="20240101",
+            )
+            with request_budget(1):
+                self.assertFalse(dump_videos_query(**params, tgt_jsonl=tgt))
+            self.assertTrue(dump_videos_query(**params, tgt_jsonl=tgt))
+
+            ids = [json.loads(line)["id"] for line in tgt.read_text().splitlines()]
+        self.assertEqual(ids, [1, 2, 3])
+        self.assertEqual(mock_post.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
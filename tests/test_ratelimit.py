@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from researchtikpy import endpoints
+from researchtikpy.ratelimit import (
+    EndpointFamily,
+    RateLimiter,
+    SQLiteTokenBucket,
+    TokenBucket,
+    disable_rate_limiter,
+    enable_rate_limiter,
+    endpoint_family,
+)
+from researchtikpy.transport import post
+from tests.helpers import fake_response
+
+
+class TestEndpointFamily(unittest.TestCase):
+    def test_endpoint_family(self):
+        self.assertEqual(
+            endpoint_family(f"{endpoints.video_query}?fields=id"),
+            EndpointFamily.video_query,
+        )
+        self.assertEqual(endpoint_family(endpoints.followers), EndpointFamily.user)
+        self.assertEqual(endpoint_family(endpoints.review), EndpointFamily.shop)
+        self.assertIsNone(endpoint_family("https://example.com"))
+
+
+@patch("researchtikpy.ratelimit.time.sleep")
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_wait(self, mock_sleep):
+        bucket = TokenBucket(rate=2, capacity=2)
+        waits = [bucket.acquire() for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0, 0])
+        self.assertAlmostEqual(waits[2], 0.5, places=1)
+        self.assertAlmostEqual(waits[3], 1.0, places=1)
+
+    def test_sqlite_buckets_share_state(self, mock_sleep):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "buckets.sqlite"
+            first = SQLiteTokenBucket(path, "video_query", rate=1)
+            second = SQLiteTokenBucket(path, "video_query", rate=1)
+
+            self.assertEqual(first.acquire(), 0)
+            self.assertGreater(second.acquire(), 0.9)
+            self.assertEqual(SQLiteTokenBucket(path, "user", rate=1).acquire(), 0)
+
+    def test_transport_acquires_per_family(self, mock_sleep):
+        limiter = enable_rate_limiter({EndpointFamily.user: 1})
+        try:
+            with patch(
+                "researchtikpy.transport.requests.post", return_value=fake_response({})
+            ):
+                post(endpoints.user_info, "token", json={})
+                post(endpoints.user_info, "token", json={})
+                post(endpoints.video_query, "token", json={})
+        finally:
+            disable_rate_limiter()
+
+        self.assertIsInstance(limiter, RateLimiter)
+        self.assertEqual(mock_sleep.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
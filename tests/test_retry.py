@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from researchtikpy.retry import (
+    ErrorClass,
+    RetryConfig,
+    RetryPolicy,
+    classify,
+    retry_after,
+    send_with_retries,
+)
+from tests.helpers import fake_response
+
+
+def rate_limited(headers=None):
+    response = fake_response(
+        {"error": {"code": "rate_limit_exceeded", "message": ""}}, 429
+    )
+    response.headers = headers or {}
+    return response
+
+
+ok = fake_response({"data": {}, "error": {"code": "ok", "message": ""}})
+
+
+class TestClassify(unittest.TestCase):
+    def test_classify(self):
+        self.assertIsNone(classify(ok))
+        self.assertEqual(classify(rate_limited()), ErrorClass.rate_limit)
+        backend = fake_response(
+            {"error": {"code": "x", "message": "Server Internal Error"}}, 500
+        )
+        self.assertEqual(classify(backend), ErrorClass.backend_failure)
+        search_id = fake_response(
+            {"error": {"code": "x", "message": "Search Id 123 is invalid or expired"}},
+            400,
+        )
+        self.assertEqual(classify(search_id), ErrorClass.search_id_not_found)
+        invalid = fake_response(
+            {"error": {"code": "invalid_params", "message": "bad query"}}, 400
+        )
+        self.assertIsNone(classify(invalid))
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after(rate_limited({"Retry-After": "7"})), 7)
+        self.assertEqual(retry_after(rate_limited({"X-RateLimit-Reset": "3"})), 3)
+        self.assertIsNone(retry_after(rate_limited()))
+
+
+@patch("researchtikpy.retry.time.sleep")
+class TestSendWithRetries(unittest.TestCase):
+    def test_retries_until_success(self, mock_sleep):
+        send = Mock(
+            side_effect=[rate_limited({"Retry-After": "5"}), rate_limited(), ok]
+        )
+
+        self.assertIs(send_with_retries(send), ok)
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[0].args, (5.0,))
+        self.assertLessEqual(
+            mock_sleep.call_args_list[1].args[0], 4
+        )  # full jitter of 2 * 2**1
+
+    def test_gives_up_after_max_attempts(self, mock_sleep):
+        config = RetryConfig(
+            policies={ErrorClass.rate_limit: RetryPolicy(max_attempts=2)}
+        )
+        send = Mock(return_value=rate_limited())
+
+        self.assertEqual(send_with_retries(send, config).status_code, 429)
+        self.assertEqual(send.call_count, 3)
+
+    def test_gives_up_when_elapsed_budget_is_used(self, mock_sleep):
+        config = RetryConfig(max_elapsed=10)
+        send = Mock(return_value=rate_limited({"Retry-After": "60"}))
+
+        self.assertEqual(send_with_retries(send, config).status_code, 429)
+        send.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_connection_errors(self, mock_sleep):
+        config = RetryConfig(
+            policies={ErrorClass.connection_error: RetryPolicy(max_attempts=1)}
+        )
+        send = Mock(side_effect=requests.ConnectionError("reset"))
+
+        with self.assertRaises(requests.ConnectionError):
+            send_with_retries(send, config)
+        self.assertEqual(send.call_count, 2)
+
+    def test_transport_retries_video_queries(self, mock_sleep):
+        from researchtikpy.get_query import iter_pages
+
+        page = fake_response(
+            {
+                "data": {"videos": [], "has_more": False},
+                "error": {"code": "ok", "message": ""},
+            }
+        )
+        with patch(
+            "researchtikpy.transport.requests.post", side_effect=[rate_limited(), page]
+        ):
+            pages = list(
+                iter_pages({"start_date": "20240101", "end_date": "20240101"}, "token")
+            )
+
+        self.assertEqual(len(pages), 1)
+        mock_sleep.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from unittest.mock import patch
+
+from researchtikpy import sample_videos
+from tests.helpers import fake_videos_page
+
+
+class TestSampleVideos(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_stops_at_sample_size(self, mock_post_query):
+        next_id = iter(range(10_000))
+        mock_post_query.side_effect = lambda full_query, **kwargs: fake_videos_page(
+            [next(next_id) for _ in range(10)]
+        )
+
+        df = sample_videos(
+            {"and": []}, "token", "20240101", "20240310", n=25, max_workers=2
+        )
+
+        self.assertEqual(len(df), 25)
+        self.assertEqual(df["id"].nunique(), 25)
+        self.assertTrue(
+            all(
+                c.kwargs["full_query"]["is_random"]
+                for c in mock_post_query.call_args_list
+            )
+        )
+        self.assertLess(mock_post_query.call_count, 6)
+
+    @patch("researchtikpy.get_query.post_query")
+    def test_saturated_windows_stop(self, mock_post_query):
+        # every window only has the videos 1 to 3
+        mock_post_query.side_effect = lambda full_query, **kwargs: fake_videos_page(
+            [1, 2, 3]
+        )
+
+        df = sample_videos(
+            {"and": []}, "token", "20240101", "20240102", n=100, window_size=1
+        )
+
+        self.assertEqual(sorted(df["id"]), [1, 2, 3])
+        self.assertEqual(df.attrs["sampling"]["saturated_windows"], 2)
+        self.assertEqual(mock_post_query.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
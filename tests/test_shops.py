@@ -1,7 +1,12 @@
 import unittest
+from unittest.mock import patch
 
+import pandas as pd
+
+from researchtikpy import collect_product_reviews, collect_products, collect_shops
+from researchtikpy.quota import request_budget
 from researchtikpy.shops import get_product_info, get_product_reviews, get_shop_info
-from tests.helpers import access_token
+from tests.helpers import access_token, fake_response
 
 
 class TestShops(unittest.TestCase):
@@ -24,3 +29,102 @@ class TestShops(unittest.TestCase):
             product_id=product_id, access_token=access_token()
         )
         self.assertEqual(response.status_code, 200)
+
+
+def shop_page(key, n, first=0):
+    records = [{"id": first + i} for i in range(n)]
+    return fake_response(
+        {"data": {key: records}, "error": {"code": "ok", "message": ""}}
+    )
+
+
+class TestShopCollectors(unittest.TestCase):
+    @patch("researchtikpy.shops.pooled_session")
+    def test_collect_products_pages_until_a_short_page(self, mock_pooled_session):
+        def respond(url, headers, json, params=None):
+            page_start, page_size = json["page_start"], json["page_size"]
+            n = {1: 2, 2: 2, 3: 1}.get(page_start, 0) if json["shop_id"] == "7" else 0
+            return shop_page("products", n, first=10 * page_start)
+
+        mock_pooled_session.return_value.post.side_effect = respond
+
+        products_df = collect_products(
+            ["7", "8", "7"], "token", page_size=2, max_workers=2
+        )
+
+        requested = [
+            c.kwargs["json"]
+            for c in mock_pooled_session.return_value.post.call_args_list
+        ]
+        shop_7_pages = sorted(
+            body["page_start"] for body in requested if body["shop_id"] == "7"
+        )
+        self.assertEqual(shop_7_pages[:3], [1, 2, 3])
+        self.assertLessEqual(len(shop_7_pages), 4)  # at most one page beyond the last
+        self.assertEqual(list(products_df["id"]), [10, 11, 20, 21, 30])
+        self.assertEqual(list(products_df["shop_id"]), [7] * 5)
+        self.assertEqual(str(products_df["shop_id"].dtype), "int64")
+        self.assertEqual(products_df.attrs["incomplete_shop_ids"], [])
+
+    @patch("researchtikpy.shops.pooled_session")
+    def test_collect_product_reviews_fans_out_known_pages(self, mock_pooled_session):
+        def respond(url, headers, json, params=None):
+            if json["product_id"] == 2:
+                return fake_response({"error": {"code": "internal_error"}}, 500)
+            n = max(0, min(10, 25 - 10 * (json["page_start"] - 1)))
+            reviews = [{"review_rating": 5, "create_time": 1700000000}] * n
+            return fake_response({"data": {"reviews": reviews}})
+
+        mock_pooled_session.return_value.post.side_effect = respond
+        products_df = pd.DataFrame(
+            {"product_id": [1, 2, 3], "product_review_count": [25, 4, 0]}
+        )
+
+        reviews_df = collect_product_reviews(
+            products_df, "token", page_size=10, max_workers=1, pages_per_product=4
+        )
+
+        requested = [
+            c.kwargs["json"]
+            for c in mock_pooled_session.return_value.post.call_args_list
+        ]
+        self.assertEqual(
+            [(body["product_id"], body["page_start"]) for body in requested],
+            [(1, 1), (1, 2), (1, 3), (2, 1)],
+        )
+        self.assertEqual(len(reviews_df), 25)
+        self.assertEqual(str(reviews_df["review_rating"].dtype), "Int8")
+        self.assertEqual(str(reviews_df["create_time"].dtype), "datetime64[s, UTC]")
+        self.assertEqual(reviews_df.attrs["skipped_product_ids"], [3])
+        self.assertEqual(reviews_df.attrs["incomplete_product_ids"], [2])
+
+    @patch("researchtikpy.shops.pooled_session")
+    def test_collect_shops_stops_when_the_budget_runs_out(self, mock_pooled_session):
+        def respond(url, headers, json, params=None):
+            return fake_response(
+                {"data": {"shops": [{"shop_id": len(json["shop_name"])}]}}
+            )
+
+        mock_pooled_session.return_value.post.side_effect = respond
+
+        with request_budget(2):
+            shops_df = collect_shops(["a", "bb", "ccc", "dddd"], "token", max_workers=1)
+
+        self.assertEqual(list(shops_df["shop_name_query"]), ["a", "bb"])
+        self.assertEqual(shops_df.attrs["incomplete_shop_names"], ["ccc", "dddd"])
+        self.assertEqual(shops_df.attrs["failed_shop_names"], [])
+
+    @patch("researchtikpy.shops.pooled_session")
+    def test_collect_products_stops_when_the_budget_runs_out(self, mock_pooled_session):
+        def respond(url, headers, json, params=None):
+            return shop_page("products", 1, first=int(json["shop_id"]))
+
+        mock_pooled_session.return_value.post.side_effect = respond
+
+        with request_budget(2):
+            products_df = collect_products(
+                ["1", "2", "3"], "token", page_size=2, max_workers=1, pages_per_shop=1
+            )
+
+        self.assertEqual(list(products_df["id"]), [1, 2])
+        self.assertEqual(products_df.attrs["incomplete_shop_ids"], ["3"])
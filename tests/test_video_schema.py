@@ -0,0 +1,72 @@
+import unittest
+
+import pandas as pd
+
+from researchtikpy.video_schema import pa, to_video_frame
+
+
+class TestToVideoFrame(unittest.TestCase):
+    videos = [
+        {
+            "id": 7301234567890123457,
+            "create_time": 1700000000,
+            "region_code": "DE",
+            "username": "alice",
+            "view_count": 12,
+            "comment_count": 3,
+            "music_id": 7301234567890123459,
+            "hashtag_names": ["fyp", "cats"],
+            "video_description": "hello",
+        },
+        {
+            "id": 2,
+            "create_time": 1700000060,
+            "region_code": "US",
+            "username": "alice",
+            "view_count": None,
+        },
+    ]
+
+    def test_dtypes(self):
+        df = to_video_frame(self.videos)
+
+        self.assertEqual(df["id"].dtype, "int64")
+        self.assertEqual(df["id"].iloc[0], 7301234567890123457)
+        self.assertEqual(df["music_id"].iloc[0], 7301234567890123459)
+        self.assertEqual(df["view_count"].dtype, "Int64")
+        self.assertTrue(pd.isna(df["view_count"].iloc[1]))
+        self.assertEqual(df["comment_count"].dtype, "UInt32")
+        self.assertEqual(df["region_code"].dtype, "category")
+        self.assertEqual(df["username"].dtype, "category")
+        self.assertEqual(
+            df["create_time"].iloc[0], pd.Timestamp("2023-11-14 22:13:20", tz="UTC")
+        )
+        self.assertEqual(list(df["hashtag_names"].iloc[0]), ["fyp", "cats"])
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_list_columns_are_arrow_backed(self):
+        df = to_video_frame(self.videos)
+        self.assertIsInstance(df["hashtag_names"].dtype, pd.ArrowDtype)
+
+    def test_converts_dataframes_and_keeps_other_columns(self):
+        df = to_video_frame(pd.DataFrame([{"id": 1, "share_count": 4, "sub_query": 0}]))
+        self.assertEqual(df["share_count"].dtype, "UInt32")
+        self.assertEqual(df["sub_query"].iloc[0], 0)
+
+    def test_integer_columns_keep_large_ids_exact(self):
+        df = to_video_frame(
+            pd.DataFrame(
+                {
+                    "view_count": [1.0, None],
+                    "playlist_id": pd.Series([7301234567890123459, None], dtype=object),
+                }
+            )
+        )
+        self.assertEqual(df["view_count"].dtype, "Int64")
+        self.assertEqual(df["view_count"].iloc[0], 1)
+        self.assertEqual(df["playlist_id"].iloc[0], 7301234567890123459)
+        self.assertTrue(pd.isna(df["playlist_id"].iloc[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
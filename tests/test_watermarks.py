@@ -0,0 +1,139 @@
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from researchtikpy import get_videos_query
+from researchtikpy.date_windows import format_date
+from researchtikpy.watermarks import WatermarkStore, watermark_key
+from tests.helpers import fake_videos_page
+
+
+class TestWatermarkStore(unittest.TestCase):
+    def test_missing_range(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = WatermarkStore(Path(tmp))
+            self.assertEqual(
+                store.missing_range("q", "20240101", "20240110"),
+                ("20240101", "20240110"),
+            )
+
+            store.advance(
+                "q",
+                "20240101",
+                "20240105",
+                [{"id": 1, "create_time": 1704400000}, {"id": 2}],
+            )
+            self.assertEqual(store.load("q").latest_create_time, 1704400000)
+            self.assertEqual(
+                store.missing_range("q", "20240101", "20240110"),
+                ("20240106", "20240110"),
+            )
+            self.assertIsNone(store.missing_range("q", "20240101", "20240105"))
+
+    def test_days_before_or_after_a_gap_are_not_skipped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = WatermarkStore(Path(tmp))
+            store.advance("q", "20240115", "20240131", [])
+            self.assertEqual(
+                store.missing_range("q", "20240101", "20240210"),
+                ("20240101", "20240210"),
+            )
+            self.assertEqual(
+                store.missing_range("q", "20240201", "20240210"),
+                ("20240201", "20240210"),
+            )
+
+            store.advance(
+                "q", "20240301", "20240310", []
+            )  # leaves February uncollected
+            self.assertEqual(
+                store.missing_range("q", "20240201", "20240229"),
+                ("20240201", "20240229"),
+            )
+
+            store.advance("q", "20240201", "20240229", [])  # touches the range of March
+            self.assertEqual(
+                (store.load("q").start_date, store.load("q").end_date),
+                ("20240201", "20240310"),
+            )
+            self.assertIsNone(store.missing_range("q", "20240215", "20240305"))
+
+    def test_key_depends_on_canonical_query_and_fields(self):
+        query = {
+            "and": [
+                {"operation": "IN", "field_name": "hashtag_name", "field_values": ["a"]}
+            ]
+        }
+        self.assertEqual(watermark_key(query), watermark_key(dict(query)))
+        self.assertNotEqual(
+            watermark_key(query), watermark_key(query, fields="id,view_count")
+        )
+
+
+class TestSinceLastRun(unittest.TestCase):
+    @patch("researchtikpy.get_query.post_query")
+    def test_second_run_only_requests_new_days(self, mock_post_query):
+        mock_post_query.side_effect = lambda full_query, **kwargs: fake_videos_page(
+            [int(full_query["start_date"])]
+        )
+        params = dict(
+            query={"and": []}, access_token="token", since_last_run=True, window_size=1
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            first = get_videos_query(
+                **params, start_date="20240101", end_date="20240103", watermark_dir=tmp
+            )
+            second = get_videos_query(
+                **params, start_date="20240101", end_date="20240104", watermark_dir=tmp
+            )
+            third = get_videos_query(
+                **params, start_date="20240101", end_date="20240104", watermark_dir=tmp
+            )
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(list(second["id"]), [20240104])
+        self.assertTrue(third.empty)
+        self.assertEqual(mock_post_query.call_count, 4)
+
+    @patch("researchtikpy.get_query.post_query")
+    def test_current_day_is_requested_again(self, mock_post_query):
+        mock_post_query.return_value = fake_videos_page([1])
+        today = format_date(datetime.now(timezone.utc))
+        with tempfile.TemporaryDirectory() as tmp:
+            for _ in range(2):
+                get_videos_query(
+                    {"and": []},
+                    "token",
+                    today,
+                    today,
+                    since_last_run=True,
+                    watermark_dir=tmp,
+                )
+
+        start_dates = [
+            c.kwargs["full_query"]["start_date"] for c in mock_post_query.call_args_list
+        ]
+        self.assertEqual(start_dates, [today, today])
+
+    @patch("researchtikpy.get_query.post_query")
+    def test_truncated_run_does_not_advance_watermark(self, mock_post_query):
+        mock_post_query.return_value = fake_videos_page([1, 2])
+        with tempfile.TemporaryDirectory() as tmp:
+            get_videos_query(
+                {"and": []},
+                "token",
+                "20240101",
+                "20240101",
+                total_max_count=1,
+                since_last_run=True,
+                watermark_dir=tmp,
+            )
+            self.assertIsNone(
+                WatermarkStore(Path(tmp)).load(watermark_key({"and": []}))
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()